@@ -5,13 +5,36 @@ Handles OpenAI integration for answering questions based on GitHub repository da
 
 import os
 import json
-from typing import Dict, List, Any, Optional
-from openai import OpenAI
+import time
+import threading
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
+from llm_scheduler import get_scheduler, PRIORITY_INTERACTIVE, PRIORITY_BATCH
+from model_router import ModelRouter
+from jira_analytics import format_flow_metrics
+import metrics
 
 # Load environment variables
 load_dotenv()
 
+# Structured findings returned alongside the answer (see analyze_repository_with_findings)
+FINDING_CATEGORIES = ('security', 'performance', 'code_quality', 'bug', 'documentation')
+FINDING_SEVERITIES = ('critical', 'high', 'medium', 'low')
+MAX_FINDINGS = 10
+
+# What the map-phase summary prompt includes per repository (see _prepare_repository_summary_context)
+SUMMARY_MAX_COMMITS = 15
+SUMMARY_FILES_PER_COMMIT = 5
+SUMMARY_PATCH_CHARS = 1500
+
+# Details of the last completion made in the current context: per thread for WSGI
+# requests, per task for async requests sharing one event loop thread
+_last_call_info = contextvars.ContextVar('last_ai_call_info', default=None)
+
 class GitHubAIService:
     """
     AI service that uses OpenAI to answer questions based on GitHub repository information
@@ -23,15 +46,154 @@ class GitHubAIService:
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY not found in environment variables")
         
-        self.client = OpenAI(api_key=self.api_key)
+        # Sync client, created lazily per process like the async client
+        self._client = None
+        self._client_pid = None
+        
+        # Completions run through the process-wide scheduler on an async client,
+        # created lazily so it is bound to the scheduler's event loop
+        self.scheduler = get_scheduler()
+        self._async_client = None
+        self._async_client_pid = None
         # Model options (as of 2024):
         # - gpt-4o-mini: Best value, 60% cheaper than gpt-3.5-turbo, faster, better performance
         # - gpt-4o: Latest multimodal model, excellent for complex analysis
         # - gpt-4-turbo: Good balance of performance and cost
         # - gpt-3.5-turbo: Legacy model, not recommended for new projects
         self.model = "gpt-4o-mini"
+        
+        # Per-request model routing; self.model is the model of the fast route
+        self.router = ModelRouter(fast_model=self.model)
+        
+        # Map-reduce multi-project analysis: per-repository summaries are cached by head SHA and commit window
+        self.map_reduce_workers = int(os.getenv('MAP_REDUCE_WORKERS', 5))
+        self.repo_summary_cache_size = int(os.getenv('REPO_SUMMARY_CACHE_SIZE', 256))
+        self._repo_summary_cache = OrderedDict()
+        self._repo_summary_cache_lock = threading.Lock()
     
-    def analyze_repository_data(self, repo_data: Dict, commits_data: List[Dict], question: str) -> str:
+    @property
+    def client(self) -> OpenAI:
+        """Get the sync OpenAI client (recreated in a forked child process)"""
+        if self._client is None or self._client_pid != os.getpid():
+            self._client = OpenAI(api_key=self.api_key)
+            self._client_pid = os.getpid()
+        return self._client
+    
+    def _get_async_client(self) -> AsyncOpenAI:
+        """Get the async OpenAI client (recreated in a forked child process)"""
+        if self._async_client is None or self._async_client_pid != os.getpid():
+            self._async_client = AsyncOpenAI(api_key=self.api_key)
+            self._async_client_pid = os.getpid()
+        return self._async_client
+    
+    def _chat_completion(self, messages: List[Dict], max_tokens: int, temperature: float,
+                         priority: int = PRIORITY_INTERACTIVE, timeout: Optional[float] = None,
+                         route: Optional[Dict[str, str]] = None, **kwargs):
+        """
+        Run a chat completion through the shared LLM scheduler
+        
+        Args:
+            messages: Chat messages
+            max_tokens: Maximum tokens to generate
+            temperature: Sampling temperature
+            priority: PRIORITY_INTERACTIVE for user-facing calls, PRIORITY_BATCH for background work
+            timeout: Per-call timeout in seconds (defaults to OPENAI_TIMEOUT_SECONDS)
+            route: Routing decision from self.router.select (defaults to the fast route)
+            
+        Returns:
+            OpenAI chat completion response
+        """
+        route = route or {'route': 'fast', 'model': self.model, 'reason': 'default'}
+        # Threads and contexts are reused across requests; never report a previous request's call
+        _last_call_info.set(None)
+        started = time.perf_counter()
+        try:
+            response = self.scheduler.run(
+                lambda: self._get_async_client().chat.completions.create(
+                    model=route['model'],
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    **kwargs
+                ),
+                priority=priority,
+                timeout=timeout
+            )
+        except Exception as e:
+            self._record_failed_completion(route, e, time.perf_counter() - started)
+            raise
+        self._record_completion(route, response, time.perf_counter() - started)
+        return response
+    
+    async def _achat_completion(self, messages: List[Dict], max_tokens: int, temperature: float,
+                                priority: int = PRIORITY_INTERACTIVE, timeout: Optional[float] = None,
+                                route: Optional[Dict[str, str]] = None, **kwargs):
+        """Async variant of _chat_completion for callers running on an event loop"""
+        route = route or {'route': 'fast', 'model': self.model, 'reason': 'default'}
+        _last_call_info.set(None)
+        started = time.perf_counter()
+        try:
+            response = await self.scheduler.submit_async(
+                lambda: self._get_async_client().chat.completions.create(
+                    model=route['model'],
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    **kwargs
+                ),
+                priority=priority,
+                timeout=timeout
+            )
+        except Exception as e:
+            self._record_failed_completion(route, e, time.perf_counter() - started)
+            raise
+        self._record_completion(route, response, time.perf_counter() - started)
+        return response
+    
+    def _record_completion(self, route: Dict[str, str], response, latency: float):
+        """Record latency and token usage of a completion for the router and the caller"""
+        usage = getattr(response, 'usage', None)
+        prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+        completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+        
+        # Prompt tokens served from the provider's prefix cache
+        details = getattr(usage, 'prompt_tokens_details', None)
+        if isinstance(details, dict):
+            cached_tokens = details.get('cached_tokens', 0) or 0
+        else:
+            cached_tokens = getattr(details, 'cached_tokens', 0) or 0
+        
+        self.router.record(route['route'], route['model'], latency, prompt_tokens, completion_tokens, cached_tokens)
+        metrics.record_upstream_call('openai', f"chat.completions {route['model']}", 200, latency)
+        metrics.record_openai_tokens(route['model'], prompt_tokens, completion_tokens, cached_tokens)
+        _last_call_info.set({
+            'model': route['model'],
+            'route': route['route'],
+            'route_reason': route.get('reason'),
+            'latency_ms': round(latency * 1000, 1),
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'cached_tokens': cached_tokens,
+                'completion_tokens': completion_tokens
+            }
+        })
+    
+    def _record_failed_completion(self, route: Dict[str, str], error: Exception, latency: float):
+        """Record a completion that raised (API error status, or 'error' for timeouts and connection failures)"""
+        status = getattr(error, 'status_code', None) or 'error'
+        metrics.record_upstream_call('openai', f"chat.completions {route['model']}", status, latency)
+    
+    def get_last_call_info(self) -> Dict[str, Any]:
+        """
+        Get details of the last completion made on the current thread (or async task)
+        
+        Returns:
+            Dictionary with model, route, latency and token usage (empty if no call was made)
+        """
+        return _last_call_info.get() or {}
+    
+    def analyze_repository_data(self, repo_data: Dict, commits_data: List[Dict], question: str, model: Optional[str] = None,
+                                context: Optional[str] = None, history: Optional[List[Dict]] = None) -> str:
         """
         Analyze GitHub repository data and answer a question about it
         
@@ -39,33 +201,40 @@ class GitHubAIService:
             repo_data: Repository metadata from /api/git/repo endpoint
             commits_data: List of commits from /api/git/commits or /api/git/commit-details endpoint
             question: User's question about the repository
+            model: Optional route name ('fast'/'strong') or model name overriding the router
+            context: Context already built by _prepare_context (e.g. kept in a chat session)
+            history: Prior turns of the conversation as {'question', 'answer'} dictionaries
             
         Returns:
             AI-generated answer based on the repository data
         """
-        
-        # Prepare context data for the AI
-        context = self._prepare_context(repo_data, commits_data)
-        
-        # Create the prompt for the AI
-        prompt = self._create_prompt(context, question)
+        messages, route = self._prepare_chat_request(repo_data, commits_data, question, model, context, history)
         
         try:
             # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "You are an expert software engineer and GitHub repository analyst. You analyze GitHub repository data and provide detailed, accurate answers about codebases, commit patterns, development activity, and technical details. Always base your answers on the provided repository data."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
+            response = self._chat_completion(
+                messages=messages,
+                max_tokens=1000,
+                temperature=0.7,
+                route=route
+            )
+            
+            return response.choices[0].message.content.strip()
+            
+        except Exception as e:
+            return f"Error generating AI response: {str(e)}"
+    
+    async def aanalyze_repository_data(self, repo_data: Dict, commits_data: List[Dict], question: str, model: Optional[str] = None,
+                                       context: Optional[str] = None, history: Optional[List[Dict]] = None) -> str:
+        """Async variant of analyze_repository_data for callers running on an event loop"""
+        messages, route = self._prepare_chat_request(repo_data, commits_data, question, model, context, history)
+        
+        try:
+            response = await self._achat_completion(
+                messages=messages,
                 max_tokens=1000,
-                temperature=0.7
+                temperature=0.7,
+                route=route
             )
             
             return response.choices[0].message.content.strip()
@@ -73,10 +242,212 @@ class GitHubAIService:
         except Exception as e:
             return f"Error generating AI response: {str(e)}"
     
+    def _prepare_chat_request(self, repo_data: Dict, commits_data: List[Dict], question: str, model: Optional[str],
+                              context: Optional[str], history: Optional[List[Dict]]) -> tuple:
+        """Build the chat messages and routing decision for a repository question"""
+        # Prepare context data for the AI
+        if context is None:
+            context = self._prepare_context(repo_data, commits_data)
+        
+        messages = self._create_chat_messages(context, question, history)
+        route = self.router.select('chat', question, len(context), override=model)
+        return messages, route
+    
+    def analyze_repository_with_findings(self, repo_data: Dict, commits_data: List[Dict], question: str, model: Optional[str] = None,
+                                         context: Optional[str] = None, history: Optional[List[Dict]] = None) -> Dict[str, Any]:
+        """
+        Answer a question about a repository and return structured findings in the same call
+        
+        The model replies with a JSON object holding the markdown answer and a list of
+        findings (category, severity, title, file, recommendation), which is validated
+        locally. Invalid findings are dropped; a reply that is not valid JSON is
+        returned as the answer with no findings.
+        
+        Args:
+            repo_data: Repository metadata
+            commits_data: List of commits
+            question: User's question about the repository
+            model: Optional route name ('fast'/'strong') or model name overriding the router
+            context: Context already built by _prepare_context
+            history: Prior turns of the conversation as {'question', 'answer'} dictionaries
+            
+        Returns:
+            Dictionary with 'answer' (markdown text) and 'findings' (list of validated findings)
+        """
+        messages, route = self._prepare_chat_request(repo_data, commits_data, question, model, context, history)
+        # The output instructions go after the question so the cached prefix is shared with plain chat
+        messages[-1]["content"] += "\n\n" + self._create_findings_instruction()
+        
+        try:
+            response = self._chat_completion(
+                messages=messages,
+                max_tokens=1500,
+                temperature=0.3,
+                route=route,
+                response_format={"type": "json_object"}
+            )
+            content = response.choices[0].message.content.strip()
+        except Exception as e:
+            return {'answer': f"Error generating AI response: {str(e)}", 'findings': []}
+        
+        return self._parse_findings_reply(content)
+    
+    async def aanalyze_repository_with_findings(self, repo_data: Dict, commits_data: List[Dict], question: str, model: Optional[str] = None,
+                                                context: Optional[str] = None, history: Optional[List[Dict]] = None) -> Dict[str, Any]:
+        """Async variant of analyze_repository_with_findings for callers running on an event loop"""
+        messages, route = self._prepare_chat_request(repo_data, commits_data, question, model, context, history)
+        messages[-1]["content"] += "\n\n" + self._create_findings_instruction()
+        
+        try:
+            response = await self._achat_completion(
+                messages=messages,
+                max_tokens=1500,
+                temperature=0.3,
+                route=route,
+                response_format={"type": "json_object"}
+            )
+            content = response.choices[0].message.content.strip()
+        except Exception as e:
+            return {'answer': f"Error generating AI response: {str(e)}", 'findings': []}
+        
+        return self._parse_findings_reply(content)
+    
+    def _parse_findings_reply(self, content: str) -> Dict[str, Any]:
+        """Split a JSON reply into the answer and validated findings (invalid JSON becomes the answer)"""
+        try:
+            result = json.loads(content)
+        except json.JSONDecodeError:
+            return {'answer': content, 'findings': []}
+        
+        if not isinstance(result, dict):
+            return {'answer': content, 'findings': []}
+        
+        answer = result.get('answer')
+        return {
+            'answer': answer.strip() if isinstance(answer, str) and answer.strip() else content,
+            'findings': self._validate_findings(result.get('findings'))
+        }
+    
+    def _create_findings_instruction(self) -> str:
+        """Create the output format instructions for structured findings"""
+        return f"""OUTPUT FORMAT: Respond with a single JSON object with exactly these keys:
+- "answer": your full answer to the question as a markdown string (same content and formatting you would normally give)
+- "findings": a list of concrete, actionable problems found in the repository data, each an object with:
+  - "category": one of {", ".join(FINDING_CATEGORIES)}
+  - "severity": one of {", ".join(FINDING_SEVERITIES)}
+  - "title": short ticket title (under 100 characters)
+  - "file": path of the affected file, or null if not specific to one file
+  - "recommendation": what should be done to fix it
+  - "evidence": optional short quote of the code, commit or data supporting the finding
+
+Only include findings that are supported by the repository data. Use an empty list when there are none; do not report general observations or praise as findings."""
+    
+    def _validate_findings(self, findings: Any) -> List[Dict[str, Any]]:
+        """
+        Validate and normalize findings returned by the model
+        
+        Args:
+            findings: Raw "findings" value from the model's JSON reply
+            
+        Returns:
+            List of findings with category, severity, title, file, recommendation and evidence
+        """
+        if not isinstance(findings, list):
+            return []
+        
+        validated = []
+        seen_titles = set()
+        for finding in findings:
+            if not isinstance(finding, dict):
+                continue
+            
+            category = str(finding.get('category', '')).strip().lower().replace('-', '_').replace(' ', '_')
+            severity = str(finding.get('severity', '')).strip().lower()
+            title = finding.get('title')
+            recommendation = finding.get('recommendation')
+            
+            if category not in FINDING_CATEGORIES or severity not in FINDING_SEVERITIES:
+                continue
+            if not isinstance(title, str) or not title.strip():
+                continue
+            if not isinstance(recommendation, str) or not recommendation.strip():
+                continue
+            
+            title = title.strip()[:100]
+            if title.lower() in seen_titles:
+                continue
+            seen_titles.add(title.lower())
+            
+            file_path = finding.get('file')
+            evidence = finding.get('evidence')
+            validated.append({
+                'category': category,
+                'severity': severity,
+                'title': title,
+                'file': file_path.strip() if isinstance(file_path, str) and file_path.strip() else None,
+                'recommendation': recommendation.strip(),
+                'evidence': evidence.strip() if isinstance(evidence, str) and evidence.strip() else None
+            })
+            
+            if len(validated) >= MAX_FINDINGS:
+                break
+        
+        return validated
+    
+    def _create_chat_messages(self, context: str, question: str, history: Optional[List[Dict]] = None) -> List[Dict]:
+        """
+        Create the chat messages for a question, replaying prior turns of a conversation
+        
+        The first turn carries the full prompt (instructions, context and first
+        question); follow-ups are plain user/assistant messages appended after it,
+        so every request in a conversation shares the same cacheable prefix.
+        
+        Args:
+            context: Repository and commits context
+            question: User's question
+            history: Prior turns as {'question', 'answer'} dictionaries, oldest first
+            
+        Returns:
+            List of chat messages
+        """
+        messages = [
+            {
+                "role": "system", 
+                "content": "You are an expert software engineer and GitHub repository analyst. You analyze GitHub repository data and provide detailed, accurate answers about codebases, commit patterns, development activity, and technical details. Always base your answers on the provided repository data."
+            }
+        ]
+        
+        turns = (history or []) + [{'question': question}]
+        for index, turn in enumerate(turns):
+            content = self._create_prompt(context, turn['question']) if index == 0 else turn['question']
+            messages.append({"role": "user", "content": content})
+            if 'answer' in turn:
+                messages.append({"role": "assistant", "content": turn['answer']})
+        
+        return messages
+    
+    def prepare_context(self, repo_data: Dict, commits_data: List[Dict]) -> str:
+        """
+        Build the single-repository context once so it can be reused across questions
+        
+        Args:
+            repo_data: Repository metadata
+            commits_data: List of commits
+            
+        Returns:
+            Context to pass to analyze_repository_data
+        """
+        return self._prepare_context(repo_data, commits_data)
+    
     def _prepare_context(self, repo_data: Dict, commits_data: List[Dict]) -> str:
         """
         Prepare context data from repository and commits information
         
+        The output is deterministic for the same data, and fast-changing counters
+        (stars, forks, open issues, last update) come last, so repeated questions
+        about a repository share a byte-identical prompt prefix that the provider
+        can cache.
+        
         Args:
             repo_data: Repository metadata
             commits_data: List of commits
@@ -94,12 +465,8 @@ class GitHubAIService:
             context_parts.append(f"Full Name: {repo_data.get('full_name', 'N/A')}")
             context_parts.append(f"Description: {repo_data.get('description', 'N/A')}")
             context_parts.append(f"Language: {repo_data.get('language', 'N/A')}")
-            context_parts.append(f"Languages: {json.dumps(repo_data.get('languages', {}), indent=2)}")
-            context_parts.append(f"Stars: {repo_data.get('stars', 0)}")
-            context_parts.append(f"Forks: {repo_data.get('forks', 0)}")
-            context_parts.append(f"Open Issues: {repo_data.get('open_issues', 0)}")
+            context_parts.append(f"Languages: {json.dumps(repo_data.get('languages', {}), indent=2, sort_keys=True)}")
             context_parts.append(f"Created: {repo_data.get('created_at', 'N/A')}")
-            context_parts.append(f"Last Updated: {repo_data.get('updated_at', 'N/A')}")
             context_parts.append(f"Default Branch: {repo_data.get('default_branch', 'N/A')}")
             context_parts.append(f"Private: {repo_data.get('is_private', False)}")
             
@@ -131,12 +498,29 @@ class GitHubAIService:
                             for line in patch_lines:
                                 context_parts.append(f"        {line}")
         
+        # Fast-changing repository counters go last
+        if repo_data:
+            context_parts.append("\n=== REPOSITORY ACTIVITY SNAPSHOT ===")
+            context_parts.extend(self._prepare_repository_snapshot(repo_data))
+        
         return "\n".join(context_parts)
     
+    def _prepare_repository_snapshot(self, repo_data: Dict) -> List[str]:
+        """Fast-changing repository counters, kept out of the cacheable prompt prefix"""
+        return [
+            f"Stars: {repo_data.get('stars', 0)}",
+            f"Forks: {repo_data.get('forks', 0)}",
+            f"Open Issues: {repo_data.get('open_issues', 0)}",
+            f"Last Updated: {repo_data.get('updated_at', 'N/A')}"
+        ]
+    
     def _create_prompt(self, context: str, question: str) -> str:
         """
         Create a prompt for the AI based on context and question
         
+        Static instructions come first and the question last, so everything up
+        to the question is a stable prefix for provider-side prompt caching.
+        
         Args:
             context: Repository and commits context
             question: User's question
@@ -145,13 +529,23 @@ class GitHubAIService:
             Formatted prompt for the AI
         """
         
-        prompt = f"""
-Based on the following GitHub repository data, please answer the user's question.
-
-REPOSITORY DATA:
-{context}
+        return f"""{self._create_prompt_prefix(context)}
 
-USER QUESTION: {question}
+USER QUESTION: {question}"""
+    
+    def _create_prompt_prefix(self, context: str) -> str:
+        """
+        Create the cacheable part of the single-repository prompt (instructions and context)
+        
+        Args:
+            context: Repository and commits context
+            
+        Returns:
+            Prompt prefix without the user's question
+        """
+        
+        prompt = f"""
+You will be given GitHub repository data followed by a user's question about it. Please answer the question based on the repository data.
 
 Please provide a detailed, helpful answer based on the repository information provided. If the question cannot be answered with the available data, please explain what information is missing and suggest what additional data might be needed.
 
@@ -174,6 +568,9 @@ Focus on:
 - Make API schemas, data structures, and configuration examples clearly formatted in code blocks
 
 Answer in a clear, professional manner suitable for developers and technical stakeholders with proper code formatting.
+
+REPOSITORY DATA:
+{context}
 """
         
         return prompt.strip()
@@ -193,7 +590,7 @@ Answer in a clear, professional manner suitable for developers and technical sta
     
     def set_model(self, model_name: str) -> bool:
         """
-        Set the AI model to use for analysis
+        Set the default (fast route) AI model to use for analysis
         
         Args:
             model_name: Name of the model to use
@@ -205,12 +602,13 @@ Answer in a clear, professional manner suitable for developers and technical sta
             # Test if the model is available
             self.client.models.retrieve(model_name)
             self.model = model_name
+            self.router.routes['fast'] = model_name
             return True
         except Exception as e:
             print(f"Error setting model {model_name}: {str(e)}")
             return False
     
-    def analyze_multiple_repositories(self, repositories_data: List[Dict], commits_data: List[List[Dict]], question: str, jira_data: List[Dict] = None) -> str:
+    def analyze_multiple_repositories(self, repositories_data: List[Dict], commits_data: List[List[Dict]], question: str, jira_data: List[Dict] = None, mode: str = "single", model: Optional[str] = None, summary_window: Optional[Tuple[int, int]] = None) -> str:
         """
         Analyze multiple connected repositories and provide comprehensive cross-project insights
         
@@ -219,21 +617,91 @@ Answer in a clear, professional manner suitable for developers and technical sta
             commits_data: List of commits from each repository
             question: User's question about the repositories
             jira_data: Optional list of Jira project data for project management insights
+            mode: "single" packs every repository into one prompt, "map_reduce" summarizes
+                each repository separately (in parallel, cached by head SHA and commit window) and answers
+                the question over those summaries
+            model: Optional route name ('fast'/'strong') or model name overriding the router
+            summary_window: (commit count, patch characters) the commits were fetched with;
+                part of the map_reduce summary cache key
             
         Returns:
             AI-generated analysis with project connections and detailed instructions
         """
         
+        # Deterministic repository order keeps the prompt prefix byte-stable across requests
+        ordered = sorted(zip(repositories_data, commits_data), key=lambda item: item[0].get('full_name') or '')
+        repositories_data = [repo_data for repo_data, _ in ordered]
+        commits_data = [repo_commits for _, repo_commits in ordered]
+        
+        if mode == "map_reduce":
+            return self._analyze_multiple_repositories_map_reduce(repositories_data, commits_data, question, jira_data, model, summary_window)
+        
         # Prepare context data for multiple repositories
         context = self._prepare_multi_repository_context(repositories_data, commits_data, jira_data)
         
         # Create the prompt for multi-project analysis
         prompt = self._create_multi_project_prompt(context, question)
+        route = self.router.select('multi_project', question, len(context), override=model)
         
         try:
             # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model=self.model,
+            response = self._chat_completion(
+                messages=[
+                    {
+                        "role": "system", 
+                        "content": "You are an expert software architect and full-stack developer. You analyze multiple connected GitHub repositories and provide comprehensive insights about how they work together, API connections, data flow, and detailed development instructions. You excel at creating complete prompts for LLM development tasks that include all necessary context from connected projects."
+                    },
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                max_tokens=2000,
+                temperature=0.7,
+                route=route
+            )
+            
+            return response.choices[0].message.content.strip()
+            
+        except Exception as e:
+            return f"Error generating multi-project AI response: {str(e)}"
+    
+    def _analyze_multiple_repositories_map_reduce(self, repositories_data: List[Dict], commits_data: List[List[Dict]], question: str, jira_data: List[Dict] = None, model: Optional[str] = None, summary_window: Optional[Tuple[int, int]] = None) -> str:
+        """
+        Map-reduce variant of multi-project analysis
+        
+        The map phase produces one question-independent summary per repository in
+        parallel, so deeper per-repository coverage fits in the token limits and the
+        summaries can be reused across questions. The reduce phase answers the
+        question over the summaries.
+        """
+        
+        # Map phase: summarize each repository in parallel
+        workers = max(1, min(self.map_reduce_workers, len(repositories_data)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            summaries = list(executor.map(
+                lambda item: self._summarize_repository(item[0], item[1], summary_window),
+                zip(repositories_data, commits_data)
+            ))
+        
+        # Reduce phase: answer the question over the summaries
+        context_parts = []
+        context_parts.append("=== MULTI-PROJECT ANALYSIS ===")
+        context_parts.append(f"Total repositories analyzed: {len(repositories_data)}")
+        
+        for i, (repo_data, summary) in enumerate(zip(repositories_data, summaries)):
+            context_parts.append(f"\n=== REPOSITORY {i+1}: {repo_data.get('name', 'N/A')} ===")
+            context_parts.append(f"Full Name: {repo_data.get('full_name', 'N/A')}")
+            context_parts.append(summary)
+        
+        context_parts.extend(self._prepare_cross_repository_context(repositories_data, jira_data))
+        
+        context = "\n".join(context_parts)
+        prompt = self._create_multi_project_prompt(context, question)
+        route = self.router.select('multi_project', question, len(context), override=model)
+        
+        try:
+            response = self._chat_completion(
                 messages=[
                     {
                         "role": "system", 
@@ -245,7 +713,8 @@ Answer in a clear, professional manner suitable for developers and technical sta
                     }
                 ],
                 max_tokens=2000,
-                temperature=0.7
+                temperature=0.7,
+                route=route
             )
             
             return response.choices[0].message.content.strip()
@@ -253,7 +722,139 @@ Answer in a clear, professional manner suitable for developers and technical sta
         except Exception as e:
             return f"Error generating multi-project AI response: {str(e)}"
     
-    def generate_commit_story(self, repo_data: Dict, commits_data: List[Dict], story_style: str = "narrative") -> str:
+    def has_repository_summary(self, full_name: str, head_sha: str, window: Tuple[int, int]) -> bool:
+        """
+        Check whether a map-phase summary is cached, before fetching commit details for it
+        
+        Args:
+            full_name: Repository full name (owner/name)
+            head_sha: SHA of the most recent commit
+            window: (commit count, patch characters) the commits are fetched with
+            
+        Returns:
+            True if the summary is cached (and marks it as recently used)
+        """
+        cache_key = (full_name, head_sha, tuple(window))
+        with self._repo_summary_cache_lock:
+            if cache_key not in self._repo_summary_cache:
+                return False
+            self._repo_summary_cache.move_to_end(cache_key)
+            return True
+    
+    def _summarize_repository(self, repo_data: Dict, repo_commits: List[Dict],
+                              window: Optional[Tuple[int, int]] = None) -> str:
+        """
+        Produce (or reuse) the map-phase summary of a single repository
+        
+        Summaries are cached by repository, head SHA and commit window; the model
+        is not part of the key because it is routed from that same context.
+        
+        Args:
+            repo_data: Repository metadata
+            repo_commits: Commits for the repository, most recent first
+            window: (commit count, patch characters) the commits were fetched with
+            
+        Returns:
+            Summary text for the reduce prompt
+        """
+        
+        head_sha = repo_commits[0].get('sha') if repo_commits else None
+        cache_key = (repo_data.get('full_name'), head_sha, tuple(window or (len(repo_commits), 0))) if head_sha else None
+        
+        if cache_key:
+            with self._repo_summary_cache_lock:
+                cached = cache_key in self._repo_summary_cache
+                if cached:
+                    self._repo_summary_cache.move_to_end(cache_key)
+                    summary = self._repo_summary_cache[cache_key]
+            metrics.record_cache('repo_summary', cached)
+            if cached:
+                return summary
+        
+        context = self._prepare_repository_summary_context(repo_data, repo_commits)
+        route = self.router.select('multi_project_summary', context_chars=len(context))
+        
+        try:
+            response = self._chat_completion(
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "You are an expert software architect. You summarize a single GitHub repository so that another engineer can reason about how it connects to other projects. Be factual and base every statement on the provided data."
+                    },
+                    {
+                        "role": "user",
+                        "content": f"""Summarize the following repository in at most 300 words. Cover:
+- Purpose and type of project (frontend, backend, mobile, library, ...)
+- Technology stack and frameworks
+- APIs, endpoints, data models and configuration visible in the changes
+- Integration points with other services
+- What the recent commits changed
+
+REPOSITORY DATA:
+{context}"""
+                    }
+                ],
+                max_tokens=700,
+                temperature=0.3,
+                route=route
+            )
+            summary = response.choices[0].message.content.strip()
+            
+        except Exception as e:
+            # Fall back to the raw context so the reduce phase still sees this repository
+            print(f"Warning: Could not summarize {repo_data.get('full_name', 'N/A')}: {str(e)}")
+            return context
+        
+        if cache_key:
+            with self._repo_summary_cache_lock:
+                self._repo_summary_cache[cache_key] = summary
+                while len(self._repo_summary_cache) > self.repo_summary_cache_size:
+                    self._repo_summary_cache.popitem(last=False)
+        
+        return summary
+    
+    def _prepare_repository_summary_context(self, repo_data: Dict, repo_commits: List[Dict]) -> str:
+        """
+        Prepare the per-repository context for the map phase
+        
+        Each repository gets its own prompt, so this goes deeper than the
+        single-prompt multi-project context (more commits, files and patch text).
+        """
+        
+        context_parts = []
+        
+        context_parts.append(f"Name: {repo_data.get('name', 'N/A')}")
+        context_parts.append(f"Full Name: {repo_data.get('full_name', 'N/A')}")
+        context_parts.append(f"Description: {repo_data.get('description', 'N/A')}")
+        context_parts.append(f"Language: {repo_data.get('language', 'N/A')}")
+        context_parts.append(f"Languages: {json.dumps(repo_data.get('languages', {}), indent=2, sort_keys=True)}")
+        context_parts.append(f"Default Branch: {repo_data.get('default_branch', 'N/A')}")
+        
+        if repo_commits:
+            context_parts.append("\n--- Recent Commits ---")
+            for j, commit in enumerate(repo_commits[:SUMMARY_MAX_COMMITS]):
+                context_parts.append(f"\nCommit {j+1}:")
+                context_parts.append(f"  SHA: {commit.get('sha', 'N/A')}")
+                context_parts.append(f"  Message: {commit.get('message', 'N/A')}")
+                context_parts.append(f"  Author: {commit.get('author', {}).get('name', 'N/A')}")
+                context_parts.append(f"  Date: {commit.get('author', {}).get('date', 'N/A')}")
+                
+                stats = commit.get('stats', {})
+                context_parts.append(f"  Changes: +{stats.get('additions', 0)} -{stats.get('deletions', 0)} ({stats.get('total', 0)} total)")
+                
+                if 'file_changes' in commit and commit['file_changes']:
+                    context_parts.append(f"  Files Changed: {len(commit['file_changes'])}")
+                    for file_change in commit['file_changes'][:SUMMARY_FILES_PER_COMMIT]:
+                        context_parts.append(f"    - {file_change.get('filename', 'N/A')} ({file_change.get('status', 'N/A')})")
+                        if file_change.get('patch'):
+                            patch_content = file_change['patch']
+                            if len(patch_content) > SUMMARY_PATCH_CHARS:
+                                patch_content = patch_content[:SUMMARY_PATCH_CHARS] + "..."
+                            context_parts.append(f"      Code Changes: {patch_content}")
+        
+        return "\n".join(context_parts)
+    
+    def generate_commit_story(self, repo_data: Dict, commits_data: List[Dict], story_style: str = "narrative", model: Optional[str] = None) -> str:
         """
         Generate a narrative story from commit history
         
@@ -261,6 +862,7 @@ Answer in a clear, professional manner suitable for developers and technical sta
             repo_data: Repository metadata
             commits_data: List of commits with their details
             story_style: Style of story ("narrative", "technical", "casual")
+            model: Optional route name ('fast'/'strong') or model name overriding the router
             
         Returns:
             AI-generated story about the commit history
@@ -271,11 +873,11 @@ Answer in a clear, professional manner suitable for developers and technical sta
         
         # Create the prompt based on story style
         prompt = self._create_commit_story_prompt(context, story_style)
+        route = self.router.select('story', context_chars=len(context), override=model)
         
         try:
             # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model=self.model,
+            response = self._chat_completion(
                 messages=[
                     {
                         "role": "system", 
@@ -287,7 +889,63 @@ Answer in a clear, professional manner suitable for developers and technical sta
                     }
                 ],
                 max_tokens=500,
-                temperature=0.8
+                temperature=0.8,
+                priority=PRIORITY_BATCH,
+                route=route
+            )
+            
+            return response.choices[0].message.content.strip()
+            
+        except Exception as e:
+            return f"Error generating commit story: {str(e)}"
+    
+    def update_commit_story(self, repo_data: Dict, previous_story: str, new_commits: List[Dict], story_style: str = "narrative", model: Optional[str] = None) -> str:
+        """
+        Merge commits added since a previously generated story into that story
+        
+        Args:
+            repo_data: Repository metadata
+            previous_story: Story generated for the earlier commits
+            new_commits: Commits added since the previous story, most recent first
+            story_style: Style of story ("narrative", "technical", "casual")
+            model: Optional route name ('fast'/'strong') or model name overriding the router
+            
+        Returns:
+            AI-generated story covering the previous and the new commits
+        """
+        
+        context = self._prepare_commit_story_context(repo_data, new_commits)
+        instruction = self._get_commit_story_instruction(story_style)
+        route = self.router.select('story', context_chars=len(context) + len(previous_story), override=model)
+        
+        prompt = f"""Below is an existing professional project summary, followed by the commits added since it was written. Update the summary so it also covers the new commits.
+
+{instruction}
+
+Keep the achievements from the existing summary that are still relevant, integrate the new work, and keep the result SHORT - only 150-250 words maximum. Use formal business language and avoid storytelling phrases.
+
+EXISTING SUMMARY:
+{previous_story}
+
+NEW COMMITS:
+{context}"""
+        
+        try:
+            response = self._chat_completion(
+                messages=[
+                    {
+                        "role": "system", 
+                        "content": self._get_commit_story_system_prompt(story_style) + " IMPORTANT: Use formal, professional business language. No storytelling phrases like 'once upon a time' or casual language. Write for corporate executives and stakeholders. Keep it VERY SHORT - maximum 200 words. Present facts and achievements professionally."
+                    },
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                max_tokens=500,
+                temperature=0.5,
+                priority=PRIORITY_BATCH,
+                route=route
             )
             
             return response.choices[0].message.content.strip()
@@ -339,15 +997,7 @@ Answer in a clear, professional manner suitable for developers and technical sta
         Create the prompt for commit story generation based on style
         """
         
-        style_instructions = {
-            "narrative": "Write this as a professional project summary. Use formal business language and short sentences. Present the development timeline and key milestones in a corporate style. Focus on what was accomplished and the business value delivered.",
-            
-            "technical": "Write this as a technical project report. Use professional terminology to explain the codebase evolution, architectural decisions, and development progress. Present findings in a structured, analytical manner.",
-            
-            "casual": "Write this as a professional project update. Use clear, direct language to explain the development progress and key achievements. Present information in a business-friendly format."
-        }
-        
-        instruction = style_instructions.get(story_style, style_instructions["narrative"])
+        instruction = self._get_commit_story_instruction(story_style)
         
         return f"""Based on the following repository and commit history data, create a professional project summary.
 
@@ -366,6 +1016,21 @@ Please create a summary that:
 
 Make it SHORT - only 150-250 words maximum. Use formal business language and avoid storytelling phrases."""
     
+    def _get_commit_story_instruction(self, story_style: str) -> str:
+        """
+        Get the writing instruction for a story style
+        """
+        
+        style_instructions = {
+            "narrative": "Write this as a professional project summary. Use formal business language and short sentences. Present the development timeline and key milestones in a corporate style. Focus on what was accomplished and the business value delivered.",
+            
+            "technical": "Write this as a technical project report. Use professional terminology to explain the codebase evolution, architectural decisions, and development progress. Present findings in a structured, analytical manner.",
+            
+            "casual": "Write this as a professional project update. Use clear, direct language to explain the development progress and key achievements. Present information in a business-friendly format."
+        }
+        
+        return style_instructions.get(story_style, style_instructions["narrative"])
+    
     def _get_commit_story_system_prompt(self, story_style: str) -> str:
         """
         Get the system prompt based on story style
@@ -408,9 +1073,7 @@ Make it SHORT - only 150-250 words maximum. Use formal business language and avo
             context_parts.append(f"Full Name: {repo_data.get('full_name', 'N/A')}")
             context_parts.append(f"Description: {repo_data.get('description', 'N/A')}")
             context_parts.append(f"Language: {repo_data.get('language', 'N/A')}")
-            context_parts.append(f"Languages: {json.dumps(repo_data.get('languages', {}), indent=2)}")
-            context_parts.append(f"Stars: {repo_data.get('stars', 0)}")
-            context_parts.append(f"Forks: {repo_data.get('forks', 0)}")
+            context_parts.append(f"Languages: {json.dumps(repo_data.get('languages', {}), indent=2, sort_keys=True)}")
             context_parts.append(f"Default Branch: {repo_data.get('default_branch', 'N/A')}")
             context_parts.append(f"Private: {repo_data.get('is_private', False)}")
             
@@ -442,6 +1105,24 @@ Make it SHORT - only 150-250 words maximum. Use formal business language and avo
                                     patch_content = patch_content[:200] + "..."
                                 context_parts.append(f"      Code Changes: {patch_content}")
         
+        context_parts.extend(self._prepare_cross_repository_context(repositories_data, jira_data))
+        
+        return "\n".join(context_parts)
+    
+    def _prepare_cross_repository_context(self, repositories_data: List[Dict], jira_data: List[Dict] = None) -> List[str]:
+        """
+        Prepare the cross-repository and Jira sections shared by the multi-project prompts
+        
+        Args:
+            repositories_data: List of repository metadata
+            jira_data: Optional list of Jira project data
+            
+        Returns:
+            List of context lines
+        """
+        
+        context_parts = []
+        
         # Cross-repository analysis
         context_parts.append(f"\n=== CROSS-REPOSITORY ANALYSIS ===")
         
@@ -472,7 +1153,7 @@ Make it SHORT - only 150-250 words maximum. Use formal business language and avo
             languages = repo_data.get('languages', {})
             all_languages.extend(languages.keys())
         
-        unique_languages = list(set(all_languages))
+        unique_languages = sorted(set(all_languages))
         context_parts.append(f"Technologies Used: {', '.join(unique_languages)}")
         
         # Detect potential connections
@@ -489,10 +1170,15 @@ Make it SHORT - only 150-250 words maximum. Use formal business language and avo
         if connections:
             context_parts.append(f"Potential Connections: {', '.join(connections)}")
         
+        # Fast-changing counters and Jira data go last to keep the prompt prefix cacheable
+        context_parts.append("\n=== REPOSITORY ACTIVITY SNAPSHOT ===")
+        for repo_data in repositories_data:
+            context_parts.append(f"{repo_data.get('full_name', 'N/A')}: " + ", ".join(self._prepare_repository_snapshot(repo_data)))
+        
         # Add Jira project management data if available
         if jira_data:
             context_parts.append("\n=== JIRA PROJECT MANAGEMENT DATA ===")
-            for jira_project in jira_data:
+            for jira_project in sorted(jira_data, key=lambda project: project['project_key']):
                 project_key = jira_project['project_key']
                 history = jira_project['history']
                 stats = history.get('ticket_statistics', {})
@@ -514,12 +1200,15 @@ Make it SHORT - only 150-250 words maximum. Use formal business language and avo
                 if statuses:
                     context_parts.append(f"- Statuses: {', '.join([f'{k}({v})' for k, v in statuses.items()])}")
                 
-                # Add recent tickets
+                # Add flow metrics, or recent tickets when they are not available
+                flow_metrics = history.get('flow_metrics')
                 recent_tickets = history.get('recent_tickets', [])
-                if recent_tickets:
+                if flow_metrics:
+                    context_parts.append(format_flow_metrics(flow_metrics))
+                elif recent_tickets:
                     context_parts.append(f"- Recent tickets: {', '.join([ticket.get('key', 'N/A') for ticket in recent_tickets[:5]])}")
         
-        return "\n".join(context_parts)
+        return context_parts
     
     def _create_multi_project_prompt(self, context: str, question: str) -> str:
         """
@@ -533,13 +1222,10 @@ Make it SHORT - only 150-250 words maximum. Use formal business language and avo
             Formatted prompt for multi-project analysis
         """
         
+        # Static instructions first and the question last, so everything before the
+        # question is a stable prefix for provider-side prompt caching
         prompt = f"""
-You are analyzing multiple connected GitHub repositories. Based on the repository data provided, please provide a comprehensive analysis that answers the user's question.
-
-REPOSITORY DATA:
-{context}
-
-USER QUESTION: {question}
+You are analyzing multiple connected GitHub repositories. You will be given the repository data followed by a user's question. Based on the repository data provided, please provide a comprehensive analysis that answers the user's question.
 
 Please provide a detailed analysis that includes:
 
@@ -596,16 +1282,22 @@ Focus on providing actionable, detailed instructions that would enable someone w
 - Use the information to create complete prompts for AI-assisted development
 
 Make the response practical and immediately useful for development tasks with proper code formatting.
+
+REPOSITORY DATA:
+{context}
+
+USER QUESTION: {question}
 """
         
         return prompt.strip()
 
-    def analyze_jira_project_history(self, project_history: Dict[str, Any]) -> str:
+    def analyze_jira_project_history(self, project_history: Dict[str, Any], model: Optional[str] = None) -> str:
         """
         Analyze Jira project history and provide comprehensive insights
         
         Args:
             project_history: Dictionary containing project history data from Jira
+            model: Optional route name ('fast'/'strong') or model name overriding the router
             
         Returns:
             AI-generated analysis and insights about the project
@@ -616,10 +1308,10 @@ Make the response practical and immediately useful for development tasks with pr
             
             # Create the prompt for the AI
             prompt = self._create_jira_analysis_prompt(context)
+            route = self.router.select('jira_analysis', context_chars=len(context), override=model)
             
             # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model=self.model,
+            response = self._chat_completion(
                 messages=[
                     {
                         "role": "system", 
@@ -631,7 +1323,9 @@ Make the response practical and immediately useful for development tasks with pr
                     }
                 ],
                 max_tokens=1500,
-                temperature=0.7
+                temperature=0.7,
+                priority=PRIORITY_BATCH,
+                route=route
             )
             
             return response.choices[0].message.content.strip()
@@ -674,12 +1368,16 @@ Make the response practical and immediately useful for development tasks with pr
         for label, count in sorted_labels[:10]:  # Top 10 labels
             context += f"- {label}: {count}\n"
         
-        # Add recent tickets context
-        recent_tickets = project_history.get('recent_tickets', [])
-        if recent_tickets:
-            context += f"\n**Recent Activity (Last 7 Days)**:\n"
-            for ticket in recent_tickets[:5]:  # Show top 5 recent tickets
-                context += f"- {ticket.get('key', 'N/A')}: {ticket.get('summary', 'No summary')}\n"
+        # Flow metrics summarise the tickets far more compactly than listing them
+        flow_metrics = project_history.get('flow_metrics')
+        if flow_metrics:
+            context += f"\n**Flow Metrics**:\n{format_flow_metrics(flow_metrics)}\n"
+        else:
+            recent_tickets = project_history.get('recent_tickets', [])
+            if recent_tickets:
+                context += f"\n**Recent Activity (Last 7 Days)**:\n"
+                for ticket in recent_tickets[:5]:  # Show top 5 recent tickets
+                    context += f"- {ticket.get('key', 'N/A')}: {ticket.get('summary', 'No summary')}\n"
         
         return context
     
@@ -0,0 +1,405 @@
+"""
+ASGI entry point with async views for the upstream-bound endpoints
+
+The repository, commit and chat endpoints spend nearly all their time waiting
+on GitHub, OpenAI and Jira. Here they run as coroutines on async clients, so one
+worker holds hundreds of in-flight requests instead of one per thread. Background
+job progress streams are served here too, so clients following long analyses do
+not occupy threads. Every other route is served by the Flask app, mounted behind
+them. Responses are serialized with Flask's JSON provider, so both paths return
+identical JSON.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 3000
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi:app
+
+Upstream calls use aiohttp: httpx's connection pool slows down sharply with
+hundreds of concurrent requests on one client.
+"""
+
+import os
+import re
+import time
+import asyncio
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+
+import server
+import metrics
+from async_github import (
+    AsyncGitHubClient, format_repo_info, format_chat_repo_data, format_commit, format_file_changes, format_branch
+)
+
+github = AsyncGitHubClient()
+
+
+class FlaskJSONResponse(Response):
+    """JSON response rendered exactly like flask.jsonify in production"""
+    media_type = 'application/json'
+
+    def render(self, content) -> bytes:
+        return (server.app.json.dumps(content, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+def _json(content, status_code: int = 200) -> FlaskJSONResponse:
+    return FlaskJSONResponse(content, status_code=status_code)
+
+
+async def _get_json_body(request: Request):
+    """Get the JSON request body (None if it is missing or malformed)"""
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+def _parse_commit_query(request: Request):
+    """
+    Validate the query parameters shared by the commit endpoints
+
+    Returns:
+        ((repo_name, token, branch, limit), None) or (None, error response)
+    """
+    repo_name = request.query_params.get('repo')
+    limit = request.query_params.get('limit')
+    branch = request.query_params.get('branch')
+    token = request.query_params.get('token')
+
+    if not repo_name:
+        return None, _json({"error": "Repository parameter 'repo' is required (format: 'owner/repo')"}, 400)
+
+    if not limit:
+        return None, _json({"error": "Limit parameter is required"}, 400)
+
+    try:
+        limit = int(limit)
+    except ValueError:
+        return None, _json({"error": "Invalid limit parameter. Must be a number."}, 400)
+
+    limit = max(1, min(limit, 100))
+
+    if token is None and branch is None:
+        return None, _json({"error": "Invalid parameter combination. Must include either 'token' or 'branch' parameter"}, 400)
+
+    return (repo_name, token, branch, limit), None
+
+
+async def get_git_commits(request: Request):
+    """Async /api/git/commits: commit stats are fetched concurrently instead of one by one"""
+    try:
+        params, error = _parse_commit_query(request)
+        if error:
+            return error
+        repo_name, token, branch, limit = params
+
+        try:
+            await github.get_repo(repo_name, token)
+        except Exception as e:
+            return _json({"error": f"Repository not found or not accessible: {str(e)}"}, 404)
+
+        try:
+            details = await github.get_commits_with_details(repo_name, token, branch, limit)
+            for detail in details:
+                if isinstance(detail, Exception):
+                    raise detail
+            commits_list = [format_commit(detail) for detail in details]
+
+            return _json({
+                "repository": repo_name,
+                "branch": branch if branch else "default",
+                "total_commits": len(commits_list),
+                "commits": commits_list
+            })
+
+        except Exception as e:
+            return _json({"error": f"Error fetching commits: {str(e)}"}, 500)
+
+    except Exception as e:
+        return _json({"error": f"Unexpected error: {str(e)}"}, 500)
+
+
+async def get_commit_details(request: Request):
+    """Async /api/git/commit-details"""
+    try:
+        params, error = _parse_commit_query(request)
+        if error:
+            return error
+        repo_name, token, branch, limit = params
+
+        try:
+            await github.get_repo(repo_name, token)
+        except Exception as e:
+            return _json({"error": f"Repository not found or not accessible: {str(e)}"}, 404)
+
+        try:
+            details = await github.get_commits_with_details(repo_name, token, branch, limit)
+
+            commits_list = []
+            for detail in details:
+                if isinstance(detail, Exception):
+                    # If we can't get detailed info for this commit, skip it
+                    print(f"Warning: Could not get commit details: {str(detail)}")
+                    continue
+                commits_list.append({**format_commit(detail), "file_changes": format_file_changes(detail)})
+
+            return _json({
+                "repository": repo_name,
+                "branch": branch if branch else "default",
+                "total_commits": len(commits_list),
+                "commits": commits_list
+            })
+
+        except Exception as e:
+            return _json({"error": f"Error fetching commits: {str(e)}"}, 500)
+
+    except Exception as e:
+        return _json({"error": f"Unexpected error: {str(e)}"}, 500)
+
+
+async def get_repo_info(request: Request):
+    """Async /api/git/repo"""
+    try:
+        repo_name = request.query_params.get('repo')
+        token = request.query_params.get('token')
+
+        if not repo_name:
+            return _json({"error": "Repository parameter 'repo' is required (format: 'owner/repo')"}, 400)
+
+        try:
+            repo = await github.get_repo(repo_name, token)
+        except Exception as e:
+            return _json({"error": f"Repository not found or not accessible: {str(e)}"}, 404)
+
+        return _json(format_repo_info(repo, await github.get_languages(repo_name, token)))
+
+    except Exception as e:
+        return _json({"error": f"Unexpected error: {str(e)}"}, 500)
+
+
+async def get_repo_branches(request: Request):
+    """Async /api/git/branches"""
+    try:
+        repo_name = request.query_params.get('repo')
+        token = request.query_params.get('token')
+
+        if not repo_name:
+            return _json({"error": "Repository parameter 'repo' is required (format: 'owner/repo')"}, 400)
+
+        try:
+            await github.get_repo(repo_name, token)
+        except Exception as e:
+            return _json({"error": f"Repository not found or not accessible: {str(e)}"}, 404)
+
+        try:
+            return _json([format_branch(branch) for branch in await github.list_branches(repo_name, token)])
+        except Exception as e:
+            return _json({"error": f"Error fetching branches: {str(e)}"}, 500)
+
+    except Exception as e:
+        return _json({"error": f"Unexpected error: {str(e)}"}, 500)
+
+
+async def chat_with_repository(request: Request):
+    """Async /api/chat: GitHub fetching and the completion are awaited, bookkeeping runs on the thread pool"""
+    try:
+        ai_service = server.ai_service
+        if not ai_service:
+            return _json({"error": "AI service not available. Please check OPENAI_API_KEY environment variable."}, 503)
+
+        data = await _get_json_body(request)
+        if not data:
+            return _json({"error": "Request body must be JSON"}, 400)
+
+        chat, error = server._resolve_chat_request(data)
+        if error:
+            return _json(*error)
+
+        if not chat['session']:
+            repo_name, token, branch = chat['repo_name'], chat['token'], chat['branch']
+
+            try:
+                repo = await github.get_repo(repo_name, token)
+            except Exception as e:
+                return _json({"error": f"Repository not found or not accessible: {str(e)}"}, 404)
+
+            try:
+                languages = await github.get_languages(repo_name, token)
+                details = await github.get_commits_with_details(repo_name, token, branch, chat['commits_limit'])
+                for detail in details:
+                    if isinstance(detail, Exception):
+                        raise detail
+            except Exception as e:
+                return _json({"error": f"Error fetching commits: {str(e)}"}, 500)
+
+            chat['repo_data'] = format_chat_repo_data(repo, languages)
+            chat['commits_data'] = [
+                {**format_commit(detail, include_api_url=False), "file_changes": format_file_changes(detail, include_patch=False)}
+                for detail in details
+            ]
+
+        try:
+            repo_data, commits_data = chat['repo_data'], chat['commits_data']
+            context, history = server._get_chat_context(chat)
+
+            findings = None
+            if server._wants_structured_findings(data):
+                result = await ai_service.aanalyze_repository_with_findings(
+                    repo_data, commits_data, chat['question'], model=data.get('model'), context=context, history=history
+                )
+                ai_response = result['answer']
+                findings = result['findings']
+            else:
+                ai_response = await ai_service.aanalyze_repository_data(
+                    repo_data, commits_data, chat['question'], model=data.get('model'), context=context, history=history
+                )
+
+            response_data = await run_in_threadpool(
+                server._complete_chat_turn, data, chat, context, ai_response, findings, ai_service.get_last_call_info()
+            )
+            return _json(response_data)
+
+        except Exception as e:
+            return _json({"error": f"Error generating AI response: {str(e)}"}, 500)
+
+    except Exception as e:
+        return _json({"error": f"Unexpected error: {str(e)}"}, 500)
+
+
+async def search_jira_tickets(request: Request):
+    """Async /api/integrations/jira/search"""
+    try:
+        jira_integration = server.jira_integration
+        if not jira_integration:
+            return _json({"error": "Jira integration not configured"}, 400)
+
+        data = await _get_json_body(request)
+        if not data:
+            return _json({"error": "Request body must be JSON"}, 400)
+
+        jql = data.get('jql')
+        max_results = data.get('max_results', 50)
+        fields = data.get('fields')
+
+        if not jql:
+            return _json({"error": "jql is required"}, 400)
+
+        tickets = None
+        source = 'jira'
+        if server.jira_mirror and not fields:
+            try:
+                tickets = await run_in_threadpool(server.jira_mirror.search_tickets, jql, max_results)
+            except Exception as e:
+                print(f"⚠️  Jira mirror search failed, using Jira: {str(e)}")
+            if tickets is not None:
+                source = 'mirror'
+        if tickets is None:
+            tickets = await jira_integration.asearch_tickets(jql, max_results, fields=fields)
+        return _json({
+            "tickets": tickets,
+            "count": len(tickets),
+            "source": source
+        })
+    except Exception as e:
+        return _json({"error": f"Error searching tickets: {str(e)}"}, 500)
+
+
+async def stream_job_events(request: Request):
+    """Async /api/jobs/{job_id}/events: a long-lived stream holds no thread while the job runs"""
+    try:
+        job_queue = server.job_queue
+        if not job_queue:
+            return _json({"error": "Background job queue not available"}, 503)
+
+        job_id = request.path_params['job_id']
+        job = await run_in_threadpool(job_queue.get, job_id)
+        if not job:
+            return _json({"error": "Job not found"}, 404)
+
+        async def events(job):
+            last_update = None
+            last_sent = time.time()
+            while job:
+                if job['updated_at'] != last_update:
+                    last_update = job['updated_at']
+                    last_sent = time.time()
+                    yield server._format_job_event(job)
+                    if job['status'] in (server.JOB_SUCCEEDED, server.JOB_FAILED):
+                        return
+                elif time.time() - last_sent >= server.JOB_EVENTS_KEEPALIVE_SECONDS:
+                    last_sent = time.time()
+                    yield ": keep-alive\n\n"
+
+                await asyncio.sleep(server.JOB_EVENTS_POLL_SECONDS)
+                job = await run_in_threadpool(job_queue.get, job_id)
+
+        return StreamingResponse(events(job), media_type='text/event-stream', headers=server.JOB_EVENTS_HEADERS)
+    except Exception as e:
+        return _json({"error": f"Error streaming job events: {str(e)}"}, 500)
+
+
+async def _startup():
+    server.start_background_services()
+
+
+async def _shutdown():
+    await github.close()
+    if server.jira_integration:
+        await server.jira_integration.aclose()
+
+
+async_routes = Starlette(
+    routes=[
+        Route('/api/git/commits', get_git_commits, methods=['GET']),
+        Route('/api/git/commit-details', get_commit_details, methods=['GET']),
+        Route('/api/git/repo', get_repo_info, methods=['GET']),
+        Route('/api/git/branches', get_repo_branches, methods=['GET']),
+        Route('/api/chat', chat_with_repository, methods=['POST']),
+        Route('/api/integrations/jira/search', search_jira_tickets, methods=['POST']),
+        Route('/api/jobs/{job_id}/events', stream_job_events, methods=['GET'])
+    ],
+    middleware=[
+        # Same policy as flask_cors on the WSGI app
+        Middleware(CORSMiddleware, allow_origins=server.allowed_origins, allow_credentials=True,
+                   allow_methods=['*'], allow_headers=['*'])
+    ],
+    on_startup=[_startup],
+    on_shutdown=[_shutdown]
+)
+
+# Path pattern and metrics route label (in Flask's <param> syntax, like the Flask routes) per async route
+ASYNC_ROUTES = [(route.path_regex, re.sub(r'\{(\w+)(:\w+)?\}', r'<\1>', route.path)) for route in async_routes.routes]
+
+wsgi_app = WSGIMiddleware(server.create_app(), workers=int(os.getenv('ASGI_WSGI_THREADS', 32)))
+
+
+async def app(scope, receive, send):
+    """Dispatch the async endpoints to their coroutines and everything else to Flask"""
+    if scope['type'] != 'http':
+        await async_routes(scope, receive, send)
+        return
+
+    route = next((label for pattern, label in ASYNC_ROUTES if pattern.match(scope['path'])), None)
+    if route is None:
+        # Flask records its own request metrics
+        await wsgi_app(scope, receive, send)
+        return
+
+    status = 500
+
+    async def send_recording_status(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        await send(message)
+
+    state = metrics.begin_request(scope['method'], route)
+    try:
+        await async_routes(scope, receive, send_recording_status)
+    finally:
+        metrics.end_request(scope['method'], route, status, state)
@@ -0,0 +1,257 @@
+"""
+Async GitHub Client
+Minimal aiohttp-based GitHub REST client for the ASGI request path, with helpers
+that format responses exactly like the PyGithub-based WSGI endpoints
+"""
+
+import os
+import json
+import time
+import asyncio
+from typing import Dict, List, Any, Optional
+
+import aiohttp
+
+import metrics
+
+GITHUB_API_URL = os.getenv('GITHUB_API_URL', 'https://api.github.com')
+
+
+class GitHubAPIError(Exception):
+    """Error response from the GitHub API (formatted like PyGithub's GithubException)"""
+
+    def __init__(self, status: int, data: Any):
+        super().__init__(status, data)
+        self.status = status
+        self.data = data
+
+    def __str__(self) -> str:
+        return f"{self.status} {json.dumps(self.data)}"
+
+
+def _github_datetime(value: Optional[str]) -> Optional[str]:
+    """Convert a GitHub timestamp (2024-01-15T14:30:00Z) to PyGithub's naive isoformat"""
+    if not value:
+        return None
+    return value[:-1] if value.endswith('Z') else value
+
+
+class AsyncGitHubClient:
+    """
+    Shared async GitHub client
+
+    One connection pool serves every request on the event loop; the token is sent
+    per call, so requests for different users share connections. Commit details
+    are fetched concurrently (GITHUB_ASYNC_CONCURRENCY at a time per request).
+    """
+
+    def __init__(self, base_url: Optional[str] = None, timeout: float = 30, max_connections: Optional[int] = None,
+                 concurrency: Optional[int] = None):
+        """
+        Initialize the client
+
+        Args:
+            base_url: API base URL (GITHUB_API_URL, default https://api.github.com)
+            timeout: Request timeout in seconds
+            max_connections: Connection pool size (GITHUB_ASYNC_MAX_CONNECTIONS, default 100)
+            concurrency: Concurrent commit detail requests per call (GITHUB_ASYNC_CONCURRENCY, default 10)
+        """
+        self.base_url = (base_url or GITHUB_API_URL).rstrip('/')
+        self.timeout = timeout
+        self.max_connections = max_connections or int(os.getenv('GITHUB_ASYNC_MAX_CONNECTIONS', 100))
+        self.concurrency = concurrency or int(os.getenv('GITHUB_ASYNC_CONCURRENCY', 10))
+        self._client = None
+        self._client_loop = None
+
+    def _get_client(self) -> aiohttp.ClientSession:
+        """Get the pooled session for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'Accept': 'application/vnd.github+json', 'User-Agent': 'PyGithub/Python'},
+                connector=aiohttp.TCPConnector(limit=self.max_connections)
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def close(self):
+        """Close the pooled session"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def _get(self, path: str, token: Optional[str] = None, params: Optional[Dict] = None) -> tuple:
+        """
+        GET an API path, raising GitHubAPIError for error responses
+
+        Returns:
+            (decoded JSON body, Link header)
+        """
+        headers = {'Authorization': f"token {token}"} if token else None
+        started = time.perf_counter()
+        status, response_headers = 'error', None
+        try:
+            async with self._get_client().get(f"{self.base_url}{path}", params=params, headers=headers) as response:
+                body = await response.read()
+                status, response_headers = response.status, response.headers
+        finally:
+            metrics.record_github_response('GET', path, status, response_headers, time.perf_counter() - started,
+                                           authenticated=bool(token))
+
+        try:
+            data = json.loads(body)
+        except ValueError:
+            data = body.decode('utf-8', errors='replace')
+        if status >= 400:
+            raise GitHubAPIError(status, data)
+        return data, response_headers.get('Link', '')
+
+    async def get_repo(self, repo_name: str, token: Optional[str] = None) -> Dict[str, Any]:
+        """Get raw repository data"""
+        return (await self._get(f"/repos/{repo_name}", token))[0]
+
+    async def get_languages(self, repo_name: str, token: Optional[str] = None) -> Dict[str, int]:
+        """Get bytes of code per language"""
+        return (await self._get(f"/repos/{repo_name}/languages", token))[0]
+
+    async def list_commits(self, repo_name: str, token: Optional[str] = None, branch: Optional[str] = None,
+                           limit: int = 30) -> List[Dict[str, Any]]:
+        """Get the latest commits (summaries without stats or files)"""
+        params = {'per_page': min(limit, 100)}
+        if branch:
+            params['sha'] = branch
+        return (await self._get(f"/repos/{repo_name}/commits", token, params))[0][:limit]
+
+    async def get_commit(self, repo_name: str, sha: str, token: Optional[str] = None) -> Dict[str, Any]:
+        """Get a commit with stats and file changes"""
+        return (await self._get(f"/repos/{repo_name}/commits/{sha}", token))[0]
+
+    async def get_commits_with_details(self, repo_name: str, token: Optional[str] = None, branch: Optional[str] = None,
+                                       limit: int = 30) -> List[Any]:
+        """
+        Get the latest commits with their details fetched concurrently
+
+        Args:
+            repo_name: Repository in format 'owner/repo'
+            token: Optional GitHub token
+            branch: Optional branch name (default branch if omitted)
+            limit: Number of commits
+
+        Returns:
+            Commit details in order; a commit whose details failed is the exception instead
+        """
+        commits = await self.list_commits(repo_name, token, branch, limit)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(commit):
+            async with semaphore:
+                return await self.get_commit(repo_name, commit['sha'], token)
+
+        return await asyncio.gather(*(fetch(commit) for commit in commits), return_exceptions=True)
+
+    async def list_branches(self, repo_name: str, token: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get all branches, following pagination"""
+        branches = []
+        params = {'per_page': 100, 'page': 1}
+        while True:
+            page, link = await self._get(f"/repos/{repo_name}/branches", token, params)
+            branches.extend(page)
+            if 'rel="next"' not in link:
+                return branches
+            params['page'] += 1
+
+
+def format_repo_info(repo: Dict[str, Any], languages: Dict[str, int]) -> Dict[str, Any]:
+    """Format repository data like /api/git/repo"""
+    owner = repo.get('owner') or {}
+    return {
+        "name": repo.get('name'),
+        "full_name": repo.get('full_name'),
+        "description": repo.get('description'),
+        "url": repo.get('html_url'),
+        "clone_url": repo.get('clone_url'),
+        "ssh_url": repo.get('ssh_url'),
+        "language": repo.get('language'),
+        "languages": languages,
+        "stars": repo.get('stargazers_count'),
+        "forks": repo.get('forks_count'),
+        "watchers": repo.get('watchers_count'),
+        "open_issues": repo.get('open_issues_count'),
+        "created_at": _github_datetime(repo.get('created_at')),
+        "updated_at": _github_datetime(repo.get('updated_at')),
+        "pushed_at": _github_datetime(repo.get('pushed_at')),
+        "default_branch": repo.get('default_branch'),
+        "is_private": repo.get('private'),
+        "owner": {
+            "login": owner.get('login'),
+            "type": owner.get('type'),
+            "avatar_url": owner.get('avatar_url'),
+            "url": owner.get('html_url')
+        }
+    }
+
+
+def format_chat_repo_data(repo: Dict[str, Any], languages: Dict[str, int]) -> Dict[str, Any]:
+    """Format repository data like the repository metadata /api/chat analyses"""
+    info = format_repo_info(repo, languages)
+    for key in ('clone_url', 'ssh_url'):
+        info.pop(key)
+    return info
+
+
+def format_commit(commit: Dict[str, Any], include_api_url: bool = True) -> Dict[str, Any]:
+    """Format a commit (with stats) like /api/git/commits"""
+    git_commit = commit['commit']
+    stats = commit.get('stats') or {}
+    commit_data = {
+        "sha": commit['sha'],
+        "message": git_commit['message'],
+        "author": {
+            "name": git_commit['author']['name'],
+            "email": git_commit['author']['email'],
+            "date": _github_datetime(git_commit['author']['date'])
+        },
+        "committer": {
+            "name": git_commit['committer']['name'],
+            "email": git_commit['committer']['email'],
+            "date": _github_datetime(git_commit['committer']['date'])
+        },
+        "url": commit.get('html_url')
+    }
+    if include_api_url:
+        commit_data["api_url"] = commit.get('url')
+    commit_data["stats"] = {
+        "additions": stats.get('additions', 0),
+        "deletions": stats.get('deletions', 0),
+        "total": stats.get('total', 0)
+    }
+    return commit_data
+
+
+def format_file_changes(commit: Dict[str, Any], include_patch: bool = True) -> List[Dict[str, Any]]:
+    """Format a commit's file changes like /api/git/commit-details (or /api/chat without patches)"""
+    changes = []
+    for file in commit.get('files') or []:
+        change = {
+            "filename": file.get('filename'),
+            "status": file.get('status'),
+            "additions": file.get('additions'),
+            "deletions": file.get('deletions'),
+            "changes": file.get('changes')
+        }
+        if include_patch:
+            change["patch"] = file.get('patch') or None
+            change["previous_filename"] = file.get('previous_filename')
+        changes.append(change)
+    return changes
+
+
+def format_branch(branch: Dict[str, Any]) -> Dict[str, Any]:
+    """Format a branch like /api/git/branches"""
+    return {
+        "name": branch.get('name'),
+        "protected": branch.get('protected'),
+        "commit_sha": (branch.get('commit') or {}).get('sha'),
+        "commit_url": (branch.get('commit') or {}).get('url')
+    }
@@ -0,0 +1,167 @@
+"""
+Chat Session Store
+Keeps the built repository context, fetched commit data and prior turns of
+/api/chat conversations in memory so follow-up questions skip GitHub fetching
+"""
+
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional
+
+import metrics
+
+
+class ChatSessionStore:
+    """
+    In-memory LRU store of chat sessions with idle expiry
+
+    Sessions are evicted when idle longer than the TTL or when the store is full
+    (least recently used first). Each session keeps at most max_turns turns; the
+    first turn is always kept so the prompt prefix sent to the model stays stable.
+    """
+
+    def __init__(self, max_sessions: Optional[int] = None, idle_ttl: Optional[int] = None,
+                 max_turns: Optional[int] = None):
+        """
+        Initialize the session store
+
+        Args:
+            max_sessions: Maximum sessions kept (CHAT_SESSION_MAX, default 200)
+            idle_ttl: Seconds a session may stay idle (CHAT_SESSION_TTL_SECONDS, default 1800)
+            max_turns: Maximum turns kept per session (CHAT_SESSION_MAX_TURNS, default 10)
+        """
+        self.max_sessions = max_sessions or int(os.getenv('CHAT_SESSION_MAX', 200))
+        self.idle_ttl = idle_ttl or int(os.getenv('CHAT_SESSION_TTL_SECONDS', 1800))
+        self.max_turns = max(2, max_turns or int(os.getenv('CHAT_SESSION_MAX_TURNS', 10)))
+
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, repository: str, branch: Optional[str], repo_data: Dict, commits_data: List[Dict],
+               context: str) -> str:
+        """
+        Create a session for a repository conversation
+
+        Args:
+            repository: Repository in format 'owner/repo'
+            branch: Branch name (None for the default branch)
+            repo_data: Repository metadata
+            commits_data: Commits fetched for the conversation
+            context: Repository context built for the prompt
+
+        Returns:
+            New session ID
+        """
+        session_id = uuid.uuid4().hex
+        now = time.time()
+
+        with self._lock:
+            self._evict_expired(now)
+            while len(self._sessions) >= self.max_sessions:
+                self._sessions.popitem(last=False)
+
+            self._sessions[session_id] = {
+                'session_id': session_id,
+                'repository': repository,
+                'branch': branch,
+                'repo_data': repo_data,
+                'commits_data': commits_data,
+                'context': context,
+                'turns': [],
+                'turn_count': 0,
+                'created_at': now,
+                'last_used': now
+            }
+
+        return session_id
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a session and mark it as recently used
+
+        Args:
+            session_id: Session ID
+
+        Returns:
+            Session dictionary (turns are a copy), or None if unknown or expired
+        """
+        now = time.time()
+
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session and now - session['last_used'] > self.idle_ttl:
+                del self._sessions[session_id]
+                session = None
+            metrics.record_cache('chat_session', session is not None)
+            if not session:
+                return None
+
+            session['last_used'] = now
+            self._sessions.move_to_end(session_id)
+            return {**session, 'turns': list(session['turns'])}
+
+    def add_turn(self, session_id: str, question: str, answer: str) -> int:
+        """
+        Append a question/answer turn to a session
+
+        Args:
+            session_id: Session ID
+            question: User's question
+            answer: AI answer
+
+        Returns:
+            Number of turns answered in the session so far (0 if the session expired)
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if not session:
+                return 0
+
+            session['turns'].append({'question': question, 'answer': answer})
+            session['turn_count'] += 1
+            if len(session['turns']) > self.max_turns:
+                # Keep the first turn (stable prompt prefix) and the most recent ones
+                session['turns'] = session['turns'][:1] + session['turns'][-(self.max_turns - 1):]
+            session['last_used'] = time.time()
+            self._sessions.move_to_end(session_id)
+            return session['turn_count']
+
+    def delete(self, session_id: str) -> bool:
+        """
+        Delete a session
+
+        Args:
+            session_id: Session ID
+
+        Returns:
+            True if the session existed
+        """
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get store statistics
+
+        Returns:
+            Dictionary with active sessions and configured limits
+        """
+        with self._lock:
+            self._evict_expired(time.time())
+            return {
+                'active_sessions': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'idle_ttl_seconds': self.idle_ttl,
+                'max_turns': self.max_turns
+            }
+
+    def _evict_expired(self, now: float):
+        """Drop sessions idle longer than the TTL (caller holds the lock)"""
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session['last_used'] <= self.idle_ttl:
+                break
+            del self._sessions[session_id]
@@ -0,0 +1,131 @@
+"""
+Commit Sync Ledger
+Records which commits have been synced to which Jira tickets so batch syncs
+over overlapping commit ranges never log the same work twice
+"""
+
+from datetime import datetime, timedelta
+from typing import List, Optional, Set, Tuple
+
+from storage import get_data_path, connect
+
+# Claims left behind by a sync that died before recording or releasing them expire after this long
+CLAIM_TIMEOUT_SECONDS = 600
+
+
+class CommitSyncLedger:
+    """SQLite-backed record of (repository, commit, ticket) syncs"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Initialize the ledger
+
+        Args:
+            db_path: SQLite database path (defaults to commit_sync.db in COMMET_DATA_DIR)
+        """
+        self.db_path = db_path or get_data_path('commit_sync.db')
+
+        with connect(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS synced_commits (
+                    repository TEXT NOT NULL,
+                    sha TEXT NOT NULL,
+                    ticket_key TEXT NOT NULL,
+                    synced_at TEXT NOT NULL,
+                    pending INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (repository, sha, ticket_key)
+                )
+            ''')
+            columns = {row['name'] for row in conn.execute('PRAGMA table_info(synced_commits)')}
+            if 'pending' not in columns:
+                conn.execute('ALTER TABLE synced_commits ADD COLUMN pending INTEGER NOT NULL DEFAULT 0')
+
+    def get_synced(self, repository: str, shas: List[str]) -> Set[Tuple[str, str]]:
+        """
+        Get the (sha, ticket_key) pairs already synced among the given commits (claims in progress excluded)
+
+        Args:
+            repository: Repository in format 'owner/repo'
+            shas: Commit SHAs to check
+
+        Returns:
+            Set of (sha, ticket_key) pairs
+        """
+        synced = set()
+        with connect(self.db_path) as conn:
+            # Stay well below SQLite's bound parameter limit
+            for start in range(0, len(shas), 500):
+                chunk = shas[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT sha, ticket_key FROM synced_commits WHERE repository = ? AND pending = 0 AND sha IN ({','.join('?' * len(chunk))})",
+                    [repository, *chunk]
+                ).fetchall()
+                synced.update((row['sha'], row['ticket_key']) for row in rows)
+
+        return synced
+
+    def claim(self, repository: str, pairs: List[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+        """
+        Claim (sha, ticket_key) pairs for syncing
+
+        The check and the claim run in one write transaction, so of two overlapping
+        syncs only one gets each pair. Pass the claimed commits to record() once
+        their ticket is synced, or to release() if syncing it failed.
+
+        Args:
+            repository: Repository in format 'owner/repo'
+            pairs: (sha, ticket_key) pairs to sync
+
+        Returns:
+            Set of the pairs claimed; the others are synced or being synced already
+        """
+        now = datetime.now()
+        claimed = set()
+        with connect(self.db_path) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute(
+                'DELETE FROM synced_commits WHERE repository = ? AND pending = 1 AND synced_at < ?',
+                (repository, (now - timedelta(seconds=CLAIM_TIMEOUT_SECONDS)).isoformat())
+            )
+            for sha, ticket_key in pairs:
+                cursor = conn.execute(
+                    'INSERT OR IGNORE INTO synced_commits (repository, sha, ticket_key, synced_at, pending) VALUES (?, ?, ?, ?, 1)',
+                    (repository, sha, ticket_key, now.isoformat())
+                )
+                if cursor.rowcount:
+                    claimed.add((sha, ticket_key))
+
+        return claimed
+
+    def record(self, repository: str, ticket_key: str, shas: List[str]):
+        """
+        Record commits as synced to a ticket, completing their claims
+
+        Args:
+            repository: Repository in format 'owner/repo'
+            ticket_key: Jira ticket key
+            shas: Commit SHAs synced
+        """
+        now = datetime.now().isoformat()
+        with connect(self.db_path) as conn:
+            conn.executemany(
+                'INSERT INTO synced_commits (repository, sha, ticket_key, synced_at) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (repository, sha, ticket_key) DO UPDATE SET pending = 0, synced_at = excluded.synced_at '
+                'WHERE pending = 1',
+                [(repository, sha, ticket_key, now) for sha in shas]
+            )
+
+    def release(self, repository: str, ticket_key: str, shas: List[str]):
+        """
+        Drop the claims of commits that could not be synced to a ticket
+
+        Args:
+            repository: Repository in format 'owner/repo'
+            ticket_key: Jira ticket key
+            shas: Commit SHAs claimed
+        """
+        with connect(self.db_path) as conn:
+            conn.executemany(
+                'DELETE FROM synced_commits WHERE repository = ? AND sha = ? AND ticket_key = ? AND pending = 1',
+                [(repository, sha, ticket_key) for sha in shas]
+            )
@@ -0,0 +1,56 @@
+"""
+Gunicorn configuration for the Commet server
+
+Requests spend most of their time waiting on GitHub, Jira and OpenAI, so each
+worker serves many requests concurrently on threads (gthread) instead of relying
+on many processes. The app is preloaded once in the master and forked; clients
+and background threads are created lazily in each worker.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+For the async request path (asgi.py), run the same configuration with uvicorn
+workers; `threads` then does not apply and requests share one event loop:
+
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi:app
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', 3000)}"
+
+# Chat sessions and response caches live in process memory, so a single worker
+# keeps them consistent; raise WEB_CONCURRENCY only behind sticky sessions.
+workers = int(os.getenv('WEB_CONCURRENCY', 1))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 32))
+
+preload_app = True
+
+# Longer than the OpenAI request timeout, so slow completions finish instead of
+# the worker being killed mid-request, including while it shuts down
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 180))
+keepalive = 5
+
+# Recycling a worker (to bound memory growth) drops its in-memory chat sessions,
+# caches and the tokens of its queued jobs, so it is off by default. Opt in with
+# GUNICORN_MAX_REQUESTS; the jitter avoids restarting every worker at once.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100)) if max_requests else 0
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    """Start background services in the new worker (threads do not survive fork)"""
+    import server as commet_server
+    commet_server.start_background_services()
+
+
+def child_exit(server, worker):
+    """Drop the exited worker's in-flight gauges from the shared metrics (PROMETHEUS_MULTIPROC_DIR)"""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -4,12 +4,59 @@ Base integration class for all third-party service integrations
 
 from abc import ABC, abstractmethod
 from typing import Dict, List, Optional, Any
+from collections import deque
+from datetime import datetime
+import os
+import re
+import time
+import asyncio
+import threading
+import aiohttp
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import logging
 
+import metrics
+
 logger = logging.getLogger(__name__)
 
+class IntegrationRetry(Retry):
+    """
+    Retry policy for integration APIs
+    
+    Rate limits (429) and unavailability (503) are retried for every method since
+    the request was not processed; gateway errors (502, 504) only for idempotent
+    methods so a POST is never applied twice. Retry-After is honoured up to
+    MAX_RETRY_AFTER seconds.
+    """
+    
+    MAX_RETRY_AFTER = 60
+    
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if status_code in (502, 504) and method.upper() not in Retry.DEFAULT_ALLOWED_METHODS:
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
+    
+    def parse_retry_after(self, retry_after: str) -> float:
+        return min(super().parse_retry_after(retry_after), self.MAX_RETRY_AFTER)
+
+class AsyncResponse:
+    """Fully read response of an async request, with the parts of requests.Response integrations use"""
+    
+    def __init__(self, status_code: int, headers: Dict[str, str], content: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+    
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+    
+    def json(self) -> Any:
+        return json.loads(self.content)
+
 class BaseIntegration(ABC):
     """Base class for all integrations"""
     
@@ -27,6 +74,41 @@ class BaseIntegration(ABC):
         self.headers = self._get_headers()
         self.enabled = config.get('enabled', True)
         
+        # Connection pooling and retry settings
+        self.timeout = config.get('timeout', 30)
+        self.pool_size = config.get('pool_size', 10)
+        self.max_retries = config.get('max_retries', 3)
+        self.backoff_factor = config.get('backoff_factor', 0.5)
+        
+        # Pooled session, created lazily per process (connections are not shared across forks)
+        self._session = None
+        self._session_pid = None
+        self._session_lock = threading.Lock()
+        
+        # Async client for the ASGI path, bound to the event loop that created it
+        self._async_client = None
+        self._async_client_loop = None
+        
+        # Per-call timing by method and endpoint
+        self._request_stats = {}
+        self._request_stats_lock = threading.Lock()
+        
+        # Connection health from the background prober and passive signals of real calls
+        self.health_check_interval = config.get('health_check_interval', 60)
+        self._health = {
+            'connected': None,
+            'last_check': None,
+            'last_success': None,
+            'last_failure': None,
+            'last_error': None,
+            'consecutive_failures': 0,
+            'check_latencies': deque(maxlen=100)
+        }
+        self._health_lock = threading.Lock()
+        self._prober = None
+        self._prober_pid = None
+        self._prober_lock = threading.Lock()
+        
         if not self.base_url:
             raise ValueError("base_url is required in integration config")
         if not self.api_key:
@@ -47,8 +129,44 @@ class BaseIntegration(ABC):
         """Send data to the integration"""
         pass
     
+    def _get_session(self) -> requests.Session:
+        """
+        Get the pooled HTTP session for this integration
+        
+        The session keeps connections alive across calls and retries rate-limited
+        and unavailable responses with exponential backoff.
+        
+        Returns:
+            requests.Session bound to the current process
+        """
+        if self._session is None or self._session_pid != os.getpid():
+            with self._session_lock:
+                if self._session is None or self._session_pid != os.getpid():
+                    retry = IntegrationRetry(
+                        total=self.max_retries,
+                        connect=self.max_retries,
+                        read=0,  # A read timeout may mean the request was applied
+                        status=self.max_retries,
+                        status_forcelist=(429, 502, 503, 504),
+                        allowed_methods=None,
+                        backoff_factor=self.backoff_factor,
+                        respect_retry_after_header=True,
+                        raise_on_status=False
+                    )
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+                    
+                    session = requests.Session()
+                    session.headers.update(self.headers)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    
+                    self._session = session
+                    self._session_pid = os.getpid()
+        
+        return self._session
+    
     def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None, 
-                     params: Optional[Dict] = None) -> Optional[requests.Response]:
+                     params: Optional[Dict] = None, accept_statuses: tuple = ()) -> Optional[requests.Response]:
         """
         Make HTTP request to integration API
         
@@ -57,6 +175,7 @@ class BaseIntegration(ABC):
             endpoint: API endpoint
             data: Request body data
             params: Query parameters
+            accept_statuses: Error statuses returned to the caller instead of treated as a failure (e.g. 404)
             
         Returns:
             Response object or None if request failed
@@ -66,18 +185,19 @@ class BaseIntegration(ABC):
             return None
             
         url = f"{self.base_url.rstrip('/')}/{endpoint.lstrip('/')}"
+        started = time.perf_counter()
+        response = None
         
         try:
-            response = requests.request(
+            response = self._get_session().request(
                 method=method,
                 url=url,
-                headers=self.headers,
                 json=data,
                 params=params,
-                timeout=30
+                timeout=self.timeout
             )
             
-            if response.status_code >= 400:
+            if response.status_code >= 400 and response.status_code not in accept_statuses:
                 logger.error(f"API request failed: {response.status_code} - {response.text}")
                 return None
                 
@@ -86,17 +206,261 @@ class BaseIntegration(ABC):
         except requests.exceptions.RequestException as e:
             logger.error(f"Request failed: {str(e)}")
             return None
+        
+        finally:
+            self._record_request(method, endpoint, response, time.perf_counter() - started)
+    
+    def _get_async_client(self) -> aiohttp.ClientSession:
+        """Get the pooled async HTTP session for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            self._async_client = aiohttp.ClientSession(
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit=int(os.getenv('INTEGRATION_ASYNC_MAX_CONNECTIONS', 100)))
+            )
+            self._async_client_loop = loop
+        return self._async_client
+    
+    async def aclose(self):
+        """Close the async HTTP session"""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+    
+    async def _amake_request(self, method: str, endpoint: str, data: Optional[Dict] = None,
+                             params: Optional[Dict] = None) -> Optional[AsyncResponse]:
+        """
+        Async variant of _make_request for callers running on an event loop
+        
+        Applies the same retry policy as the pooled session (IntegrationRetry):
+        429 and 503 are retried for every method, 502 and 504 only for idempotent
+        ones, connection errors before the request was sent for every method, with
+        exponential backoff and Retry-After honoured.
+        
+        Args:
+            method: HTTP method (GET, POST, PUT, DELETE)
+            endpoint: API endpoint
+            data: Request body data
+            params: Query parameters
+            
+        Returns:
+            Response object or None if request failed
+        """
+        if not self.enabled:
+            logger.warning(f"Integration {self.__class__.__name__} is disabled")
+            return None
+        
+        url = f"{self.base_url.rstrip('/')}/{endpoint.lstrip('/')}"
+        started = time.perf_counter()
+        response = None
+        retries = 0
+        
+        try:
+            while True:
+                try:
+                    async with self._get_async_client().request(method, url, json=data, params=params) as raw:
+                        response = AsyncResponse(raw.status, raw.headers.copy(), await raw.read())
+                except aiohttp.ClientConnectorError:
+                    if retries >= self.max_retries:
+                        raise
+                    await asyncio.sleep(self.backoff_factor * (2 ** retries))
+                    retries += 1
+                    continue
+                
+                retryable = response.status_code in (429, 503) or (
+                    response.status_code in (502, 504) and method.upper() in Retry.DEFAULT_ALLOWED_METHODS
+                )
+                if not retryable or retries >= self.max_retries:
+                    break
+                
+                delay = self.backoff_factor * (2 ** retries)
+                retry_after = response.headers.get('Retry-After')
+                if retry_after and retry_after.isdigit():
+                    delay = min(float(retry_after), IntegrationRetry.MAX_RETRY_AFTER)
+                retries += 1
+                await asyncio.sleep(delay)
+            
+            if response.status_code >= 400:
+                logger.error(f"API request failed: {response.status_code} - {response.text}")
+                return None
+            
+            return response
+            
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Request failed: {str(e)}")
+            response = None
+            return None
+        
+        finally:
+            self._record_request(method, endpoint, response, time.perf_counter() - started, retries=retries)
+    
+    def _record_request(self, method: str, endpoint: str, response: Optional[requests.Response], latency: float,
+                        retries: Optional[int] = None):
+        """Record timing, status and retries of a request (retries are read from the response if not given)"""
+        # Group by endpoint with issue keys and numeric IDs collapsed
+        path = re.sub(r'/[A-Z][A-Z0-9_]*-\d+', '/{key}', endpoint.split('?')[0])
+        path = re.sub(r'(?<!/api)/\d+', '/{id}', path)
+        operation = f"{method.upper()} {path}"
+        
+        if retries is None:
+            retries = 0
+            if response is not None:
+                retry_state = getattr(response.raw, 'retries', None)
+                retries = len(retry_state.history) if retry_state is not None else 0
+        
+        metrics.record_upstream_call(
+            self.__class__.__name__.replace('Integration', '').lower(), operation,
+            response.status_code if response is not None else 'error', latency
+        )
+        
+        # Passive health: the service answered (client errors such as 404 still mean it is reachable)
+        if response is None or response.status_code >= 500 or response.status_code in (401, 403):
+            self._record_health(False, f"{operation} failed" + (f" with {response.status_code}" if response is not None else ''))
+        else:
+            self._record_health(True)
+        
+        with self._request_stats_lock:
+            stats = self._request_stats.setdefault(operation, {
+                'calls': 0,
+                'errors': 0,
+                'retries': 0,
+                'latencies': deque(maxlen=500)
+            })
+            stats['calls'] += 1
+            stats['retries'] += retries
+            stats['latencies'].append(latency)
+            if response is None or response.status_code >= 400:
+                stats['errors'] += 1
+        
+        logger.debug(f"{operation} took {latency * 1000:.0f} ms ({retries} retries)")
+    
+    def get_request_stats(self) -> Dict[str, Any]:
+        """
+        Get per-call timing statistics
+        
+        Returns:
+            Dictionary of operation ("METHOD /endpoint") to calls, errors, retries and latency in ms
+        """
+        with self._request_stats_lock:
+            result = {}
+            for operation, stats in self._request_stats.items():
+                latencies = sorted(stats['latencies'])
+                result[operation] = {
+                    'calls': stats['calls'],
+                    'errors': stats['errors'],
+                    'retries': stats['retries'],
+                    'latency_ms': {
+                        'avg': round(sum(latencies) / len(latencies) * 1000, 1),
+                        'p50': round(latencies[len(latencies) // 2] * 1000, 1),
+                        'p95': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1)
+                    }
+                }
+            return result
+    
+    def _record_health(self, success: bool, error: Optional[str] = None):
+        """Record a success or failure signal for connection health"""
+        now = datetime.now().isoformat()
+        with self._health_lock:
+            self._health['connected'] = success
+            if success:
+                self._health['last_success'] = now
+                self._health['consecutive_failures'] = 0
+            else:
+                self._health['last_failure'] = now
+                self._health['last_error'] = error
+                self._health['consecutive_failures'] += 1
+    
+    def check_health(self) -> bool:
+        """
+        Actively test the connection and record the result
+        
+        Returns:
+            True if the integration is reachable
+        """
+        with self._health_lock:
+            failures_before = self._health['consecutive_failures']
+        
+        started = time.perf_counter()
+        try:
+            connected = self.test_connection()
+        except Exception as e:
+            logger.error(f"{self.__class__.__name__} health check failed: {str(e)}")
+            connected = False
+        latency = time.perf_counter() - started
+        
+        # The request already left a passive signal; only record a failure that signal missed
+        # (e.g. test_connection rejected a response _make_request counted as reachable)
+        if connected:
+            self._record_health(True)
+        elif self._health['consecutive_failures'] == failures_before:
+            self._record_health(False, 'Connection test failed')
+        
+        with self._health_lock:
+            self._health['last_check'] = datetime.now().isoformat()
+            self._health['check_latencies'].append(latency)
+        
+        return connected
+    
+    def start_health_probe(self):
+        """Start the background prober for this process if it is not running"""
+        if not self.enabled:
+            return
+        if self._prober and self._prober.is_alive() and self._prober_pid == os.getpid():
+            return
+        
+        with self._prober_lock:
+            if self._prober and self._prober.is_alive() and self._prober_pid == os.getpid():
+                return
+            
+            self._prober = threading.Thread(
+                target=self._run_health_probe,
+                name=f"{self.__class__.__name__.lower()}-health",
+                daemon=True
+            )
+            self._prober_pid = os.getpid()
+            self._prober.start()
+    
+    def _run_health_probe(self):
+        """Prober loop: check health, then sleep for the check interval"""
+        while True:
+            self.check_health()
+            time.sleep(self.health_check_interval)
+    
+    def get_health(self) -> Dict[str, Any]:
+        """
+        Get the last known connection health without contacting the service
+        
+        Returns:
+            Dictionary with connected (None until the first signal), check and signal
+            times, consecutive failures and health-check latency in ms
+        """
+        with self._health_lock:
+            health = dict(self._health)
+            latencies = sorted(health.pop('check_latencies'))
+        
+        health['check_latency_ms'] = {
+            'p50': round(latencies[len(latencies) // 2] * 1000, 1),
+            'p95': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1)
+        } if latencies else None
+        return health
     
     def get_status(self) -> Dict[str, Any]:
         """
-        Get integration status
+        Get integration status from memory (never blocks on the service)
         
         Returns:
-            Dictionary containing status information
+            Dictionary containing status information; connected is None until the
+            first health check or request reports on the connection
         """
+        self.start_health_probe()
+        health = self.get_health()
+        
         return {
             'name': self.__class__.__name__,
             'enabled': self.enabled,
-            'connected': self.test_connection() if self.enabled else False,
-            'base_url': self.base_url
+            'connected': health['connected'] if self.enabled else False,
+            'base_url': self.base_url,
+            'health': health,
+            'requests': self.get_request_stats()
         }
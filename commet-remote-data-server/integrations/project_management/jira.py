@@ -3,8 +3,10 @@ Jira integration for project management and ticket tracking
 """
 
 import re
+import time
 import base64
-from typing import Dict, List, Optional, Any
+import threading
+from typing import Dict, List, Optional, Any, Iterator
 from datetime import datetime, timedelta
 import logging
 
@@ -12,6 +14,21 @@ from ..base_integration import BaseIntegration
 
 logger = logging.getLogger(__name__)
 
+# Maximum issues per request to the bulk create endpoint
+BULK_CREATE_LIMIT = 50
+
+# Fields fetched by ticket searches unless a projection is given
+TICKET_FIELDS = ['key', 'summary', 'description', 'status', 'assignee', 'created', 'updated', 'labels', 'issuetype', 'priority']
+
+# Fields needed for project history (descriptions are not needed and are the bulk of the payload)
+HISTORY_FIELDS = ['summary', 'status', 'assignee', 'created', 'updated', 'labels', 'issuetype', 'priority']
+
+
+class JiraSearchError(RuntimeError):
+    """Raised by strict searches when a page request fails, so a partial scan is never taken for a complete one"""
+    pass
+
+
 class JiraIntegration(BaseIntegration):
     """Jira integration for project management and ticket tracking"""
     
@@ -25,11 +42,17 @@ class JiraIntegration(BaseIntegration):
                 - email: Jira user email
                 - api_token: Jira API token
                 - project_key: Default project key for ticket creation
+                - metadata_ttl: Seconds issue types and transition IDs are cached (default: 3600)
         """
         # Set email before calling super().__init__ to avoid attribute errors
         self.email = config.get('email')
         self.project_key = config.get('project_key')
         
+        # Near-static metadata (issue types per project, transition IDs per workflow)
+        self.metadata_ttl = config.get('metadata_ttl', 3600)
+        self._metadata_cache = {}
+        self._metadata_lock = threading.Lock()
+        
         if not self.email:
             raise ValueError("email is required for Jira integration")
         
@@ -78,6 +101,28 @@ class JiraIntegration(BaseIntegration):
             logger.error(f"Failed to send data to Jira: {str(e)}")
             return False
     
+    def _get_metadata(self, key: tuple) -> Any:
+        """Get a cached metadata value, or None if missing or expired"""
+        with self._metadata_lock:
+            entry = self._metadata_cache.get(key)
+            if not entry:
+                return None
+            expires_at, value = entry
+            if time.time() >= expires_at:
+                del self._metadata_cache[key]
+                return None
+            return value
+    
+    def _set_metadata(self, key: tuple, value: Any):
+        """Cache a metadata value for metadata_ttl seconds"""
+        with self._metadata_lock:
+            self._metadata_cache[key] = (time.time() + self.metadata_ttl, value)
+    
+    def _invalidate_metadata(self, key: tuple):
+        """Drop a cached metadata value (e.g. after a write using it failed)"""
+        with self._metadata_lock:
+            self._metadata_cache.pop(key, None)
+    
     def extract_ticket_key(self, text: str) -> Optional[str]:
         """
         Extract Jira ticket key from text (e.g., PROJ-123)
@@ -88,10 +133,22 @@ class JiraIntegration(BaseIntegration):
         Returns:
             Ticket key if found, None otherwise
         """
+        keys = self.extract_ticket_keys(text)
+        return keys[0] if keys else None
+    
+    def extract_ticket_keys(self, text: str) -> List[str]:
+        """
+        Extract every Jira ticket key from text (e.g., "PROJ-1, PROJ-2: ...")
+        
+        Args:
+            text: Text to search for ticket keys
+            
+        Returns:
+            Unique ticket keys in order of appearance
+        """
         # Pattern to match JIRA ticket keys (PROJECT-123)
         pattern = r'\b([A-Z][A-Z0-9]+-\d+)\b'
-        matches = re.findall(pattern, text.upper())
-        return matches[0] if matches else None
+        return list(dict.fromkeys(re.findall(pattern, (text or '').upper())))
     
     def create_ticket(self, ticket_data: Dict[str, Any]) -> bool:
         """
@@ -110,42 +167,10 @@ class JiraIntegration(BaseIntegration):
             True if ticket created successfully, False otherwise
         """
         try:
-            project_key = ticket_data.get('project_key', self.project_key)
-            if not project_key:
-                logger.error("No project key provided for ticket creation")
+            payload = self._build_ticket_payload(ticket_data)
+            if not payload:
                 return False
             
-            # Get the correct issue type for the project
-            issue_type = ticket_data.get('issue_type')
-            if not issue_type:
-                issue_type = self.get_default_issue_type(project_key)
-                logger.info(f"Using default issue type '{issue_type}' for project {project_key}")
-            
-            # Prepare ticket payload
-            description = ticket_data.get('description', '')
-            
-            # Convert description to Atlassian Document Format if it's plain text
-            if description and not isinstance(description, dict):
-                description = self._convert_to_atlassian_doc_format(description)
-            
-            payload = {
-                'fields': {
-                    'project': {'key': project_key},
-                    'summary': ticket_data.get('summary', 'Commet Analysis Ticket'),
-                    'description': description,
-                    'issuetype': {'name': issue_type},
-                    'priority': {'name': ticket_data.get('priority', 'Medium')}
-                }
-            }
-            
-            # Add labels if provided
-            if ticket_data.get('labels'):
-                payload['fields']['labels'] = ticket_data['labels']
-            
-            # Add assignee if provided
-            if ticket_data.get('assignee'):
-                payload['fields']['assignee'] = {'name': ticket_data['assignee']}
-            
             response = self._make_request('POST', '/rest/api/3/issue', data=payload)
             
             if response and response.status_code == 201:
@@ -153,6 +178,8 @@ class JiraIntegration(BaseIntegration):
                 logger.info(f"Created Jira ticket: {ticket_info.get('key')}")
                 return True
             else:
+                # The cached issue types may be stale (e.g. the project scheme changed)
+                self._invalidate_metadata(('issue_types', payload['fields']['project']['key']))
                 logger.error(f"Failed to create Jira ticket: {response.text if response else 'No response'}")
                 return False
                 
@@ -160,6 +187,137 @@ class JiraIntegration(BaseIntegration):
             logger.error(f"Error creating Jira ticket: {str(e)}")
             return False
     
+    def create_tickets_bulk(self, tickets_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Create several Jira tickets with the bulk issue endpoint
+        
+        Tickets are sent in batches of BULK_CREATE_LIMIT; Jira reports success or
+        failure per ticket, so one invalid ticket does not fail the others.
+        
+        Args:
+            tickets_data: List of ticket dictionaries (same format as create_ticket); None entries fail
+            
+        Returns:
+            List of results in input order, each with 'success' and either 'key' or 'error'
+        """
+        results = [None] * len(tickets_data)
+        pending = []
+        
+        for index, ticket_data in enumerate(tickets_data):
+            try:
+                payload = self._build_ticket_payload(ticket_data) if ticket_data else None
+            except Exception as e:
+                payload = None
+                logger.error(f"Error preparing Jira ticket: {str(e)}")
+            if payload:
+                pending.append((index, payload))
+            else:
+                results[index] = {'success': False, 'error': 'Invalid ticket data or missing project key'}
+        
+        for start in range(0, len(pending), BULK_CREATE_LIMIT):
+            batch = pending[start:start + BULK_CREATE_LIMIT]
+            for index, result in zip([index for index, _ in batch], self._post_bulk_issues([payload for _, payload in batch])):
+                results[index] = result
+        
+        created = sum(1 for result in results if result['success'])
+        logger.info(f"Bulk created {created}/{len(tickets_data)} Jira tickets")
+        return results
+    
+    def _post_bulk_issues(self, payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Post one batch to the bulk issue endpoint
+        
+        Args:
+            payloads: Issue payloads (at most BULK_CREATE_LIMIT)
+            
+        Returns:
+            List of per-issue results in batch order
+        """
+        results = [{'success': False, 'error': 'No result returned by Jira'} for _ in payloads]
+        
+        try:
+            response = self._make_request('POST', '/rest/api/3/issue/bulk', data={'issueUpdates': payloads})
+        except Exception as e:
+            logger.error(f"Error bulk creating Jira tickets: {str(e)}")
+            return [{'success': False, 'error': str(e)} for _ in payloads]
+        
+        if not response or response.status_code != 201:
+            # Jira answers 400 when every issue failed; _make_request has logged the details
+            for payload in payloads:
+                self._invalidate_metadata(('issue_types', payload['fields']['project']['key']))
+            return [{'success': False, 'error': 'Bulk create request failed'} for _ in payloads]
+        
+        data = response.json()
+        
+        # Created issues are listed in request order, skipping failed elements
+        failed = {}
+        for error in data.get('errors', []):
+            element_errors = error.get('elementErrors', {})
+            messages = element_errors.get('errorMessages', []) + [
+                f"{field}: {message}" for field, message in element_errors.get('errors', {}).items()
+            ]
+            failed[error.get('failedElementNumber')] = '; '.join(messages) or f"HTTP {error.get('status')}"
+        
+        created = iter(data.get('issues', []))
+        for position, payload in enumerate(payloads):
+            if position in failed:
+                results[position] = {'success': False, 'error': failed[position]}
+                self._invalidate_metadata(('issue_types', payload['fields']['project']['key']))
+                continue
+            issue = next(created, None)
+            if issue:
+                results[position] = {'success': True, 'key': issue.get('key'), 'id': issue.get('id')}
+        
+        return results
+    
+    def _build_ticket_payload(self, ticket_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Build the issue payload for a ticket
+        
+        Args:
+            ticket_data: Ticket dictionary (see create_ticket)
+            
+        Returns:
+            Issue payload, or None if no project key is available
+        """
+        project_key = ticket_data.get('project_key', self.project_key)
+        if not project_key:
+            logger.error("No project key provided for ticket creation")
+            return None
+        
+        # Get the correct issue type for the project
+        issue_type = ticket_data.get('issue_type')
+        if not issue_type:
+            issue_type = self.get_default_issue_type(project_key)
+            logger.info(f"Using default issue type '{issue_type}' for project {project_key}")
+        
+        # Prepare ticket payload
+        description = ticket_data.get('description', '')
+        
+        # Convert description to Atlassian Document Format if it's plain text
+        if description and not isinstance(description, dict):
+            description = self._convert_to_atlassian_doc_format(description)
+        
+        payload = {
+            'fields': {
+                'project': {'key': project_key},
+                'summary': ticket_data.get('summary', 'Commet Analysis Ticket'),
+                'description': description,
+                'issuetype': {'name': issue_type},
+                'priority': {'name': ticket_data.get('priority', 'Medium')}
+            }
+        }
+        
+        # Add labels if provided
+        if ticket_data.get('labels'):
+            payload['fields']['labels'] = ticket_data['labels']
+        
+        # Add assignee if provided
+        if ticket_data.get('assignee'):
+            payload['fields']['assignee'] = {'name': ticket_data['assignee']}
+        
+        return payload
+    
     def update_ticket(self, ticket_key: str, updates: Dict[str, Any]) -> bool:
         """
         Update an existing Jira ticket
@@ -239,26 +397,82 @@ class JiraIntegration(BaseIntegration):
             logger.error(f"Error adding worklog to ticket {ticket_key}: {str(e)}")
             return False
     
-    def transition_ticket(self, ticket_key: str, transition_name: str) -> bool:
+    def add_comment(self, ticket_key: str, comment: str) -> bool:
+        """
+        Add a comment to a Jira ticket
+        
+        Args:
+            ticket_key: Jira ticket key
+            comment: Comment text (converted to Atlassian Document Format)
+            
+        Returns:
+            True if comment added successfully, False otherwise
+        """
+        try:
+            payload = {'body': self._convert_to_atlassian_doc_format(comment)}
+            response = self._make_request('POST', f'/rest/api/3/issue/{ticket_key}/comment', data=payload)
+            
+            if response and response.status_code == 201:
+                logger.info(f"Added comment to Jira ticket: {ticket_key}")
+                return True
+            else:
+                logger.error(f"Failed to add comment to ticket {ticket_key}: {response.text if response else 'No response'}")
+                return False
+                
+        except Exception as e:
+            logger.error(f"Error adding comment to ticket {ticket_key}: {str(e)}")
+            return False
+    
+    def transition_ticket(self, ticket_key: str, transition_name: str, issue: Optional[Dict[str, Any]] = None) -> bool:
         """
         Transition Jira ticket to new status
         
+        Transition IDs belong to a workflow, and a project can use a different
+        workflow per issue type, so they are cached per project, issue type and
+        current status. Callers that already know the ticket's issue type and
+        status (e.g. from a search) pass it as issue, and the transition is then
+        normally a single POST. Otherwise, or if the cached ID is rejected, the
+        ticket's status and available transitions are fetched in one request and
+        the cache for that status is refreshed.
+        
         Args:
             ticket_key: Jira ticket key
             transition_name: Name of transition (e.g., "In Progress", "Done")
+            issue: Optional ticket dictionary with the current 'issuetype' and 'status' names
             
         Returns:
             True if transition successful, False otherwise
         """
         try:
-            # First, get available transitions
-            response = self._make_request('GET', f'/rest/api/3/issue/{ticket_key}/transitions')
+            project_key = ticket_key.split('-')[0].upper()
+            
+            if issue and issue.get('issuetype') and issue.get('status'):
+                cache_key = ('transition', project_key, issue['issuetype'].lower(), issue['status'].lower(),
+                             transition_name.lower())
+                transition_id = self._get_metadata(cache_key)
+                if transition_id and self._post_transition(ticket_key, transition_id):
+                    logger.info(f"Transitioned Jira ticket {ticket_key} to '{transition_name}'")
+                    return True
+                if transition_id:
+                    self._invalidate_metadata(cache_key)
+            
+            # Get the ticket's workflow position and the transitions available from it
+            response = self._make_request('GET', f'/rest/api/3/issue/{ticket_key}',
+                                          params={'fields': 'issuetype,status', 'expand': 'transitions'})
             
             if not response or response.status_code != 200:
                 logger.error(f"Failed to get transitions for ticket {ticket_key}")
                 return False
             
-            transitions = response.json().get('transitions', [])
+            data = response.json()
+            fields = data.get('fields', {})
+            issue_type = ((fields.get('issuetype') or {}).get('name') or '').lower()
+            status = ((fields.get('status') or {}).get('name') or '').lower()
+            transitions = data.get('transitions', [])
+            
+            for transition in transitions:
+                self._set_metadata(('transition', project_key, issue_type, status, transition['name'].lower()),
+                                   transition['id'])
             
             # Find the transition by name
             target_transition = None
@@ -272,23 +486,25 @@ class JiraIntegration(BaseIntegration):
                 return False
             
             # Execute the transition
-            payload = {
-                'transition': {'id': target_transition['id']}
-            }
-            
-            response = self._make_request('POST', f'/rest/api/3/issue/{ticket_key}/transitions', data=payload)
-            
-            if response and response.status_code == 204:
+            if self._post_transition(ticket_key, target_transition['id']):
                 logger.info(f"Transitioned Jira ticket {ticket_key} to '{transition_name}'")
                 return True
-            else:
-                logger.error(f"Failed to transition ticket {ticket_key}: {response.text if response else 'No response'}")
-                return False
+            
+            logger.error(f"Failed to transition ticket {ticket_key} to '{transition_name}'")
+            return False
                 
         except Exception as e:
             logger.error(f"Error transitioning ticket {ticket_key}: {str(e)}")
             return False
     
+    def _post_transition(self, ticket_key: str, transition_id: str) -> bool:
+        """Execute a transition by ID"""
+        payload = {
+            'transition': {'id': transition_id}
+        }
+        response = self._make_request('POST', f'/rest/api/3/issue/{ticket_key}/transitions', data=payload)
+        return response is not None and response.status_code == 204
+    
     def get_ticket(self, ticket_key: str) -> Optional[Dict[str, Any]]:
         """
         Get Jira ticket information
@@ -311,10 +527,40 @@ class JiraIntegration(BaseIntegration):
         except Exception as e:
             logger.error(f"Error getting ticket {ticket_key}: {str(e)}")
             return None
-    
+
+    def get_issue(self, ticket_key: str, fields: Optional[List[str]] = None,
+                  expand: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get a raw Jira issue, telling a missing issue apart from a failed request
+
+        Args:
+            ticket_key: Jira ticket key
+            fields: Jira fields to fetch (defaults to TICKET_FIELDS)
+            expand: Optional expand parameter (e.g. 'changelog')
+
+        Returns:
+            Raw issue dictionary, an empty dictionary if the issue does not exist
+            (or is not visible), or None if the request failed
+        """
+        params = {'fields': ','.join(fields or TICKET_FIELDS)}
+        if expand:
+            params['expand'] = expand
+
+        try:
+            response = self._make_request('GET', f'/rest/api/3/issue/{ticket_key}', params=params,
+                                          accept_statuses=(404,))
+            if response is None:
+                return None
+            if response.status_code == 404:
+                return {}
+            return response.json()
+        except Exception as e:
+            logger.error(f"Error getting issue {ticket_key}: {str(e)}")
+            return None
+
     def get_project_issue_types(self, project_key: str) -> List[Dict[str, Any]]:
         """
-        Get available issue types for a project
+        Get available issue types for a project (cached for metadata_ttl seconds)
         
         Args:
             project_key: Jira project key
@@ -323,11 +569,17 @@ class JiraIntegration(BaseIntegration):
             List of issue type information dictionaries
         """
         try:
+            issue_types = self._get_metadata(('issue_types', project_key))
+            if issue_types is not None:
+                return issue_types
+            
             response = self._make_request('GET', f'/rest/api/3/project/{project_key}')
             
             if response and response.status_code == 200:
                 project_data = response.json()
-                return project_data.get('issueTypes', [])
+                issue_types = project_data.get('issueTypes', [])
+                self._set_metadata(('issue_types', project_key), issue_types)
+                return issue_types
             else:
                 logger.error(f"Failed to get project {project_key}: {response.text if response else 'No response'}")
                 return []
@@ -367,83 +619,162 @@ class JiraIntegration(BaseIntegration):
             logger.error(f"Error getting default issue type: {str(e)}")
             return 'Task'
     
-    def search_tickets(self, jql: str, max_results: int = 50) -> List[Dict[str, Any]]:
+    def search_tickets(self, jql: str, max_results: int = 50, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
         Search Jira tickets using JQL
         
         Args:
             jql: JQL query string
-            max_results: Maximum number of results to return
+            max_results: Maximum number of results to return (across pages)
+            fields: Jira fields to fetch (defaults to TICKET_FIELDS)
             
         Returns:
             List of ticket information dictionaries
         """
-        try:
-            payload = {
-                'jql': jql,
-                'maxResults': max_results,
-                'fields': ['key', 'summary', 'description', 'status', 'assignee', 'created', 'updated', 'labels', 'issuetype', 'priority']
-            }
+        return list(self.iter_tickets(jql, fields=fields, max_results=max_results))
+    
+    def iter_tickets(self, jql: str, fields: Optional[List[str]] = None, max_results: Optional[int] = None,
+                     page_size: int = 100, strict: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over tickets matching a JQL query, fetching pages as they are consumed
+        
+        Args:
+            jql: JQL query string
+            fields: Jira fields to fetch (defaults to TICKET_FIELDS)
+            max_results: Hard cap on tickets yielded (None for all)
+            page_size: Tickets requested per page
+            strict: Raise JiraSearchError if a page request fails instead of stopping
+            
+        Yields:
+            Ticket information dictionaries
+        """
+        for issue in self.iter_issues(jql, fields=fields, max_results=max_results, page_size=page_size, strict=strict):
+            yield self._process_issue(issue)
+    
+    def iter_issues(self, jql: str, fields: Optional[List[str]] = None, max_results: Optional[int] = None,
+                    page_size: int = 100, expand: Optional[str] = None, strict: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over raw Jira issues matching a JQL query, following nextPageToken
+        
+        Only one page is held in memory at a time. Iteration stops at the last page
+        or at max_results. When a page request fails the failure is logged and
+        iteration stops, or, with strict, JiraSearchError is raised; scans that
+        must be complete (backfills, watermarks, history counts) use strict.
+        
+        Args:
+            jql: JQL query string
+            fields: Jira fields to fetch (defaults to TICKET_FIELDS)
+            max_results: Hard cap on issues yielded (None for all)
+            page_size: Issues requested per page (Jira caps this per instance)
+            expand: Optional expand parameter (e.g. 'changelog')
+            strict: Raise JiraSearchError if a page request fails instead of stopping
             
-            # Use the correct Jira API v3 search endpoint
-            response = self._make_request('POST', '/rest/api/3/search/jql', data=payload)
+        Yields:
+            Raw issue dictionaries from the search API
+        """
+        yielded = 0
+        next_page_token = None
+        
+        while max_results is None or yielded < max_results:
+            payload = self._search_payload(jql, fields, page_size, max_results, yielded, next_page_token, expand)
             
-            if response and response.status_code == 200:
-                data = response.json()
-                issues = data.get('issues', [])
-                
-                # Process the issues to extract relevant information
-                processed_tickets = []
-                for issue in issues:
-                    fields = issue.get('fields', {})
-                    ticket = {
-                        'key': issue.get('key'),
-                        'summary': fields.get('summary'),
-                        'description': fields.get('description'),
-                        'status': fields.get('status', {}).get('name'),
-                        'assignee': fields.get('assignee', {}).get('displayName') if fields.get('assignee') else 'Unassigned',
-                        'created': fields.get('created'),
-                        'updated': fields.get('updated'),
-                        'labels': fields.get('labels', []),
-                        'issuetype': fields.get('issuetype', {}).get('name'),
-                        'priority': fields.get('priority', {}).get('name')
-                    }
-                    processed_tickets.append(ticket)
-                
-                return processed_tickets
-            elif response and response.status_code == 410:
-                # API deprecated warning, but search might still work
-                logger.warning("Jira search API returned 410 (deprecated), but continuing...")
-                # Try to parse the response anyway
-                try:
+            try:
+                response = self._make_request('POST', '/rest/api/3/search/jql', data=payload)
+                if not response or response.status_code != 200:
+                    error = f"Failed to search tickets: {response.text if response else 'No response'}"
+                else:
                     data = response.json()
-                    issues = data.get('issues', [])
-                    processed_tickets = []
-                    for issue in issues:
-                        fields = issue.get('fields', {})
-                        ticket = {
-                            'key': issue.get('key'),
-                            'summary': fields.get('summary'),
-                            'description': fields.get('description'),
-                            'status': fields.get('status', {}).get('name'),
-                            'assignee': fields.get('assignee', {}).get('displayName') if fields.get('assignee') else 'Unassigned',
-                            'created': fields.get('created'),
-                            'updated': fields.get('updated'),
-                            'labels': fields.get('labels', []),
-                            'issuetype': fields.get('issuetype', {}).get('name'),
-                            'priority': fields.get('priority', {}).get('name')
-                        }
-                        processed_tickets.append(ticket)
-                    return processed_tickets
-                except:
-                    return []
-            else:
-                logger.error(f"Failed to search tickets: {response.text if response else 'No response'}")
-                return []
-                
-        except Exception as e:
-            logger.error(f"Error searching tickets: {str(e)}")
-            return []
+                    error = None
+            except Exception as e:
+                error = f"Error searching tickets: {str(e)}"
+            
+            if error:
+                logger.error(f"{error} (after {yielded} issues)")
+                if strict:
+                    raise JiraSearchError(error)
+                return
+            
+            issues = data.get('issues', [])
+            for issue in issues:
+                if max_results is not None and yielded >= max_results:
+                    return
+                yield issue
+                yielded += 1
+            
+            next_page_token = data.get('nextPageToken')
+            if not next_page_token or data.get('isLast') or not issues:
+                return
+    
+    async def asearch_tickets(self, jql: str, max_results: int = 50, fields: Optional[List[str]] = None,
+                              page_size: int = 100) -> List[Dict[str, Any]]:
+        """
+        Async variant of search_tickets for callers running on an event loop
+        
+        Args:
+            jql: JQL query string
+            max_results: Maximum number of results to return (across pages)
+            fields: Jira fields to fetch (defaults to TICKET_FIELDS)
+            page_size: Tickets requested per page
+            
+        Returns:
+            List of ticket information dictionaries
+        """
+        tickets = []
+        next_page_token = None
+        
+        while len(tickets) < max_results:
+            payload = self._search_payload(jql, fields, page_size, max_results, len(tickets), next_page_token)
+            
+            try:
+                response = await self._amake_request('POST', '/rest/api/3/search/jql', data=payload)
+                if not response or response.status_code != 200:
+                    logger.error(f"Failed to search tickets: {response.text if response else 'No response'}")
+                    break
+                data = response.json()
+            except Exception as e:
+                logger.error(f"Error searching tickets: {str(e)}")
+                break
+            
+            issues = data.get('issues', [])
+            tickets.extend(self._process_issue(issue) for issue in issues[:max_results - len(tickets)])
+            
+            next_page_token = data.get('nextPageToken')
+            if not next_page_token or data.get('isLast') or not issues:
+                break
+        
+        return tickets
+    
+    @staticmethod
+    def _search_payload(jql: str, fields: Optional[List[str]], page_size: int, max_results: Optional[int],
+                        fetched: int, next_page_token: Optional[str] = None, expand: Optional[str] = None) -> Dict[str, Any]:
+        """Build the request body for one page of /rest/api/3/search/jql"""
+        payload = {
+            'jql': jql,
+            'maxResults': page_size if max_results is None else min(page_size, max_results - fetched),
+            'fields': fields or TICKET_FIELDS
+        }
+        if next_page_token:
+            payload['nextPageToken'] = next_page_token
+        if expand:
+            payload['expand'] = expand
+        return payload
+    
+    @staticmethod
+    def _process_issue(issue: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a raw Jira issue into a ticket dictionary (fields not fetched are None)"""
+        fields = issue.get('fields', {})
+        return {
+            'key': issue.get('key'),
+            'summary': fields.get('summary'),
+            'description': fields.get('description'),
+            'status': (fields.get('status') or {}).get('name'),
+            'assignee': fields.get('assignee', {}).get('displayName') if fields.get('assignee') else 'Unassigned',
+            'created': fields.get('created'),
+            'updated': fields.get('updated'),
+            'labels': fields.get('labels', []),
+            'issuetype': (fields.get('issuetype') or {}).get('name'),
+            'priority': (fields.get('priority') or {}).get('name')
+        }
     
     def sync_commit_to_ticket(self, commit_data: Dict[str, Any], ticket_key: str) -> bool:
         """
@@ -490,6 +821,56 @@ class JiraIntegration(BaseIntegration):
             logger.error(f"Error syncing commit to ticket {ticket_key}: {str(e)}")
             return False
     
+    def sync_commits_to_ticket(self, ticket_key: str, commits: List[Dict[str, Any]],
+                               issue: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Sync several GitHub commits with one Jira ticket
+        
+        The commits are logged as a single worklog (their estimated time summed) and
+        the ticket is transitioned at most once, according to the latest commit whose
+        message asks for a transition.
+        
+        Args:
+            ticket_key: Jira ticket key
+            commits: GitHub commit information, oldest first
+            issue: Optional ticket dictionary with the current 'issuetype' and 'status' (see transition_ticket)
+            
+        Returns:
+            Dictionary with success, time_spent and the transition applied (if any)
+        """
+        try:
+            total_minutes = sum(self._estimate_minutes(commit_data) for commit_data in commits)
+            time_spent = self._format_minutes(total_minutes)
+            
+            lines = [f"**Commet Analysis - Commit Sync ({len(commits)} commits)**", ""]
+            for commit_data in commits:
+                subject = (commit_data.get('message') or 'N/A').splitlines()[0]
+                stats = commit_data.get('stats', {})
+                lines.append(
+                    f"- {commit_data.get('sha', 'N/A')[:8]} {subject} ({commit_data.get('author', {}).get('name', 'N/A')}, "
+                    f"+{stats.get('additions', 0)}/-{stats.get('deletions', 0)}) {commit_data.get('url', '')}".rstrip()
+                )
+            
+            if not self.add_worklog(ticket_key, time_spent, '\n'.join(lines)):
+                return {'success': False, 'error': 'Failed to add worklog'}
+            
+            transition = None
+            for commit_data in reversed(commits):
+                transition = self._transition_for_message(commit_data.get('message', ''))
+                if transition:
+                    break
+            transitioned = self.transition_ticket(ticket_key, transition, issue) if transition else False
+            
+            return {
+                'success': True,
+                'time_spent': time_spent,
+                'transition': transition if transitioned else None
+            }
+            
+        except Exception as e:
+            logger.error(f"Error syncing commits to ticket {ticket_key}: {str(e)}")
+            return {'success': False, 'error': str(e)}
+    
     def create_quality_ticket(self, analysis_data: Dict[str, Any], project_key: str = None) -> bool:
         """
         Create Jira ticket for code quality issues
@@ -502,38 +883,71 @@ class JiraIntegration(BaseIntegration):
             True if ticket created successfully, False otherwise
         """
         try:
-            project_key = project_key or self.project_key
-            if not project_key:
-                logger.error("No project key provided for quality ticket creation")
+            ticket_data = self._build_quality_ticket_data(analysis_data, project_key)
+            if not ticket_data:
                 return False
             
-            # Determine priority based on severity
-            severity = analysis_data.get('severity', 'medium').lower()
-            priority = self._map_severity_to_priority(severity)
-            
-            # Create ticket data (let create_ticket determine the correct issue type)
-            ticket_data = {
-                'project_key': project_key,
-                'summary': f"Code Quality: {analysis_data.get('title', 'Issue Found')}",
-                'description': self._format_quality_issue_description(analysis_data),
-                'priority': priority,
-                'labels': ['commet-analysis', 'code-quality', f'severity-{severity}']
-            }
-            
             return self.create_ticket(ticket_data)
             
         except Exception as e:
             logger.error(f"Error creating quality ticket: {str(e)}")
             return False
     
+    def create_quality_tickets_bulk(self, analyses: List[Dict[str, Any]], project_key: str = None) -> List[Dict[str, Any]]:
+        """
+        Create Jira tickets for several code quality issues in bulk
+        
+        Args:
+            analyses: List of code analysis results
+            project_key: Project key (uses default if not provided)
+            
+        Returns:
+            List of results in input order, each with 'success' and either 'key' or 'error'
+        """
+        tickets_data = []
+        for analysis_data in analyses:
+            try:
+                tickets_data.append(self._build_quality_ticket_data(analysis_data, project_key))
+            except Exception as e:
+                logger.error(f"Error preparing quality ticket: {str(e)}")
+                tickets_data.append(None)
+        
+        return self.create_tickets_bulk(tickets_data)
+    
+    def _build_quality_ticket_data(self, analysis_data: Dict[str, Any], project_key: str = None) -> Optional[Dict[str, Any]]:
+        """Build the ticket data for a code quality issue (None if no project key is available)"""
+        project_key = project_key or self.project_key
+        if not project_key:
+            logger.error("No project key provided for quality ticket creation")
+            return None
+        
+        # Determine priority based on severity
+        severity = analysis_data.get('severity', 'medium').lower()
+        priority = self._map_severity_to_priority(severity)
+        
+        # Create ticket data (let create_ticket determine the correct issue type)
+        return {
+            'project_key': project_key,
+            'summary': f"Code Quality: {analysis_data.get('title', 'Issue Found')}",
+            'description': self._format_quality_issue_description(analysis_data),
+            'priority': priority,
+            'labels': ['commet-analysis', 'code-quality', f'severity-{severity}']
+        }
+    
     def _estimate_time_spent(self, commit_data: Dict[str, Any]) -> str:
         """Estimate time spent based on commit statistics"""
+        return self._format_minutes(self._estimate_minutes(commit_data))
+    
+    def _estimate_minutes(self, commit_data: Dict[str, Any]) -> int:
+        """Estimate minutes spent on a commit"""
         stats = commit_data.get('stats', {})
         total_changes = stats.get('total', 0)
         
         # Rough estimation: 1 minute per 10 lines of code
-        estimated_minutes = max(1, total_changes // 10)
-        
+        return max(1, total_changes // 10)
+    
+    def _format_minutes(self, estimated_minutes: int) -> str:
+        """Format minutes as a Jira duration (e.g. "1h 30m")"""
         if estimated_minutes < 60:
             return f"{estimated_minutes}m"
         else:
@@ -546,14 +960,21 @@ class JiraIntegration(BaseIntegration):
     
     def _auto_transition_ticket(self, commit_data: Dict[str, Any], ticket_key: str):
         """Auto-transition ticket based on commit message"""
-        message = commit_data.get('message', '').lower()
+        transition = self._transition_for_message(commit_data.get('message', ''))
+        if transition:
+            self.transition_ticket(ticket_key, transition)
+    
+    def _transition_for_message(self, message: str) -> Optional[str]:
+        """Get the transition a commit message asks for (None if it asks for none)"""
+        message = (message or '').lower()
         
         if any(keyword in message for keyword in ['fix', 'resolve', 'close']):
-            self.transition_ticket(ticket_key, 'Done')
+            return 'Done'
         elif any(keyword in message for keyword in ['wip', 'work in progress']):
-            self.transition_ticket(ticket_key, 'In Progress')
+            return 'In Progress'
         elif any(keyword in message for keyword in ['start', 'begin']):
-            self.transition_ticket(ticket_key, 'In Progress')
+            return 'In Progress'
+        return None
     
     def _map_severity_to_priority(self, severity: str) -> str:
         """Map severity level to Jira priority"""
@@ -656,90 +1077,122 @@ class JiraIntegration(BaseIntegration):
 *This ticket was automatically created by Commet based on code analysis.*
         """.strip()
     
-    def get_project_history(self, project_key: str, days_back: int = 30) -> Dict[str, Any]:
+    def get_project_history(self, project_key: str, days_back: int = 30, max_tickets: int = 5000) -> Dict[str, Any]:
         """
         Get comprehensive project history for analysis
         
+        The project is scanned once (paginated, most recently updated first) and the
+        period views and breakdown counters are derived locally from that scan.
+        
         Args:
             project_key: Jira project key
             days_back: Number of days to look back
+            max_tickets: Upper bound on tickets scanned for very large projects
             
         Returns:
-            Dictionary containing project history data
+            Dictionary containing project history data, or an empty dictionary if
+            Jira could not be scanned at all
         """
         try:
-            from datetime import datetime, timedelta
-            
             # Calculate date range
             end_date = datetime.now()
             start_date = end_date - timedelta(days=days_back)
-            start_date_str = start_date.strftime('%Y-%m-%d')
-            
-            # Get all tickets created in the time period
-            created_jql = f"project = {project_key} AND created >= '{start_date_str}'"
-            created_tickets = self.search_tickets(created_jql, max_results=100)
-            
-            # Get all tickets updated in the time period
-            updated_jql = f"project = {project_key} AND updated >= '{start_date_str}'"
-            updated_tickets = self.search_tickets(updated_jql, max_results=100)
-            
-            # Get all tickets in the project (for overall stats)
-            all_tickets_jql = f"project = {project_key}"
-            all_tickets = self.search_tickets(all_tickets_jql, max_results=200)
-            
-            # Analyze ticket types and priorities
-            issue_types = {}
-            priorities = {}
-            statuses = {}
-            labels = {}
-            
-            for ticket in all_tickets:
-                # Count issue types
-                issue_type = ticket.get('issuetype', 'Unknown')
-                issue_types[issue_type] = issue_types.get(issue_type, 0) + 1
-                
-                # Count priorities
-                priority = ticket.get('priority', 'Unknown')
-                priorities[priority] = priorities.get(priority, 0) + 1
-                
-                # Count statuses
-                status = ticket.get('status', 'Unknown')
-                statuses[status] = statuses.get(status, 0) + 1
-                
-                # Count labels
-                for label in ticket.get('labels', []):
-                    labels[label] = labels.get(label, 0) + 1
+            recent_start = end_date - timedelta(days=7)
             
-            # Get recent activity (last 7 days)
-            recent_start = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
-            recent_jql = f"project = {project_key} AND updated >= '{recent_start}'"
-            recent_tickets = self.search_tickets(recent_jql, max_results=50)
+            # A page failing after the first marks the history as truncated instead of passing it off as
+            # complete; if the first page fails there is no history (an outage is not an empty project)
+            all_tickets = []
+            scan_failed = False
+            try:
+                for ticket in self.iter_tickets(f"project = {project_key} ORDER BY updated DESC", fields=HISTORY_FIELDS,
+                                                max_results=max_tickets, strict=True):
+                    all_tickets.append(ticket)
+            except JiraSearchError:
+                if not all_tickets:
+                    raise
+                scan_failed = True
+            
+            history = self._aggregate_project_history(
+                all_tickets,
+                start_date.strftime('%Y-%m-%d'),
+                recent_start.strftime('%Y-%m-%d')
+            )
+            history['ticket_statistics']['truncated'] = scan_failed or len(all_tickets) >= max_tickets
             
             return {
                 'project_key': project_key,
                 'analysis_period': {
-                    'start_date': start_date_str,
+                    'start_date': start_date.strftime('%Y-%m-%d'),
                     'end_date': end_date.strftime('%Y-%m-%d'),
                     'days_analyzed': days_back
                 },
-                'ticket_statistics': {
-                    'total_tickets': len(all_tickets),
-                    'created_in_period': len(created_tickets),
-                    'updated_in_period': len(updated_tickets),
-                    'recent_activity': len(recent_tickets)
-                },
-                'breakdown': {
-                    'issue_types': issue_types,
-                    'priorities': priorities,
-                    'statuses': statuses,
-                    'labels': labels
-                },
-                'recent_tickets': recent_tickets,
-                'created_tickets': created_tickets,
-                'updated_tickets': updated_tickets,
-                'all_tickets': all_tickets
+                **history
             }
             
         except Exception as e:
             logger.error(f"Error getting project history: {str(e)}")
-            return {}
\ No newline at end of file
+            return {}
+    
+    @staticmethod
+    def _aggregate_project_history(tickets: List[Dict[str, Any]], start_date: str, recent_start: str) -> Dict[str, Any]:
+        """
+        Derive the period views and breakdown counters from one project scan
+        
+        Args:
+            tickets: All project tickets, most recently updated first
+            start_date: First day of the analysis period (YYYY-MM-DD)
+            recent_start: First day of the recent-activity window (YYYY-MM-DD)
+            
+        Returns:
+            Dictionary with ticket_statistics, breakdown and the ticket views
+        """
+        created_tickets = []
+        updated_tickets = []
+        recent_tickets = []
+        issue_types = {}
+        priorities = {}
+        statuses = {}
+        labels = {}
+        
+        for ticket in tickets:
+            # ISO timestamps compare correctly as strings on their date prefix
+            created = (ticket.get('created') or '')[:10]
+            updated = (ticket.get('updated') or '')[:10]
+            
+            if created >= start_date:
+                created_tickets.append(ticket)
+            if updated >= start_date:
+                updated_tickets.append(ticket)
+            if updated >= recent_start:
+                recent_tickets.append(ticket)
+            
+            issue_type = ticket.get('issuetype') or 'Unknown'
+            issue_types[issue_type] = issue_types.get(issue_type, 0) + 1
+            
+            priority = ticket.get('priority') or 'Unknown'
+            priorities[priority] = priorities.get(priority, 0) + 1
+            
+            status = ticket.get('status') or 'Unknown'
+            statuses[status] = statuses.get(status, 0) + 1
+            
+            for label in ticket.get('labels', []):
+                labels[label] = labels.get(label, 0) + 1
+        
+        return {
+            'ticket_statistics': {
+                'total_tickets': len(tickets),
+                'created_in_period': len(created_tickets),
+                'updated_in_period': len(updated_tickets),
+                'recent_activity': len(recent_tickets)
+            },
+            'breakdown': {
+                'issue_types': issue_types,
+                'priorities': priorities,
+                'statuses': statuses,
+                'labels': labels
+            },
+            'recent_tickets': recent_tickets,
+            'created_tickets': created_tickets,
+            'updated_tickets': updated_tickets,
+            'all_tickets': tickets
+        }
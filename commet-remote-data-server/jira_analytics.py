@@ -0,0 +1,212 @@
+"""
+Jira Flow Analytics
+Cycle time, lead time, throughput, WIP and ageing computed locally from
+tickets and their status changelog, so the AI receives compact numbers
+instead of raw ticket lists
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+# Status names treated as not started / finished when no status category is available
+TODO_STATUSES = {'to do', 'open', 'backlog', 'new', 'selected for development', 'reopened'}
+DONE_STATUSES = {'done', 'closed', 'resolved', 'complete', 'completed', 'released', "won't do", 'cancelled', 'canceled'}
+
+SECONDS_PER_DAY = 86400.0
+THROUGHPUT_WEEKS = 8
+
+
+def parse_jira_timestamp(value: Optional[str]) -> float:
+    """
+    Parse a Jira timestamp (2024-01-15T14:30:00.000+0000) into epoch seconds
+
+    Args:
+        value: Jira timestamp string
+
+    Returns:
+        Epoch seconds, or NaN if the value is missing or malformed
+    """
+    if not value:
+        return np.nan
+    for fmt in ('%Y-%m-%dT%H:%M:%S.%f%z', '%Y-%m-%dT%H:%M:%S%z'):
+        try:
+            return datetime.strptime(value, fmt).timestamp()
+        except ValueError:
+            continue
+    try:
+        moment = datetime.fromisoformat(value)
+        return (moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)).timestamp()
+    except ValueError:
+        return np.nan
+
+
+def _percentiles(values: np.ndarray) -> Optional[Dict[str, float]]:
+    """Summarise durations in days (None if there are no samples)"""
+    values = values[~np.isnan(values)]
+    if not values.size:
+        return None
+    p50, p85, p95 = np.percentile(values, [50, 85, 95])
+    return {
+        'count': int(values.size),
+        'mean': round(float(values.mean()), 1),
+        'p50': round(float(p50), 1),
+        'p85': round(float(p85), 1),
+        'p95': round(float(p95), 1)
+    }
+
+
+def build_ticket_columns(tickets: List[Dict[str, Any]], changelog: Optional[List[Dict[str, Any]]] = None) -> Dict[str, np.ndarray]:
+    """
+    Build a columnar view of tickets with the times they were started and finished
+
+    A ticket is started at its first status change out of a to-do status and done
+    at its last change into a done status. Without a changelog, a ticket currently
+    in a done status is taken as finished at its last update and start times are
+    unknown.
+
+    Args:
+        tickets: Ticket dictionaries (key, status, created, updated)
+        changelog: Optional changelog entries (issue_key, changed_at, field, from_string, to_string)
+
+    Returns:
+        Dictionary of equal-length arrays: key, created, started, done, is_done
+    """
+    count = len(tickets)
+    keys = np.array([ticket.get('key') for ticket in tickets], dtype=object)
+    created = np.array([parse_jira_timestamp(ticket.get('created')) for ticket in tickets], dtype=float)
+    updated = np.array([parse_jira_timestamp(ticket.get('updated')) for ticket in tickets], dtype=float)
+    is_done = np.array([(ticket.get('status') or '').lower() in DONE_STATUSES for ticket in tickets], dtype=bool)
+    started = np.full(count, np.nan)
+    done = np.full(count, np.nan)
+
+    status_changes = [entry for entry in (changelog or []) if entry.get('field') == 'status']
+    if status_changes:
+        index = {key: position for position, key in enumerate(keys)}
+        positions = np.array([index.get(entry['issue_key'], -1) for entry in status_changes])
+        changed_at = np.array([parse_jira_timestamp(entry.get('changed_at')) for entry in status_changes])
+        from_todo = np.array([(entry.get('from_string') or '').lower() in TODO_STATUSES for entry in status_changes])
+        to_done = np.array([(entry.get('to_string') or '').lower() in DONE_STATUSES for entry in status_changes])
+        known = (positions >= 0) & ~np.isnan(changed_at)
+
+        # Earliest move out of to-do per ticket, latest move into done per ticket
+        start_mask = known & from_todo
+        np.fmin.at(started, positions[start_mask], changed_at[start_mask])
+        done_mask = known & to_done
+        np.fmax.at(done, positions[done_mask], changed_at[done_mask])
+
+        # Tickets that never left a to-do status (e.g. created in progress) started at their first status change
+        first_change = np.full(count, np.nan)
+        np.fmin.at(first_change, positions[known], changed_at[known])
+        started = np.where(np.isnan(started), first_change, started)
+
+    # Reopened tickets are not done; done tickets without a recorded transition finished at their last update
+    done = np.where(is_done, np.where(np.isnan(done), updated, done), np.nan)
+
+    return {'key': keys, 'created': created, 'started': started, 'done': done, 'is_done': is_done}
+
+
+def compute_flow_metrics(tickets: List[Dict[str, Any]], changelog: Optional[List[Dict[str, Any]]] = None,
+                         days_back: int = 30, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Compute flow metrics for a project
+
+    Args:
+        tickets: All project tickets
+        changelog: Optional status changelog entries (from the Jira mirror)
+        days_back: Period for cycle and lead time (tickets finished within it)
+        now: Reference time (defaults to the current time)
+
+    Returns:
+        Dictionary with cycle_time_days, lead_time_days, throughput, wip and ageing
+    """
+    now_ts = (now or datetime.now(timezone.utc)).timestamp()
+    columns = build_ticket_columns(tickets, changelog)
+    created, started, done = columns['created'], columns['started'], columns['done']
+
+    # Cycle and lead time of tickets finished in the period
+    finished = done >= now_ts - days_back * SECONDS_PER_DAY
+    cycle_time = (done - started)[finished] / SECONDS_PER_DAY
+    lead_time = (done - created)[finished] / SECONDS_PER_DAY
+
+    # Completions per week, oldest week first
+    week_edges = now_ts - np.arange(THROUGHPUT_WEEKS, -1, -1) * 7 * SECONDS_PER_DAY
+    weekly, _ = np.histogram(done[~np.isnan(done)], bins=week_edges)
+
+    # Work in progress: started (or, without a changelog, past to-do) and not done
+    statuses = np.array([ticket.get('status') or 'Unknown' for ticket in tickets], dtype=object)
+    in_todo = np.array([status.lower() in TODO_STATUSES for status in statuses], dtype=bool)
+    in_progress = ~columns['is_done'] & ~in_todo
+    age_from = np.where(np.isnan(started), created, started)
+    ages = (now_ts - age_from[in_progress]) / SECONDS_PER_DAY
+
+    oldest = np.argsort(-np.nan_to_num(ages, nan=-1.0))[:5]
+    wip_keys = columns['key'][in_progress]
+
+    return {
+        'source': 'changelog' if changelog else 'status_snapshot',
+        'period_days': days_back,
+        'cycle_time_days': _percentiles(cycle_time),
+        'lead_time_days': _percentiles(lead_time),
+        'throughput': {
+            'weeks': [
+                {
+                    'week_start': datetime.fromtimestamp(week_edges[week], tz=timezone.utc).strftime('%Y-%m-%d'),
+                    'completed': int(weekly[week])
+                }
+                for week in range(THROUGHPUT_WEEKS)
+            ],
+            'weekly_average': round(float(weekly.mean()), 1)
+        },
+        'wip': {
+            'count': int(in_progress.sum()),
+            'by_status': {
+                status: int(count)
+                for status, count in zip(*np.unique(statuses[in_progress].astype(str), return_counts=True))
+            } if in_progress.any() else {}
+        },
+        'ageing_days': {
+            **(_percentiles(ages) or {'count': 0}),
+            'oldest': [
+                {'key': wip_keys[i], 'age_days': round(float(ages[i]), 1)}
+                for i in oldest if not np.isnan(ages[i])
+            ]
+        }
+    }
+
+
+def format_flow_metrics(metrics: Dict[str, Any]) -> str:
+    """
+    Format flow metrics as compact prompt lines
+
+    Args:
+        metrics: Result of compute_flow_metrics
+
+    Returns:
+        Multi-line summary string
+    """
+    def describe(summary):
+        if not summary:
+            return 'no data'
+        return f"p50 {summary['p50']}d, p85 {summary['p85']}d, p95 {summary['p95']}d (n={summary['count']})"
+
+    throughput = metrics.get('throughput', {})
+    wip = metrics.get('wip', {})
+    ageing = metrics.get('ageing_days', {})
+
+    by_status = ', '.join(f"{status}: {count}" for status, count in wip.get('by_status', {}).items())
+    oldest = ', '.join(f"{item['key']} ({item['age_days']}d)" for item in ageing.get('oldest', []))
+
+    lines = [
+        f"- Cycle time (last {metrics.get('period_days')} days): {describe(metrics.get('cycle_time_days'))}",
+        f"- Lead time (last {metrics.get('period_days')} days): {describe(metrics.get('lead_time_days'))}",
+        f"- Throughput per week (oldest first): {', '.join(str(week['completed']) for week in throughput.get('weeks', []))} "
+        f"(avg {throughput.get('weekly_average', 0)})",
+        f"- WIP: {wip.get('count', 0)}" + (f" ({by_status})" if by_status else ''),
+        f"- WIP age: {describe(ageing) if ageing.get('count') else 'no data'}" + (f"; oldest {oldest}" if oldest else '')
+    ]
+    if metrics.get('source') != 'changelog':
+        lines.append("- Note: no changelog available; done times approximated by last update, cycle time unknown")
+
+    return '\n'.join(lines)
@@ -0,0 +1,538 @@
+"""
+Jira Issue Mirror
+Local SQLite copy of Jira issues and their changelogs, kept fresh by webhooks,
+an initial backfill and periodic reconciliation, so project history and simple
+searches over mirrored projects are answered without calling Jira
+"""
+
+import os
+import re
+import json
+import math
+import time
+import socket
+import threading
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Any, Optional
+
+import metrics
+from storage import get_data_path, connect
+from integrations.project_management.jira import JiraIntegration, JiraSearchError, TICKET_FIELDS
+from jira_analytics import compute_flow_metrics, parse_jira_timestamp
+
+logger = logging.getLogger(__name__)
+
+# JQL the mirror can answer: project = KEY [AND created|updated >= 'YYYY-MM-DD'] [ORDER BY created|updated ASC|DESC]
+LOCAL_JQL_PATTERN = re.compile(
+    r"""^\s*project\s*=\s*["']?(?P<project>[A-Za-z][A-Za-z0-9_]*)["']?"""
+    r"""(?:\s+AND\s+(?P<date_field>created|updated)\s*>=\s*["'](?P<date>\d{4}-\d{2}-\d{2})["'])?"""
+    r"""(?:\s+ORDER\s+BY\s+(?P<order_field>created|updated)(?:\s+(?P<order_dir>ASC|DESC))?)?\s*$""",
+    re.IGNORECASE
+)
+
+
+class JiraMirror:
+    """
+    SQLite mirror of Jira issues for a set of projects
+
+    A project is served locally once its backfill has completed. A webhook event
+    makes the mirror re-fetch the issue it names (or delete it if Jira no longer
+    has it); reconciliation re-fetches issues updated since the watermark of the
+    last complete scan and drops issues that no longer exist. A scan interrupted
+    by a failed page raises and leaves the project's watermark (and backfill
+    state) unchanged.
+    Timestamps are stored in UTC, since Jira responses use different offsets
+    and the out-of-order guard compares them as strings.
+    """
+
+    def __init__(self, jira_integration: JiraIntegration, projects: Optional[List[str]] = None,
+                 db_path: Optional[str] = None, reconcile_interval: Optional[int] = None):
+        """
+        Initialize the mirror
+
+        Args:
+            jira_integration: JiraIntegration used for backfill and reconciliation
+            projects: Project keys to mirror (JIRA_MIRROR_PROJECTS, default JIRA_PROJECT_KEY)
+            db_path: SQLite database path (defaults to jira_mirror.db in COMMET_DATA_DIR)
+            reconcile_interval: Seconds between reconciliations (JIRA_MIRROR_RECONCILE_SECONDS, default 900)
+        """
+        self.jira = jira_integration
+        if projects is None:
+            projects = [key.strip() for key in os.getenv('JIRA_MIRROR_PROJECTS', jira_integration.project_key or '').split(',')]
+        self.projects = [key.upper() for key in projects if key]
+        self.db_path = db_path or get_data_path('jira_mirror.db')
+        self.reconcile_interval = reconcile_interval or int(os.getenv('JIRA_MIRROR_RECONCILE_SECONDS', 900))
+
+        self._worker = None
+        self._worker_pid = None
+        self._worker_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+        with connect(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS issues (
+                    issue_key TEXT PRIMARY KEY,
+                    project_key TEXT NOT NULL,
+                    created TEXT,
+                    updated TEXT,
+                    status TEXT,
+                    ticket TEXT NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_issues_project_updated ON issues (project_key, updated)')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS changelog (
+                    issue_key TEXT NOT NULL,
+                    changed_at TEXT NOT NULL,
+                    field TEXT NOT NULL,
+                    from_string TEXT,
+                    to_string TEXT,
+                    UNIQUE (issue_key, changed_at, field, to_string)
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_changelog_issue ON changelog (issue_key, changed_at)')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS mirrored_projects (
+                    project_key TEXT PRIMARY KEY,
+                    backfilled_at TEXT,
+                    reconciled_at TEXT
+                )
+            ''')
+            # Latest `updated` of the last complete backfill or reconcile scan (added after the first release)
+            columns = {row['name'] for row in conn.execute('PRAGMA table_info(mirrored_projects)')}
+            if 'watermark' not in columns:
+                conn.execute('ALTER TABLE mirrored_projects ADD COLUMN watermark TEXT')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS reconcile_leases (
+                    project_key TEXT PRIMARY KEY,
+                    holder TEXT NOT NULL,
+                    expires REAL NOT NULL
+                )
+            ''')
+            # Databases written before timestamps were stored in UTC
+            rows = conn.execute(
+                "SELECT issue_key, created, updated FROM issues WHERE created NOT LIKE '%+0000' OR updated NOT LIKE '%+0000'"
+            ).fetchall()
+            for row in rows:
+                conn.execute('UPDATE issues SET created = ?, updated = ? WHERE issue_key = ?',
+                             (self._to_utc(row['created']), self._to_utc(row['updated']), row['issue_key']))
+
+    # ----- Webhook updates -----
+
+    def refresh_issue(self, issue_key: str) -> Optional[str]:
+        """
+        Re-fetch an issue from Jira after a webhook event about it
+
+        Webhook payloads are only used as a hint of which issue changed: the issue
+        (with its changelog) is read back from Jira, so a forged or stale event can
+        neither plant data nor delete an issue that still exists.
+
+        Args:
+            issue_key: Jira issue key from the webhook event
+
+        Returns:
+            'updated', 'deleted', or None if the project is not mirrored or Jira
+            could not be reached (reconciliation catches up later)
+        """
+        if issue_key.split('-')[0].upper() not in self.projects:
+            logger.debug(f"Jira mirror ignored {issue_key}: project is not mirrored")
+            return None
+
+        issue = self.jira.get_issue(issue_key, fields=TICKET_FIELDS, expand='changelog')
+        if issue is None:
+            logger.warning(f"Jira mirror could not refresh {issue_key}; leaving it to reconciliation")
+            return None
+        if not issue:
+            self.delete_issue(issue_key)
+            return 'deleted'
+
+        self.upsert_issue(issue)
+        return 'updated'
+
+    def upsert_issue(self, issue: Dict[str, Any], force: bool = False):
+        """
+        Insert or replace an issue fetched from Jira
+
+        Args:
+            issue: Raw Jira issue (key and fields, optionally with an expanded changelog)
+            force: Replace the stored copy even if it looks newer; used by backfill and
+                reconciliation scans so a bad stored `updated` cannot pin an issue forever
+        """
+        ticket = JiraIntegration._process_issue(issue)
+        if not ticket.get('key'):
+            return
+        # Webhooks are registered per site and can name issues of projects this mirror does not serve
+        if ticket['key'].split('-')[0].upper() not in self.projects:
+            logger.debug(f"Jira mirror ignored {ticket['key']}: project is not mirrored")
+            return
+
+        with connect(self.db_path) as conn:
+            self._write_issue(conn, ticket, force)
+            for history in (issue.get('changelog') or {}).get('histories', []):
+                self._write_changelog(conn, ticket['key'], [history])
+
+    def delete_issue(self, issue_key: str):
+        """
+        Remove an issue and its changelog from the mirror
+
+        Args:
+            issue_key: Jira issue key
+        """
+        with connect(self.db_path) as conn:
+            conn.execute('DELETE FROM issues WHERE issue_key = ?', (issue_key,))
+            conn.execute('DELETE FROM changelog WHERE issue_key = ?', (issue_key,))
+
+    # ----- Backfill and reconciliation -----
+
+    def backfill(self, project_key: str) -> int:
+        """
+        Load every issue of a project (with changelogs) into the mirror
+
+        Args:
+            project_key: Jira project key
+
+        Returns:
+            Number of issues mirrored
+        """
+        project_key = project_key.upper()
+        count = 0
+        watermark = None
+
+        with self._sync_lock:
+            for issue in self.jira.iter_issues(f"project = {project_key} ORDER BY updated DESC",
+                                               fields=TICKET_FIELDS, expand='changelog', strict=True):
+                self.upsert_issue(issue, force=True)
+                watermark = self._advance_watermark(watermark, issue)
+                count += 1
+
+            # Only serve the project locally once the scan has been checked against Jira
+            live_keys = self._fetch_live_keys(project_key)
+            if live_keys is None:
+                logger.warning(f"Jira mirror backfill of {project_key} could not be verified; serving live")
+                return count
+            self._remove_missing(project_key, live_keys)
+
+            now = datetime.now().isoformat()
+            with connect(self.db_path) as conn:
+                conn.execute(
+                    'INSERT INTO mirrored_projects (project_key, backfilled_at, reconciled_at, watermark) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT(project_key) DO UPDATE SET backfilled_at = excluded.backfilled_at, '
+                    'reconciled_at = excluded.reconciled_at, watermark = excluded.watermark',
+                    (project_key, now, now, watermark)
+                )
+
+        logger.info(f"Jira mirror backfilled {count} issues for {project_key}")
+        return count
+
+    def reconcile(self, project_key: str) -> Dict[str, int]:
+        """
+        Catch up on changes missed by webhooks
+
+        Re-fetches issues updated since a day before the watermark of the last
+        complete scan (upserts are idempotent, so the overlap only costs a few
+        requests) and removes issues deleted in Jira. If a page request fails,
+        JiraSearchError is raised and the watermark is kept, so the next run
+        covers the same range again.
+
+        Args:
+            project_key: Jira project key
+
+        Returns:
+            Dictionary with the number of issues updated and removed
+        """
+        project_key = project_key.upper()
+        if not self.is_mirrored(project_key):
+            return {'updated': self.backfill(project_key), 'removed': 0}
+
+        with self._sync_lock:
+            with connect(self.db_path) as conn:
+                row = conn.execute('SELECT watermark FROM mirrored_projects WHERE project_key = ?', (project_key,)).fetchone()
+                watermark = row['watermark'] if row else None
+                if not watermark:
+                    # Mirrors backfilled before the watermark was recorded
+                    watermark = conn.execute('SELECT MAX(updated) AS watermark FROM issues WHERE project_key = ?',
+                                             (project_key,)).fetchone()['watermark']
+
+            jql = f"project = {project_key} ORDER BY updated DESC"
+            if watermark:
+                since = (datetime.fromisoformat(watermark[:10]) - timedelta(days=1)).strftime('%Y-%m-%d')
+                jql = f"project = {project_key} AND updated >= '{since}' ORDER BY updated DESC"
+
+            updated = 0
+            for issue in self.jira.iter_issues(jql, fields=TICKET_FIELDS, expand='changelog', strict=True):
+                self.upsert_issue(issue, force=True)
+                watermark = self._advance_watermark(watermark, issue)
+                updated += 1
+
+            removed = 0
+            live_keys = self._fetch_live_keys(project_key)
+            if live_keys is not None:
+                removed = self._remove_missing(project_key, live_keys)
+
+            with connect(self.db_path) as conn:
+                conn.execute('UPDATE mirrored_projects SET reconciled_at = ?, watermark = ? WHERE project_key = ?',
+                             (datetime.now().isoformat(), watermark, project_key))
+
+        logger.info(f"Jira mirror reconciled {project_key}: {updated} updated, {removed} removed")
+        return {'updated': updated, 'removed': removed}
+
+    def start(self):
+        """Start the background thread that backfills and periodically reconciles the mirrored projects"""
+        if not self.projects:
+            return
+        if self._worker and self._worker.is_alive() and self._worker_pid == os.getpid():
+            return
+
+        with self._worker_lock:
+            if self._worker and self._worker.is_alive() and self._worker_pid == os.getpid():
+                return
+            self._worker = threading.Thread(target=self._run_reconciler, name='jira-mirror', daemon=True)
+            self._worker_pid = os.getpid()
+            self._worker.start()
+
+    def _run_reconciler(self):
+        """Reconcile every mirrored project, then sleep for the reconcile interval"""
+        while True:
+            for project_key in self.projects:
+                # Every server process runs this thread; only the lease holder reconciles
+                if not self._claim_reconcile(project_key):
+                    continue
+                try:
+                    self.reconcile(project_key)
+                except Exception as e:
+                    logger.error(f"Jira mirror reconciliation of {project_key} failed: {str(e)}")
+            time.sleep(self.reconcile_interval)
+
+    def _claim_reconcile(self, project_key: str) -> bool:
+        """Take the project's reconcile lease for one interval if no other process holds it"""
+        now = time.time()
+        holder = f"{socket.gethostname()}:{os.getpid()}"
+
+        with connect(self.db_path) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT holder, expires FROM reconcile_leases WHERE project_key = ?', (project_key,)).fetchone()
+            if row and row['holder'] != holder and row['expires'] > now:
+                return False
+            conn.execute(
+                'INSERT OR REPLACE INTO reconcile_leases (project_key, holder, expires) VALUES (?, ?, ?)',
+                (project_key, holder, now + self.reconcile_interval * 0.9)
+            )
+        return True
+
+    def _fetch_live_keys(self, project_key: str) -> Optional[set]:
+        """Fetch all issue keys of a project from Jira (None if the scan failed)"""
+        keys = set()
+        try:
+            for issue in self.jira.iter_issues(f"project = {project_key}", fields=['key'], page_size=500, strict=True):
+                keys.add(issue.get('key'))
+        except JiraSearchError:
+            return None
+
+        # Jira answers searches of projects the user cannot see with no issues; only trust that if access is confirmed
+        if not keys and not self.jira.test_connection():
+            return None
+        return keys
+
+    def _remove_missing(self, project_key: str, live_keys: set) -> int:
+        """Delete mirrored issues of a project that are not in live_keys"""
+        with connect(self.db_path) as conn:
+            rows = conn.execute('SELECT issue_key FROM issues WHERE project_key = ?', (project_key,)).fetchall()
+            missing = [row['issue_key'] for row in rows if row['issue_key'] not in live_keys]
+            for issue_key in missing:
+                conn.execute('DELETE FROM issues WHERE issue_key = ?', (issue_key,))
+                conn.execute('DELETE FROM changelog WHERE issue_key = ?', (issue_key,))
+        return len(missing)
+
+    # ----- Local queries -----
+
+    def is_mirrored(self, project_key: str) -> bool:
+        """
+        Check whether a project is fully backfilled and can be served locally
+
+        Args:
+            project_key: Jira project key
+
+        Returns:
+            True if the project's backfill has completed
+        """
+        with connect(self.db_path) as conn:
+            row = conn.execute(
+                'SELECT backfilled_at FROM mirrored_projects WHERE project_key = ?', (project_key.upper(),)
+            ).fetchone()
+        return bool(row and row['backfilled_at'])
+
+    def get_tickets(self, project_key: str, date_field: Optional[str] = None, since: Optional[str] = None,
+                    order_field: str = 'updated', descending: bool = True,
+                    max_results: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get mirrored tickets of a project
+
+        Args:
+            project_key: Jira project key
+            date_field: 'created' or 'updated' to filter on
+            since: Minimum date (YYYY-MM-DD) for date_field
+            order_field: 'created' or 'updated'
+            descending: Sort newest first
+            max_results: Maximum tickets returned
+
+        Returns:
+            List of ticket dictionaries (same format as JiraIntegration.search_tickets)
+        """
+        query = 'SELECT ticket FROM issues WHERE project_key = ?'
+        params = [project_key.upper()]
+        if date_field in ('created', 'updated') and since:
+            query += f' AND substr({date_field}, 1, 10) >= ?'
+            params.append(since)
+        query += f" ORDER BY {order_field if order_field in ('created', 'updated') else 'updated'} {'DESC' if descending else 'ASC'}"
+        if max_results:
+            query += ' LIMIT ?'
+            params.append(max_results)
+
+        with connect(self.db_path) as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        return [json.loads(row['ticket']) for row in rows]
+
+    def get_changelog(self, project_key: str) -> List[Dict[str, Any]]:
+        """
+        Get the mirrored changelog entries of a project, oldest first
+
+        Args:
+            project_key: Jira project key
+
+        Returns:
+            List of dictionaries with issue_key, changed_at, field, from_string and to_string
+        """
+        with connect(self.db_path) as conn:
+            rows = conn.execute(
+                'SELECT c.* FROM changelog c JOIN issues i ON i.issue_key = c.issue_key '
+                'WHERE i.project_key = ? ORDER BY c.changed_at',
+                (project_key.upper(),)
+            ).fetchall()
+
+        return [dict(row) for row in rows]
+
+    def search_tickets(self, jql: str, max_results: int = 50) -> Optional[List[Dict[str, Any]]]:
+        """
+        Answer a JQL search locally when the query is simple enough
+
+        Args:
+            jql: JQL query string
+            max_results: Maximum number of results to return
+
+        Returns:
+            List of tickets, or None if the query or project cannot be served from the mirror
+        """
+        match = LOCAL_JQL_PATTERN.match(jql or '')
+        served = bool(match) and self.is_mirrored(match.group('project'))
+        metrics.record_cache('jira_mirror', served)
+        if not served:
+            return None
+
+        return self.get_tickets(
+            match.group('project'),
+            date_field=(match.group('date_field') or '').lower() or None,
+            since=match.group('date'),
+            order_field=(match.group('order_field') or 'updated').lower(),
+            descending=(match.group('order_dir') or 'DESC').upper() == 'DESC',
+            max_results=max_results
+        )
+
+    def get_project_history(self, project_key: str, days_back: int = 30) -> Dict[str, Any]:
+        """
+        Build project history from the mirror (same format as JiraIntegration.get_project_history,
+        plus flow_metrics computed from the mirrored changelog)
+
+        Args:
+            project_key: Jira project key
+            days_back: Number of days to look back
+
+        Returns:
+            Dictionary containing project history data
+        """
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=days_back)
+        recent_start = end_date - timedelta(days=7)
+
+        tickets = self.get_tickets(project_key)
+        history = JiraIntegration._aggregate_project_history(
+            tickets,
+            start_date.strftime('%Y-%m-%d'),
+            recent_start.strftime('%Y-%m-%d')
+        )
+        history['ticket_statistics']['truncated'] = False
+        history['flow_metrics'] = compute_flow_metrics(tickets, self.get_changelog(project_key), days_back)
+
+        return {
+            'project_key': project_key,
+            'analysis_period': {
+                'start_date': start_date.strftime('%Y-%m-%d'),
+                'end_date': end_date.strftime('%Y-%m-%d'),
+                'days_analyzed': days_back
+            },
+            **history
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get mirror statistics per project
+
+        Returns:
+            Dictionary of project key to issue count and last backfill/reconcile times
+        """
+        with connect(self.db_path) as conn:
+            rows = conn.execute(
+                'SELECT p.project_key, p.backfilled_at, p.reconciled_at, COUNT(i.issue_key) AS issues '
+                'FROM mirrored_projects p LEFT JOIN issues i ON i.project_key = p.project_key GROUP BY p.project_key'
+            ).fetchall()
+
+        return {row['project_key']: {
+            'issues': row['issues'],
+            'backfilled_at': row['backfilled_at'],
+            'reconciled_at': row['reconciled_at']
+        } for row in rows}
+
+    # ----- Helpers -----
+
+    def _write_issue(self, conn, ticket: Dict[str, Any], force: bool = False):
+        """Insert a processed ticket, or update it if this copy is not older (or force is set)"""
+        # Refreshes triggered by webhooks can finish out of order; never overwrite a newer copy with an older one
+        conn.execute(
+            'INSERT INTO issues (issue_key, project_key, created, updated, status, ticket) VALUES (?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT(issue_key) DO UPDATE SET created = excluded.created, updated = excluded.updated, '
+            'status = excluded.status, ticket = excluded.ticket '
+            'WHERE ? OR issues.updated IS NULL OR excluded.updated IS NULL OR excluded.updated >= issues.updated',
+            (ticket['key'], ticket['key'].split('-')[0].upper(), self._to_utc(ticket.get('created')),
+             self._to_utc(ticket.get('updated')), ticket.get('status'), json.dumps(ticket), force)
+        )
+
+    def _write_changelog(self, conn, issue_key: str, histories: List[Dict[str, Any]]):
+        """Insert changelog histories ({'created', 'items'}), ignoring entries already stored"""
+        for history in histories:
+            for item in history.get('items', []):
+                conn.execute(
+                    'INSERT OR IGNORE INTO changelog (issue_key, changed_at, field, from_string, to_string) VALUES (?, ?, ?, ?, ?)',
+                    (issue_key, self._to_utc(history.get('created')), item.get('field'), item.get('fromString'),
+                     item.get('toString'))
+                )
+
+    @staticmethod
+    def _format_timestamp(timestamp_ms: int) -> str:
+        """Format epoch milliseconds like Jira's own timestamps (2024-01-15T14:30:00.000+0000)"""
+        moment = datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc)
+        return moment.strftime('%Y-%m-%dT%H:%M:%S.') + f"{moment.microsecond // 1000:03d}+0000"
+
+    @staticmethod
+    def _advance_watermark(watermark: Optional[str], issue: Dict[str, Any]) -> Optional[str]:
+        """Get the later of a watermark and a raw issue's `updated` timestamp (in UTC)"""
+        updated = JiraMirror._to_utc((issue.get('fields') or {}).get('updated'))
+        return max(filter(None, (watermark, updated)), default=None)
+
+    @staticmethod
+    def _to_utc(value: Optional[str]) -> Optional[str]:
+        """Convert a Jira timestamp with any UTC offset to UTC in the same format (unparseable values are kept)"""
+        epoch = parse_jira_timestamp(value)
+        if math.isnan(epoch):
+            return value
+        return JiraMirror._format_timestamp(round(epoch * 1000))
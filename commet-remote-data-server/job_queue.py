@@ -0,0 +1,495 @@
+"""
+Background Job Queue
+Durable SQLite-backed queue for work that should not block request handlers,
+processed by a pool of worker threads with retries and exponential backoff
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+import hashlib
+import threading
+import logging
+from datetime import datetime
+from typing import Dict, Any, Callable, Optional, Tuple
+
+from storage import get_data_path, connect
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+
+ORPHANED_JOB_ERROR = 'The credentials for this job are no longer available; submit it again'
+
+
+class JobQueue:
+    """
+    SQLite-backed job queue with a pool of background worker threads
+
+    Jobs survive restarts: queued jobs, and running jobs whose lease expired
+    (e.g. the process died mid-job), are picked up again by the next worker.
+    A handler that raises is retried with exponential backoff until
+    max_attempts is reached. Finished jobs are kept for result_ttl seconds,
+    and handlers can report progress.
+
+    While a handler runs, a heartbeat renews its lease every lease_seconds / 3,
+    so only a dead process loses its jobs. Each claim increments attempts and
+    the final update only applies to that attempt, so if a lease does expire
+    (e.g. a stalled process) the stale attempt's result is discarded instead of
+    overwriting the newer one.
+
+    Credentials a job needs (e.g. a caller's GitHub token) are passed as secrets:
+    they stay in the memory of the submitting process and never reach the
+    database, so only that process runs the job. If it exits first, the job
+    fails and has to be submitted again.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_attempts: Optional[int] = None,
+                 retry_backoff: float = 5.0, lease_seconds: int = 300, poll_interval: float = 2.0,
+                 workers: Optional[int] = None, result_ttl: Optional[int] = None):
+        """
+        Initialize the job queue
+
+        Args:
+            db_path: SQLite database path (defaults to jobs.db in COMMET_DATA_DIR)
+            max_attempts: Attempts per job before it fails (JOB_MAX_ATTEMPTS, default 5)
+            retry_backoff: Base delay in seconds before a retry (doubled per attempt)
+            lease_seconds: Time without a heartbeat after which a running job is considered abandoned
+            poll_interval: Seconds a worker sleeps when the queue is empty
+            workers: Worker threads per process (JOB_WORKERS, default 4)
+            result_ttl: Seconds finished jobs and their results are kept (JOB_RESULT_TTL_SECONDS, default 86400)
+        """
+        self.db_path = db_path or get_data_path('jobs.db')
+        self.max_attempts = max_attempts or int(os.getenv('JOB_MAX_ATTEMPTS', 5))
+        self.retry_backoff = retry_backoff
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.workers = workers or int(os.getenv('JOB_WORKERS', 4))
+        self.result_ttl = result_ttl or int(os.getenv('JOB_RESULT_TTL_SECONDS', 86400))
+
+        self._handlers = {}
+        self._max_attempts = {}
+        self._wakeup = threading.Event()
+        self._workers = []
+        self._worker_pid = None
+        self._worker_lock = threading.Lock()
+        self._stopping = False
+        self._current = threading.local()
+        self._last_purge = 0.0
+        self._secrets = {}
+
+        with connect(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    job_type TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    run_after REAL NOT NULL,
+                    lease_expires REAL,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            ''')
+            # Columns added after the first release; older databases get them here
+            columns = {row['name'] for row in conn.execute('PRAGMA table_info(jobs)')}
+            for column, definition in (('request_hash', 'TEXT'), ('progress', 'REAL'), ('progress_message', 'TEXT'),
+                                       ('expires_at', 'REAL'), ('owner', 'TEXT')):
+                if column not in columns:
+                    conn.execute(f'ALTER TABLE jobs ADD COLUMN {column} {definition}')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status_run_after ON jobs (status, run_after)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_request_hash ON jobs (request_hash)')
+
+    def register(self, job_type: str, handler: Callable[[Dict[str, Any]], Any], max_attempts: Optional[int] = None):
+        """
+        Register the handler for a job type
+
+        Args:
+            job_type: Job type name
+            handler: Callable receiving the job payload and returning a JSON-serializable result
+            max_attempts: Attempts for jobs of this type (defaults to the queue's max_attempts)
+        """
+        self._handlers[job_type] = handler
+        if max_attempts:
+            self._max_attempts[job_type] = max_attempts
+
+    def enqueue(self, job_type: str, payload: Dict[str, Any]) -> str:
+        """
+        Add a job to the queue and wake the workers
+
+        Args:
+            job_type: Registered job type
+            payload: JSON-serializable job input
+
+        Returns:
+            Job ID
+        """
+        with connect(self.db_path) as conn:
+            job_id = self._insert(conn, job_type, payload)
+
+        self._wake()
+        return job_id
+
+    def enqueue_unique(self, job_type: str, payload: Dict[str, Any],
+                       secrets: Optional[Dict[str, str]] = None) -> Tuple[str, bool]:
+        """
+        Add a job unless an identical one is queued, running or has an unexpired result
+
+        Jobs are identical when their type, payload and secrets hash the same; failed
+        jobs are not reused, so resubmitting after a failure runs the job again.
+
+        Args:
+            job_type: Registered job type
+            payload: JSON-serializable job input (stored in the database)
+            secrets: Credentials merged into the payload when the job runs; kept in memory only
+
+        Returns:
+            (job ID, True if a new job was created or False if an existing one was returned)
+        """
+        request_hash = self.request_hash(job_type, payload, secrets)
+        owner = self._owner() if secrets else None
+
+        with connect(self.db_path) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                'SELECT id FROM jobs WHERE request_hash = ? AND (status IN (?, ?) OR (status = ? AND expires_at > ?)) '
+                'ORDER BY created_at DESC LIMIT 1',
+                (request_hash, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, time.time())
+            ).fetchone()
+            if row:
+                return row['id'], False
+
+            job_id = self._insert(conn, job_type, payload, request_hash, owner)
+            if secrets:
+                self._secrets[job_id] = dict(secrets)
+
+        self._wake()
+        return job_id, True
+
+    @staticmethod
+    def request_hash(job_type: str, payload: Dict[str, Any], secrets: Optional[Dict[str, str]] = None) -> str:
+        """
+        Hash a job type, payload and secrets (key order does not matter)
+
+        Secrets only enter the hash as their own digest, so callers with different
+        credentials never share a job and the plaintext never has to be stored.
+        """
+        secrets_hash = None
+        if secrets:
+            canonical_secrets = json.dumps(secrets, sort_keys=True, separators=(',', ':'))
+            secrets_hash = hashlib.sha256(canonical_secrets.encode('utf-8')).hexdigest()
+        canonical = json.dumps([job_type, payload, secrets_hash], sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def _insert(self, conn, job_type: str, payload: Dict[str, Any], request_hash: Optional[str] = None,
+                owner: Optional[str] = None) -> str:
+        """Insert a queued job and return its ID"""
+        job_id = uuid.uuid4().hex
+        now = datetime.now().isoformat()
+        conn.execute(
+            'INSERT INTO jobs (id, job_type, payload, status, attempts, max_attempts, run_after, request_hash, owner, '
+            'created_at, updated_at) VALUES (?, ?, ?, ?, 0, ?, ?, ?, ?, ?, ?)',
+            (job_id, job_type, json.dumps(payload), JOB_QUEUED, self._max_attempts.get(job_type, self.max_attempts),
+             time.time(), request_hash, owner, now, now)
+        )
+        return job_id
+
+    @staticmethod
+    def _owner() -> str:
+        """Identify this process (host and pid) as the owner of jobs with in-memory secrets"""
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def _wake(self):
+        """Make sure the workers run and wake one up"""
+        self.start()
+        self._wakeup.set()
+
+    def report_progress(self, message: str, percent: Optional[float] = None):
+        """
+        Record the progress of the job running on the calling thread
+
+        Does nothing outside a job handler, so code shared with request handlers
+        can report progress unconditionally.
+
+        Args:
+            message: Short description of the current step
+            percent: Optional completion estimate (0-100)
+        """
+        job = getattr(self._current, 'job', None)
+        if not job:
+            return
+
+        with connect(self.db_path) as conn:
+            conn.execute(
+                'UPDATE jobs SET progress = ?, progress_message = ?, updated_at = ? WHERE id = ? AND status = ? AND attempts = ?',
+                (percent, message, datetime.now().isoformat(), job['id'], JOB_RUNNING, job['attempts'])
+            )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the status of a job
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            Dictionary with status, progress, attempts, result and error, or None if unknown or expired
+        """
+        with connect(self.db_path) as conn:
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+
+        if not row or (row['expires_at'] and row['expires_at'] < time.time()):
+            return None
+
+        return {
+            'job_id': row['id'],
+            'job_type': row['job_type'],
+            'status': row['status'],
+            'attempts': row['attempts'],
+            'max_attempts': row['max_attempts'],
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+            'progress': {
+                'percent': row['progress'],
+                'message': row['progress_message']
+            } if row['progress_message'] else None,
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at'],
+            'expires_at': datetime.fromtimestamp(row['expires_at']).isoformat() if row['expires_at'] else None
+        }
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get the number of jobs per status
+
+        Returns:
+            Dictionary of status to job count
+        """
+        with connect(self.db_path) as conn:
+            rows = conn.execute('SELECT status, COUNT(*) AS count FROM jobs GROUP BY status').fetchall()
+
+        return {row['status']: row['count'] for row in rows}
+
+    def start(self):
+        """Start the worker threads for this process if they are not running"""
+        if self._workers_running():
+            return
+
+        with self._worker_lock:
+            if self._workers_running():
+                return
+
+            # Threads inherited from a parent process (fork) do not run here
+            if self._worker_pid != os.getpid():
+                self._workers = []
+            self._stopping = False
+            self._workers = [worker for worker in self._workers if worker.is_alive()]
+            for i in range(len(self._workers), self.workers):
+                worker = threading.Thread(target=self._run_worker, name=f'job-queue-worker-{i}', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+            self._worker_pid = os.getpid()
+
+    def _workers_running(self) -> bool:
+        """Whether this process runs the full worker pool"""
+        return (
+            self._worker_pid == os.getpid() and len(self._workers) == self.workers and
+            all(worker.is_alive() for worker in self._workers)
+        )
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the worker threads after their current jobs"""
+        self._stopping = True
+        self._wakeup.set()
+        if self._worker_pid == os.getpid():
+            for worker in self._workers:
+                worker.join(timeout)
+
+    def run_pending(self) -> int:
+        """
+        Process due jobs on the calling thread until none are left
+
+        Returns:
+            Number of jobs processed
+        """
+        processed = 0
+        while self._process_next():
+            processed += 1
+        return processed
+
+    def _run_worker(self):
+        """Worker loop: process due jobs, then sleep until woken or the poll interval passes"""
+        while not self._stopping:
+            try:
+                if self._process_next():
+                    continue
+                self._purge_expired()
+            except Exception as e:
+                logger.error(f"Job queue worker error: {str(e)}")
+
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _process_next(self) -> bool:
+        """Claim and run one due job; returns False if there was none"""
+        job = self._claim_next()
+        if not job:
+            return False
+
+        handler = self._handlers.get(job['job_type'])
+        self._current.job = job
+        finished = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job, finished), name=f"job-heartbeat-{job['id']}",
+                                     daemon=True)
+        heartbeat.start()
+        try:
+            if not handler:
+                raise RuntimeError(f"No handler registered for job type '{job['job_type']}'")
+            payload = json.loads(job['payload'])
+            if job['owner']:
+                secrets = self._secrets.get(job['id'])
+                if secrets is None:
+                    self._fail(job, ORPHANED_JOB_ERROR, retry=False)
+                    return True
+                payload.update(secrets)
+            result = handler(payload)
+        except Exception as e:
+            self._fail(job, str(e))
+        else:
+            self._complete(job, result)
+        finally:
+            finished.set()
+            self._current.job = None
+
+        return True
+
+    def _heartbeat(self, job: Dict[str, Any], finished: threading.Event):
+        """Renew the lease of a running job until it finishes or another attempt takes it over"""
+        while not finished.wait(self.lease_seconds / 3):
+            try:
+                with connect(self.db_path) as conn:
+                    renewed = conn.execute(
+                        'UPDATE jobs SET lease_expires = ? WHERE id = ? AND status = ? AND attempts = ?',
+                        (time.time() + self.lease_seconds, job['id'], JOB_RUNNING, job['attempts'])
+                    ).rowcount
+            except Exception as e:
+                logger.error(f"Job {job['id']} heartbeat error: {str(e)}")
+                continue
+            if not renewed:
+                return
+
+    def _claim_next(self) -> Optional[Dict[str, Any]]:
+        """Atomically mark the next due job as running and return it"""
+        now = time.time()
+
+        with connect(self.db_path) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                'SELECT * FROM jobs '
+                'WHERE ((status = ? AND run_after <= ?) OR (status = ? AND lease_expires < ?)) '
+                'AND (owner IS NULL OR owner = ?) '
+                'ORDER BY run_after LIMIT 1',
+                (JOB_QUEUED, now, JOB_RUNNING, now, self._owner())
+            ).fetchone()
+            if not row:
+                return None
+
+            conn.execute(
+                'UPDATE jobs SET status = ?, attempts = attempts + 1, lease_expires = ?, updated_at = ? WHERE id = ?',
+                (JOB_RUNNING, now + self.lease_seconds, datetime.now().isoformat(), row['id'])
+            )
+
+        job = dict(row)
+        job['attempts'] += 1
+        return job
+
+    def _complete(self, job: Dict[str, Any], result: Any):
+        """Mark a job as succeeded; its result is kept for result_ttl seconds"""
+        with connect(self.db_path) as conn:
+            updated = conn.execute(
+                'UPDATE jobs SET status = ?, result = ?, error = NULL, progress = 100, lease_expires = NULL, expires_at = ?, '
+                'updated_at = ? WHERE id = ? AND status = ? AND attempts = ?',
+                (JOB_SUCCEEDED, json.dumps(result), time.time() + self.result_ttl, datetime.now().isoformat(), job['id'],
+                 JOB_RUNNING, job['attempts'])
+            ).rowcount
+        if not updated:
+            logger.warning(f"Job {job['id']} ({job['job_type']}) attempt {job['attempts']} lost its lease, result discarded")
+            return
+        self._secrets.pop(job['id'], None)
+
+    def _fail(self, job: Dict[str, Any], error: str, retry: bool = True):
+        """Schedule a retry with exponential backoff, or mark the job as failed"""
+        if retry and job['attempts'] < job['max_attempts']:
+            status = JOB_QUEUED
+            run_after = time.time() + self.retry_backoff * (2 ** (job['attempts'] - 1))
+            expires_at = None
+            logger.warning(f"Job {job['id']} ({job['job_type']}) attempt {job['attempts']} failed, retrying: {error}")
+        else:
+            status = JOB_FAILED
+            run_after = job['run_after']
+            expires_at = time.time() + self.result_ttl
+            logger.error(f"Job {job['id']} ({job['job_type']}) failed after {job['attempts']} attempts: {error}")
+
+        with connect(self.db_path) as conn:
+            updated = conn.execute(
+                'UPDATE jobs SET status = ?, error = ?, run_after = ?, lease_expires = NULL, expires_at = ?, updated_at = ? '
+                'WHERE id = ? AND status = ? AND attempts = ?',
+                (status, error, run_after, expires_at, datetime.now().isoformat(), job['id'], JOB_RUNNING, job['attempts'])
+            ).rowcount
+        if not updated:
+            logger.warning(f"Job {job['id']} ({job['job_type']}) attempt {job['attempts']} lost its lease, error discarded")
+            return
+        if status == JOB_FAILED:
+            self._secrets.pop(job['id'], None)
+
+    def _purge_expired(self):
+        """Delete finished jobs whose results expired and fail orphaned ones (at most once a minute)"""
+        if time.time() - self._last_purge < 60:
+            return
+        self._last_purge = time.time()
+
+        with connect(self.db_path) as conn:
+            conn.execute('DELETE FROM jobs WHERE status IN (?, ?) AND expires_at < ?', (JOB_SUCCEEDED, JOB_FAILED, time.time()))
+
+        self._fail_orphaned()
+
+    def _fail_orphaned(self):
+        """Fail unfinished jobs whose secrets were held by a process on this host that has exited"""
+        hostname = socket.gethostname()
+
+        with connect(self.db_path) as conn:
+            rows = conn.execute(
+                'SELECT id, owner FROM jobs WHERE owner IS NOT NULL AND owner != ? AND status IN (?, ?)',
+                (self._owner(), JOB_QUEUED, JOB_RUNNING)
+            ).fetchall()
+            for row in rows:
+                owner_host, _, owner_pid = row['owner'].rpartition(':')
+                if owner_host != hostname or _process_alive(int(owner_pid)):
+                    continue
+                conn.execute(
+                    'UPDATE jobs SET status = ?, error = ?, lease_expires = NULL, expires_at = ?, updated_at = ? '
+                    'WHERE id = ? AND status IN (?, ?)',
+                    (JOB_FAILED, ORPHANED_JOB_ERROR, time.time() + self.result_ttl, datetime.now().isoformat(),
+                     row['id'], JOB_QUEUED, JOB_RUNNING)
+                )
+                logger.warning(f"Job {row['id']} failed: owner process {row['owner']} exited")
+
+
+def _process_alive(pid: int) -> bool:
+    """Whether a process with this pid exists on this host"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
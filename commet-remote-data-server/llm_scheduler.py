@@ -0,0 +1,196 @@
+"""
+LLM Request Scheduler
+Runs OpenAI completions on a shared asyncio event loop with a process-wide
+concurrency limit, priority queueing and per-call timeouts
+"""
+
+import asyncio
+import concurrent.futures
+import heapq
+import itertools
+import os
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+# Extra time a synchronous caller waits for the event loop to report a timeout itself
+RESULT_GRACE_SECONDS = 5
+
+
+class LLMTimeoutError(TimeoutError):
+    """Raised when an upstream LLM call exceeds its timeout"""
+    pass
+
+
+class PrioritySemaphore:
+    """
+    asyncio semaphore that hands free slots to waiters in priority order
+    (lowest priority value first, FIFO within the same priority)
+    """
+
+    def __init__(self, value: int):
+        self._value = value
+        self._waiters = []  # heap of (priority, sequence, future)
+        self._counter = itertools.count()
+
+    @property
+    def waiting(self) -> int:
+        """Number of callers currently queued for a slot"""
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE):
+        if self._value > 0 and not self.waiting:
+            self._value -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # The slot was handed over just before the cancellation, pass it on
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(True)
+                return
+        self._value += 1
+
+
+class LLMScheduler:
+    """
+    Process-wide scheduler for upstream LLM calls
+
+    Calls run as coroutines on a dedicated event loop thread, so an in-flight
+    completion does not need a thread of its own. Synchronous (WSGI) callers
+    block on `run`, async callers await `submit_async`.
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None, default_timeout: Optional[float] = None):
+        """
+        Initialize the scheduler
+
+        Args:
+            max_concurrency: Maximum number of concurrent upstream calls (OPENAI_MAX_CONCURRENCY)
+            default_timeout: Per-call timeout in seconds, queue wait included (OPENAI_TIMEOUT_SECONDS)
+        """
+        self.max_concurrency = max_concurrency or int(os.getenv('OPENAI_MAX_CONCURRENCY', 8))
+        self.default_timeout = default_timeout or float(os.getenv('OPENAI_TIMEOUT_SECONDS', 60))
+
+        self._lock = threading.Lock()
+        self._loop = None
+        self._semaphore = None
+        self._pid = None
+        self._stats = {
+            'in_flight': 0,
+            'completed': 0,
+            'failed': 0,
+            'timed_out': 0
+        }
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the event loop thread on first use (and again in a forked child)"""
+        with self._lock:
+            if self._loop is not None and self._pid == os.getpid():
+                return self._loop
+
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name='llm-scheduler', daemon=True)
+            thread.start()
+
+            self._loop = loop
+            self._semaphore = PrioritySemaphore(self.max_concurrency)
+            self._pid = os.getpid()
+            return loop
+
+    async def _execute(self, coro_factory: Callable[[], Awaitable[Any]], priority: int, timeout: Optional[float]) -> Any:
+        """Run a call with the timeout covering both the wait for a slot and the upstream call"""
+        timeout = timeout or self.default_timeout
+        try:
+            return await asyncio.wait_for(self._call(coro_factory, priority), timeout=timeout)
+        except asyncio.TimeoutError:
+            self._stats['timed_out'] += 1
+            raise LLMTimeoutError(f"LLM request timed out after {timeout}s")
+
+    async def _call(self, coro_factory: Callable[[], Awaitable[Any]], priority: int) -> Any:
+        """Wait for a concurrency slot, then make the upstream call"""
+        await self._semaphore.acquire(priority)
+        self._stats['in_flight'] += 1
+        try:
+            result = await coro_factory()
+            self._stats['completed'] += 1
+            return result
+        except Exception:
+            self._stats['failed'] += 1
+            raise
+        finally:
+            self._stats['in_flight'] -= 1
+            self._semaphore.release()
+
+    def run(self, coro_factory: Callable[[], Awaitable[Any]], priority: int = PRIORITY_INTERACTIVE,
+            timeout: Optional[float] = None) -> Any:
+        """
+        Run an LLM call from synchronous code and wait for its result
+
+        Args:
+            coro_factory: Callable returning the coroutine to run (e.g. an AsyncOpenAI call)
+            priority: PRIORITY_INTERACTIVE or PRIORITY_BATCH
+            timeout: Timeout in seconds for the whole request, queue wait included (defaults to default_timeout)
+
+        Returns:
+            Result of the coroutine
+
+        Raises:
+            LLMTimeoutError: If the request did not finish within the timeout
+        """
+        loop = self._ensure_loop()
+        timeout = timeout or self.default_timeout
+        future = asyncio.run_coroutine_threadsafe(self._execute(coro_factory, priority, timeout), loop)
+
+        # The loop enforces the timeout; this only guards against a stalled loop
+        done, _ = concurrent.futures.wait([future], timeout=timeout + RESULT_GRACE_SECONDS)
+        if not done:
+            future.cancel()
+            raise LLMTimeoutError(f"LLM request timed out after {timeout}s")
+        return future.result()
+
+    async def submit_async(self, coro_factory: Callable[[], Awaitable[Any]], priority: int = PRIORITY_INTERACTIVE,
+                           timeout: Optional[float] = None) -> Any:
+        """Await an LLM call from any event loop"""
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(self._execute(coro_factory, priority, timeout), loop)
+        return await asyncio.wrap_future(future)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get scheduler statistics
+
+        Returns:
+            Dictionary with concurrency limit, queue depth and call counters
+        """
+        return {
+            'max_concurrency': self.max_concurrency,
+            'queued': self._semaphore.waiting if self._semaphore else 0,
+            **self._stats
+        }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    """Get the process-wide LLM scheduler"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler()
+        return _scheduler
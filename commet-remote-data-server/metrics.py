@@ -0,0 +1,199 @@
+"""
+Prometheus Metrics
+Request, upstream (GitHub, OpenAI, Jira), cache and token metrics exposed at /metrics
+
+Requests are recorded by the Flask hooks in server.py and the ASGI middleware in
+asgi.py; upstream calls by the clients themselves (BaseIntegration, the async
+GitHub client, the PyGithub connection wrapper below and GitHubAIService). Each
+request counts the upstream calls made on its thread or task, so the calls-per-
+request histograms show which routes fan out.
+
+With several gunicorn workers, set PROMETHEUS_MULTIPROC_DIR to an empty directory
+so /metrics aggregates every worker process (see gunicorn.conf.py).
+"""
+
+import os
+import re
+import time
+import contextvars
+from typing import Dict, Optional, Tuple
+
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, CONTENT_TYPE_LATEST, generate_latest
+)
+from prometheus_client import multiprocess
+
+UPSTREAMS = ('github', 'openai', 'jira')
+
+# AI completions routinely take tens of seconds
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+CALLS_PER_REQUEST_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+REQUESTS = Counter(
+    'commet_http_requests_total', 'HTTP requests served', ['method', 'route', 'status']
+)
+REQUEST_LATENCY = Histogram(
+    'commet_http_request_duration_seconds', 'HTTP request latency', ['method', 'route'], buckets=LATENCY_BUCKETS
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    'commet_http_requests_in_flight', 'HTTP requests being served', ['method', 'route'], multiprocess_mode='livesum'
+)
+UPSTREAM_REQUESTS = Counter(
+    'commet_upstream_requests_total', 'Calls to upstream APIs', ['upstream', 'operation', 'status']
+)
+UPSTREAM_LATENCY = Histogram(
+    'commet_upstream_request_duration_seconds', 'Upstream API call latency (including retries)',
+    ['upstream', 'operation'], buckets=LATENCY_BUCKETS
+)
+UPSTREAM_CALLS_PER_REQUEST = Histogram(
+    'commet_upstream_calls_per_request', 'Upstream API calls made while serving one HTTP request',
+    ['route', 'upstream'], buckets=CALLS_PER_REQUEST_BUCKETS
+)
+CACHE_LOOKUPS = Counter(
+    'commet_cache_lookups_total', 'Cache lookups by result (hit ratio = hit / all)', ['cache', 'result']
+)
+OPENAI_TOKENS = Counter(
+    'commet_openai_tokens_total', 'OpenAI tokens (cached is the part of prompt served from the prefix cache)',
+    ['model', 'type']
+)
+GITHUB_RATE_LIMIT_REMAINING = Gauge(
+    'commet_github_rate_limit_remaining', 'GitHub API requests left in the current rate limit window',
+    ['resource', 'auth'], multiprocess_mode='mostrecent'
+)
+
+# Upstream calls of the HTTP request being served on this thread (or async task)
+_request_calls = contextvars.ContextVar('request_upstream_calls', default=None)
+
+
+def begin_request(method: str, route: str) -> Tuple[float, contextvars.Token]:
+    """
+    Start recording an HTTP request
+
+    Args:
+        method: HTTP method
+        route: Route template (e.g. /api/jobs/<job_id>), not the raw path
+
+    Returns:
+        State to pass to end_request
+    """
+    REQUESTS_IN_FLIGHT.labels(method, route).inc()
+    return time.perf_counter(), _request_calls.set({})
+
+
+def end_request(method: str, route: str, status: int, state: Tuple[float, contextvars.Token]):
+    """Record latency, status and upstream calls of a request started with begin_request"""
+    started, token = state
+    REQUESTS_IN_FLIGHT.labels(method, route).dec()
+    REQUESTS.labels(method, route, str(status)).inc()
+    REQUEST_LATENCY.labels(method, route).observe(time.perf_counter() - started)
+
+    calls = _request_calls.get() or {}
+    for upstream in UPSTREAMS:
+        UPSTREAM_CALLS_PER_REQUEST.labels(route, upstream).observe(calls.get(upstream, 0))
+    try:
+        _request_calls.reset(token)
+    except ValueError:
+        # Ended in a different context than it began (e.g. a streamed response)
+        _request_calls.set(None)
+
+
+def record_upstream_call(upstream: str, operation: str, status, latency: float):
+    """
+    Record one upstream API call
+
+    Args:
+        upstream: 'github', 'openai' or 'jira'
+        operation: Low-cardinality operation name (e.g. "GET /repos/{repo}/commits")
+        status: HTTP status code, or 'error' if no response was received
+        latency: Seconds the call took
+    """
+    UPSTREAM_REQUESTS.labels(upstream, operation, str(status)).inc()
+    UPSTREAM_LATENCY.labels(upstream, operation).observe(latency)
+
+    calls = _request_calls.get()
+    if calls is not None:
+        calls[upstream] = calls.get(upstream, 0) + 1
+
+
+def record_cache(cache: str, hit: bool):
+    """Record a cache lookup"""
+    CACHE_LOOKUPS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def record_openai_tokens(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int):
+    """Record the token usage of a completion"""
+    OPENAI_TOKENS.labels(model, 'prompt').inc(prompt_tokens)
+    OPENAI_TOKENS.labels(model, 'completion').inc(completion_tokens)
+    OPENAI_TOKENS.labels(model, 'cached').inc(cached_tokens)
+
+
+def github_operation(method: str, path: str) -> str:
+    """
+    Collapse a GitHub API path into an operation name
+
+    Repository names, refs, SHAs and numeric IDs are replaced by placeholders,
+    e.g. GET /repos/owner/name/commits/abc123 -> GET /repos/{repo}/commits/{ref}
+    """
+    # GitHub Enterprise serves the API under /api/v3
+    parts = re.sub(r'^/api/v3', '', path.split('?')[0]).strip('/').split('/')
+    if parts[0] == 'repos' and len(parts) >= 3:
+        parts = ['repos', '{repo}'] + parts[3:4] + (['{ref}'] if len(parts) > 4 else [])
+    elif parts[0] in ('users', 'orgs') and len(parts) >= 2:
+        parts = [parts[0], '{owner}'] + parts[2:3]
+    path = re.sub(r'/\d+', '/{id}', '/' + '/'.join(parts))
+    return f"{method.upper()} {path}"
+
+
+def record_github_response(method: str, path: str, status, headers: Optional[Dict[str, str]], latency: float,
+                           authenticated: bool):
+    """Record a GitHub API call and the rate limit it reported"""
+    record_upstream_call('github', github_operation(method, path), status, latency)
+
+    remaining = (headers or {}).get('X-RateLimit-Remaining')
+    if remaining is not None and remaining.isdigit():
+        resource = headers.get('X-RateLimit-Resource') or 'core'
+        GITHUB_RATE_LIMIT_REMAINING.labels(resource, 'token' if authenticated else 'anonymous').set(int(remaining))
+
+
+def instrument_pygithub():
+    """
+    Record the calls PyGithub makes
+
+    PyGithub sends every request through its requests-based connection classes;
+    their getresponse is wrapped once, so each Github() client created by the
+    endpoints is measured without changes to the endpoints.
+    """
+    from github import Requester
+
+    for connection_class in (Requester.HTTPSRequestsConnectionClass, Requester.HTTPRequestsConnectionClass):
+        if getattr(connection_class.getresponse, '_commet_instrumented', False):
+            continue
+
+        def getresponse(self, _getresponse=connection_class.getresponse):
+            started = time.perf_counter()
+            status, headers = 'error', None
+            try:
+                response = _getresponse(self)
+                status, headers = response.status, response.headers
+                return response
+            finally:
+                record_github_response(self.verb, self.url, status, headers, time.perf_counter() - started,
+                                       authenticated='Authorization' in (self.headers or {}))
+
+        getresponse._commet_instrumented = True
+        connection_class.getresponse = getresponse
+
+
+def render_latest() -> Tuple[bytes, str]:
+    """
+    Render all metrics in the Prometheus text format
+
+    Returns:
+        (body, content type)
+    """
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
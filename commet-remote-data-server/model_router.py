@@ -0,0 +1,184 @@
+"""
+Model Router
+Picks an OpenAI model per request from the endpoint, question length and context size,
+and records latency and cost per route
+"""
+
+import os
+import threading
+from collections import deque
+from typing import Dict, Any, Optional
+
+# USD per 1M tokens (input, output); cached input tokens are billed at CACHED_INPUT_DISCOUNT
+CACHED_INPUT_DISCOUNT = 0.5
+MODEL_PRICING = {
+    'gpt-4o-mini': (0.15, 0.60),
+    'gpt-4o': (2.50, 10.00),
+    'gpt-4-turbo': (10.00, 30.00),
+    'gpt-3.5-turbo': (0.50, 1.50)
+}
+
+# Default route per endpoint before complexity escalation
+ENDPOINT_ROUTES = {
+    'chat': 'fast',
+    'story': 'fast',
+    'multi_project': 'strong',
+    'multi_project_summary': 'fast',
+    'jira_analysis': 'fast'
+}
+
+
+class ModelRouter:
+    """
+    Per-request model router
+
+    Simple questions go to the fast route; long questions, large contexts and
+    multi-project architecture prompts go to the strong route. Callers can
+    override the choice with a route name or a known model name (a configured
+    route model or one in MODEL_PRICING); overrides come from request bodies,
+    so arbitrary model names are rejected.
+    """
+
+    def __init__(self, fast_model: str = 'gpt-4o-mini', strong_model: Optional[str] = None):
+        """
+        Initialize the router
+
+        Args:
+            fast_model: Model for the fast route
+            strong_model: Model for the strong route (MODEL_ROUTE_STRONG, default gpt-4o)
+        """
+        self.routes = {
+            'fast': os.getenv('MODEL_ROUTE_FAST', fast_model),
+            'strong': strong_model or os.getenv('MODEL_ROUTE_STRONG', 'gpt-4o')
+        }
+        self.enabled = os.getenv('MODEL_ROUTING', 'true').lower() == 'true'
+        # Escalate to the strong route above these sizes
+        self.question_chars_threshold = int(os.getenv('MODEL_ROUTE_QUESTION_CHARS', 400))
+        self.context_chars_threshold = int(os.getenv('MODEL_ROUTE_CONTEXT_CHARS', 24000))
+
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def select(self, endpoint: str, question: str = '', context_chars: int = 0,
+               override: Optional[str] = None) -> Dict[str, str]:
+        """
+        Select a model for a request
+
+        Args:
+            endpoint: Endpoint name (chat, story, multi_project, multi_project_summary, jira_analysis)
+            question: User's question
+            context_chars: Size of the prompt context in characters
+            override: Route name ('fast'/'strong') or known model name (see check_override)
+
+        Returns:
+            Dictionary with route, model and the reason for the choice
+
+        Raises:
+            ValueError: If override is not a route name or a known model
+        """
+        if override:
+            error = self.check_override(override)
+            if error:
+                raise ValueError(error)
+            if override in self.routes:
+                return {'route': override, 'model': self.routes[override], 'reason': 'override'}
+            return {'route': 'override', 'model': override, 'reason': 'override'}
+
+        if not self.enabled:
+            return {'route': 'fast', 'model': self.routes['fast'], 'reason': 'routing disabled'}
+
+        route = ENDPOINT_ROUTES.get(endpoint, 'fast')
+        reason = f'{endpoint} default'
+
+        if route == 'fast':
+            if len(question or '') > self.question_chars_threshold:
+                route, reason = 'strong', 'long question'
+            elif context_chars > self.context_chars_threshold:
+                route, reason = 'strong', 'large context'
+
+        return {'route': route, 'model': self.routes[route], 'reason': reason}
+
+    def check_override(self, override: Any) -> Optional[str]:
+        """
+        Check a model override from a request
+
+        Args:
+            override: Requested route name or model name
+
+        Returns:
+            Error message if the override is not allowed, None if it is
+        """
+        allowed = set(self.routes) | set(self.routes.values()) | set(MODEL_PRICING)
+        if isinstance(override, str) and override in allowed:
+            return None
+        return f"Unsupported model. Use one of: {', '.join(sorted(allowed))}"
+
+    def record(self, route: str, model: str, latency: float, prompt_tokens: int = 0,
+               completion_tokens: int = 0, cached_tokens: int = 0):
+        """
+        Record latency and token usage of a completed call
+
+        Args:
+            route: Route name
+            model: Model used
+            latency: Call latency in seconds
+            prompt_tokens: Prompt tokens billed
+            completion_tokens: Completion tokens billed
+            cached_tokens: Prompt tokens served from the provider's prompt cache
+        """
+        input_price, output_price = MODEL_PRICING.get(model, (0.0, 0.0))
+        uncached_tokens = prompt_tokens - cached_tokens
+        cost = (uncached_tokens * input_price + cached_tokens * input_price * CACHED_INPUT_DISCOUNT
+                + completion_tokens * output_price) / 1_000_000
+
+        with self._lock:
+            stats = self._stats.setdefault(f"{route}:{model}", {
+                'route': route,
+                'model': model,
+                'calls': 0,
+                'prompt_tokens': 0,
+                'cached_tokens': 0,
+                'completion_tokens': 0,
+                'cost_usd': 0.0,
+                'latencies': deque(maxlen=500)
+            })
+            stats['calls'] += 1
+            stats['prompt_tokens'] += prompt_tokens
+            stats['cached_tokens'] += cached_tokens
+            stats['completion_tokens'] += completion_tokens
+            stats['cost_usd'] += cost
+            stats['latencies'].append(latency)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get per-route statistics
+
+        Returns:
+            Dictionary with the configured routes and latency/cost per route and model
+        """
+        with self._lock:
+            routes = []
+            for stats in self._stats.values():
+                latencies = sorted(stats['latencies'])
+                routes.append({
+                    'route': stats['route'],
+                    'model': stats['model'],
+                    'calls': stats['calls'],
+                    'prompt_tokens': stats['prompt_tokens'],
+                    'cached_tokens': stats['cached_tokens'],
+                    'cache_hit_ratio': round(stats['cached_tokens'] / stats['prompt_tokens'], 3) if stats['prompt_tokens'] else 0.0,
+                    'completion_tokens': stats['completion_tokens'],
+                    'cost_usd': round(stats['cost_usd'], 6),
+                    'avg_cost_usd': round(stats['cost_usd'] / stats['calls'], 6),
+                    'latency_ms': {
+                        'avg': round(sum(latencies) / len(latencies) * 1000, 1),
+                        'p50': round(latencies[len(latencies) // 2] * 1000, 1),
+                        'p95': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1)
+                    }
+                })
+
+        return {
+            'enabled': self.enabled,
+            'routes': dict(self.routes),
+            'stats': routes
+        }
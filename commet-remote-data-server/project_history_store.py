@@ -0,0 +1,234 @@
+"""
+Incremental Project History
+Persists per-project Jira ticket summaries and breakdown counters with a
+watermark (the latest `updated` timestamp seen), so each history request only
+fetches tickets changed since the previous one and folds them into the counters
+"""
+
+import os
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional
+
+from storage import get_data_path, connect
+from integrations.project_management.jira import JiraIntegration, JiraSearchError, HISTORY_FIELDS
+
+logger = logging.getLogger(__name__)
+
+BREAKDOWN_DIMENSIONS = ('issue_types', 'priorities', 'statuses', 'labels')
+
+
+def _ticket_dimensions(ticket: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Get the breakdown values a ticket counts towards"""
+    return {
+        'issue_types': [ticket.get('issuetype') or 'Unknown'],
+        'priorities': [ticket.get('priority') or 'Unknown'],
+        'statuses': [ticket.get('status') or 'Unknown'],
+        'labels': list(ticket.get('labels') or [])
+    }
+
+
+class ProjectHistoryStore:
+    """
+    SQLite-backed incremental Jira project history
+
+    The first request for a project scans it fully, most recently updated first,
+    so a project larger than max_tickets is served its newest tickets (and stays
+    marked truncated until a full rescan fits). Later requests query only
+    `updated >= watermark`, subtract each changed ticket's previous contribution
+    from the counters and add its new one. Deleted tickets are not reported by
+    that query, so the project is rescanned fully every full_refresh_hours.
+    """
+
+    def __init__(self, jira_integration: JiraIntegration, db_path: Optional[str] = None,
+                 full_refresh_hours: Optional[int] = None, max_tickets: int = 5000):
+        """
+        Initialize the history store
+
+        Args:
+            jira_integration: JiraIntegration used to fetch changed tickets
+            db_path: SQLite database path (defaults to project_history.db in COMMET_DATA_DIR)
+            full_refresh_hours: Hours between full rescans (JIRA_HISTORY_FULL_REFRESH_HOURS, default 24)
+            max_tickets: Upper bound on tickets scanned per request
+        """
+        self.jira = jira_integration
+        self.db_path = db_path or get_data_path('project_history.db')
+        self.full_refresh_hours = full_refresh_hours or int(os.getenv('JIRA_HISTORY_FULL_REFRESH_HOURS', 24))
+        self.max_tickets = max_tickets
+
+        with connect(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS project_state (
+                    project_key TEXT PRIMARY KEY,
+                    watermark TEXT,
+                    counters TEXT NOT NULL,
+                    full_refresh_at TEXT NOT NULL,
+                    refreshed_at TEXT NOT NULL
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS project_tickets (
+                    project_key TEXT NOT NULL,
+                    issue_key TEXT NOT NULL,
+                    created TEXT,
+                    updated TEXT,
+                    ticket TEXT NOT NULL,
+                    PRIMARY KEY (project_key, issue_key)
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_project_tickets_updated ON project_tickets (project_key, updated)')
+            # Whether the last full scan stopped at max_tickets (added after the first release)
+            columns = {row['name'] for row in conn.execute('PRAGMA table_info(project_state)')}
+            if 'capped' not in columns:
+                conn.execute('ALTER TABLE project_state ADD COLUMN capped INTEGER NOT NULL DEFAULT 0')
+
+    def refresh(self, project_key: str) -> Dict[str, Any]:
+        """
+        Bring a project's stored history up to date
+
+        Args:
+            project_key: Jira project key
+
+        Returns:
+            Dictionary with mode ('full' or 'incremental'), tickets fetched, the watermark
+            and whether the scan was cut short by a failed page or max_tickets (truncated)
+        """
+        project_key = project_key.upper()
+        with connect(self.db_path) as conn:
+            state = conn.execute('SELECT * FROM project_state WHERE project_key = ?', (project_key,)).fetchone()
+
+        full = (
+            not state or not state['watermark'] or
+            datetime.fromisoformat(state['full_refresh_at']) < datetime.now() - timedelta(hours=self.full_refresh_hours)
+        )
+
+        if full:
+            # Newest first: if the project has more than max_tickets, the oldest ones are left out
+            jql = f"project = {project_key} ORDER BY updated DESC"
+        else:
+            # Jira returns timestamps in the user's time zone, which is also how JQL dates are read.
+            # Oldest first, so an interrupted or capped scan leaves the watermark at the last ticket folded in
+            jql = f"project = {project_key} AND updated >= '{state['watermark'][:16].replace('T', ' ')}' ORDER BY updated ASC"
+
+        tickets = []
+        truncated = False
+        try:
+            for issue in self.jira.iter_issues(jql, fields=HISTORY_FIELDS, max_results=self.max_tickets, strict=True):
+                tickets.append(JiraIntegration._process_issue(issue))
+        except JiraSearchError:
+            # A partial full scan would replace the stored history; a partial incremental one is folded in
+            if full or not tickets:
+                raise
+            truncated = True
+        if full and not tickets and not self.jira.test_connection():
+            raise RuntimeError(f"Could not fetch Jira project {project_key}")
+        capped = full and len(tickets) >= self.max_tickets
+
+        now = datetime.now().isoformat()
+
+        with connect(self.db_path) as conn:
+            # Re-read the counters under the write lock so concurrent refreshes fold consistently
+            conn.execute('BEGIN IMMEDIATE')
+            current = conn.execute('SELECT watermark, counters FROM project_state WHERE project_key = ?', (project_key,)).fetchone()
+            if full or not current:
+                conn.execute('DELETE FROM project_tickets WHERE project_key = ?', (project_key,))
+                counters = {dimension: {} for dimension in BREAKDOWN_DIMENSIONS}
+                watermark = None
+            else:
+                counters = json.loads(current['counters'])
+                watermark = current['watermark']
+
+            for ticket in tickets:
+                previous = conn.execute(
+                    'SELECT ticket FROM project_tickets WHERE project_key = ? AND issue_key = ?',
+                    (project_key, ticket['key'])
+                ).fetchone()
+                if previous:
+                    self._fold(counters, json.loads(previous['ticket']), -1)
+                self._fold(counters, ticket, 1)
+
+                conn.execute(
+                    'INSERT OR REPLACE INTO project_tickets (project_key, issue_key, created, updated, ticket) VALUES (?, ?, ?, ?, ?)',
+                    (project_key, ticket['key'], ticket.get('created'), ticket.get('updated'), json.dumps(ticket))
+                )
+                if ticket.get('updated') and (not watermark or ticket['updated'] > watermark):
+                    watermark = ticket['updated']
+
+            conn.execute(
+                'INSERT INTO project_state (project_key, watermark, counters, full_refresh_at, refreshed_at, capped) '
+                'VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(project_key) DO UPDATE SET watermark = excluded.watermark, counters = excluded.counters, '
+                'full_refresh_at = CASE WHEN ? THEN excluded.full_refresh_at ELSE project_state.full_refresh_at END, '
+                'capped = CASE WHEN ? THEN excluded.capped ELSE project_state.capped END, '
+                'refreshed_at = excluded.refreshed_at',
+                (project_key, watermark, json.dumps(counters), now, now, capped, full, full)
+            )
+
+        logger.info(f"Refreshed history of {project_key} ({'full' if full else 'incremental'}): {len(tickets)} tickets fetched")
+        return {'mode': 'full' if full else 'incremental', 'tickets_fetched': len(tickets), 'watermark': watermark,
+                'truncated': truncated or len(tickets) >= self.max_tickets}
+
+    def get_project_history(self, project_key: str, days_back: int = 30) -> Dict[str, Any]:
+        """
+        Get project history, fetching only tickets changed since the last call
+
+        Args:
+            project_key: Jira project key
+            days_back: Number of days to look back
+
+        Returns:
+            Dictionary containing project history data (same format as
+            JiraIntegration.get_project_history, plus a 'refresh' summary)
+        """
+        refresh = self.refresh(project_key)
+        project_key = project_key.upper()
+
+        end_date = datetime.now()
+        start_date = (end_date - timedelta(days=days_back)).strftime('%Y-%m-%d')
+        recent_start = (end_date - timedelta(days=7)).strftime('%Y-%m-%d')
+
+        with connect(self.db_path) as conn:
+            state = conn.execute('SELECT counters, capped FROM project_state WHERE project_key = ?', (project_key,)).fetchone()
+            rows = conn.execute(
+                'SELECT created, updated, ticket FROM project_tickets WHERE project_key = ? ORDER BY updated DESC',
+                (project_key,)
+            ).fetchall()
+
+        all_tickets = [json.loads(row['ticket']) for row in rows]
+        created_tickets = [ticket for ticket, row in zip(all_tickets, rows) if (row['created'] or '')[:10] >= start_date]
+        updated_tickets = [ticket for ticket, row in zip(all_tickets, rows) if (row['updated'] or '')[:10] >= start_date]
+        recent_tickets = [ticket for ticket, row in zip(all_tickets, rows) if (row['updated'] or '')[:10] >= recent_start]
+
+        return {
+            'project_key': project_key,
+            'analysis_period': {
+                'start_date': start_date,
+                'end_date': end_date.strftime('%Y-%m-%d'),
+                'days_analyzed': days_back
+            },
+            'ticket_statistics': {
+                'total_tickets': len(all_tickets),
+                'created_in_period': len(created_tickets),
+                'updated_in_period': len(updated_tickets),
+                'recent_activity': len(recent_tickets),
+                # Tickets older than a capped full scan stay missing until a full rescan fits
+                'truncated': refresh['truncated'] or bool(state['capped'])
+            },
+            'breakdown': json.loads(state['counters']),
+            'recent_tickets': recent_tickets,
+            'created_tickets': created_tickets,
+            'updated_tickets': updated_tickets,
+            'all_tickets': all_tickets,
+            'refresh': refresh
+        }
+
+    @staticmethod
+    def _fold(counters: Dict[str, Dict[str, int]], ticket: Dict[str, Any], sign: int):
+        """Add (sign 1) or remove (sign -1) a ticket's contribution to the breakdown counters"""
+        for dimension, values in _ticket_dimensions(ticket).items():
+            bucket = counters.setdefault(dimension, {})
+            for value in values:
+                bucket[value] = bucket.get(value, 0) + sign
+                if bucket[value] <= 0:
+                    del bucket[value]
@@ -1,12 +1,26 @@
-from flask import Flask, jsonify, request, session, redirect, url_for
+from flask import Flask, Response, g, jsonify, request, session, redirect, url_for
 from flask_cors import CORS
 import os
+import json
+import time
+import threading
 from github import Github
 from datetime import datetime
-from ai_service import GitHubAIService
+from concurrent.futures import ThreadPoolExecutor
+from ai_service import GitHubAIService, SUMMARY_MAX_COMMITS, SUMMARY_FILES_PER_COMMIT, SUMMARY_PATCH_CHARS
 from github_auth import GitHubAuthService
 from integrations.project_management.jira import JiraIntegration
 from webhooks.jira_webhooks import JiraWebhookHandler
+from story_store import StoryStore
+from chat_sessions import ChatSessionStore
+from job_queue import JobQueue, JOB_SUCCEEDED, JOB_FAILED
+from jira_mirror import JiraMirror
+from jira_analytics import compute_flow_metrics
+from webhook_queue import WebhookEventQueue
+from ticket_fingerprints import TicketFingerprintIndex
+from commit_sync_ledger import CommitSyncLedger
+from project_history_store import ProjectHistoryStore
+import metrics
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -38,6 +52,14 @@ except ValueError as e:
     print(f"⚠️  AI service not available: {e}")
     ai_service = None
 
+chat_sessions = ChatSessionStore()
+
+try:
+    story_store = StoryStore()
+except Exception as e:
+    print(f"⚠️  Commit story store not available: {e}")
+    story_store = None
+
 try:
     github_auth = GitHubAuthService()
 except Exception as e:
@@ -51,6 +73,12 @@ try:
         'email': os.getenv('JIRA_EMAIL'),
         'api_token': os.getenv('JIRA_API_TOKEN'),
         'project_key': os.getenv('JIRA_PROJECT_KEY'),
+        'timeout': float(os.getenv('JIRA_TIMEOUT_SECONDS', 30)),
+        'pool_size': int(os.getenv('JIRA_POOL_SIZE', 10)),
+        'max_retries': int(os.getenv('JIRA_MAX_RETRIES', 3)),
+        'backoff_factor': float(os.getenv('JIRA_BACKOFF_FACTOR', 0.5)),
+        'metadata_ttl': int(os.getenv('JIRA_METADATA_TTL_SECONDS', 3600)),
+        'health_check_interval': int(os.getenv('JIRA_HEALTH_CHECK_SECONDS', 60)),
         'enabled': bool(os.getenv('JIRA_URL') and os.getenv('JIRA_EMAIL') and os.getenv('JIRA_API_TOKEN'))
     }
     jira_integration = JiraIntegration(jira_config) if jira_config['enabled'] else None
@@ -68,8 +96,103 @@ except Exception as e:
     print(f"⚠️  Jira integration not available: {e}")
     jira_integration = None
 
+# Initialize fingerprint index of auto-created tickets (deduplicates repeated findings)
+try:
+    ticket_index = TicketFingerprintIndex()
+except Exception as e:
+    print(f"⚠️  Ticket fingerprint index not available: {e}")
+    ticket_index = None
+
+# Initialize ledger of commits synced to Jira tickets (batch sync skips what was already logged)
+try:
+    commit_sync_ledger = CommitSyncLedger()
+except Exception as e:
+    print(f"⚠️  Commit sync ledger not available: {e}")
+    commit_sync_ledger = None
+
+# Initialize background job queue (Jira ticket creation and "async" analyses off the request path)
+try:
+    job_queue = JobQueue()
+except Exception as e:
+    print(f"⚠️  Background job queue not available: {e}")
+    job_queue = None
+
+# Server-Sent Events for /api/jobs/<job_id>/events
+JOB_EVENTS_POLL_SECONDS = 1.0
+JOB_EVENTS_KEEPALIVE_SECONDS = 15
+JOB_EVENTS_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+# Request fields handed to job workers in memory only, never written to jobs.db
+JOB_SECRET_FIELDS = ('token',)
+
+# Initialize local Jira issue mirror (project history and simple searches without Jira round-trips)
+jira_mirror = None
+if jira_integration and os.getenv('JIRA_MIRROR_ENABLED', 'true').lower() == 'true':
+    try:
+        jira_mirror = JiraMirror(jira_integration)
+        print(f"✅ Jira mirror initialized for projects: {', '.join(jira_mirror.projects) or 'none'}")
+    except Exception as e:
+        print(f"⚠️  Jira mirror not available: {e}")
+        jira_mirror = None
+
+# Initialize incremental project history (fetches only tickets updated since the last request)
+project_history_store = None
+if jira_integration:
+    try:
+        project_history_store = ProjectHistoryStore(jira_integration)
+    except Exception as e:
+        print(f"⚠️  Project history store not available: {e}")
+        project_history_store = None
+
+# Short-lived cache of project histories for multi-project chat: (project_key, days_back) -> (expires_at, history)
+jira_history_cache = {}
+jira_history_cache_lock = threading.Lock()
+
 # Initialize Jira webhook handler
-jira_webhook_handler = JiraWebhookHandler(jira_integration) if jira_integration else None
+jira_webhook_handler = None
+if jira_integration:
+    jira_webhook_handler = JiraWebhookHandler(jira_integration, mirror=jira_mirror,
+                                              secret=os.getenv('JIRA_WEBHOOK_SECRET'))
+    if not jira_webhook_handler.secret:
+        print("⚠️  JIRA_WEBHOOK_SECRET not set: /webhooks/jira accepts unauthenticated requests")
+
+# Initialize webhook inbox (acknowledge immediately, deduplicate retries, apply events in batches)
+webhook_queue = None
+if jira_webhook_handler:
+    try:
+        webhook_queue = WebhookEventQueue(jira_webhook_handler.handle_batch)
+    except Exception as e:
+        print(f"⚠️  Webhook queue not available, handling webhooks inline: {e}")
+        webhook_queue = None
+
+# Prometheus metrics: requests are recorded by the hooks below, GitHub calls made by PyGithub by its connection wrapper
+metrics.instrument_pygithub()
+
+@app.before_request
+def _begin_request_metrics():
+    g.metrics_route = request.url_rule.rule if request.url_rule else '<unmatched>'
+    g.metrics_state = metrics.begin_request(request.method, g.metrics_route)
+
+@app.after_request
+def _end_request_metrics(response):
+    if g.get('metrics_state'):
+        metrics.end_request(request.method, g.metrics_route, response.status_code, g.pop('metrics_state'))
+    return response
+
+@app.teardown_request
+def _abort_request_metrics(error):
+    # Requests that ended without a response (after_request did not run)
+    if g.get('metrics_state'):
+        metrics.end_request(request.method, g.metrics_route, 500, g.pop('metrics_state'))
+
+@app.route('/metrics')
+def get_metrics():
+    """
+    Prometheus metrics: request latency and in-flight requests per route, upstream
+    (GitHub, OpenAI, Jira) latency and calls per request, cache lookups, OpenAI
+    token usage and GitHub rate limit remaining
+    """
+    body, content_type = metrics.render_latest()
+    return Response(body, content_type=content_type)
 
 # Basic route
 @app.route('/')
@@ -416,21 +539,20 @@ def get_repo_info():
     except Exception as e:
         return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
 
-def _analyze_and_create_jira_tickets(ai_response, question, repo_data, commits_data, jira_integration):
+def _collect_analysis_tickets(ai_response, question, repo_data, commits_data):
     """
-    Analyze AI response and automatically create Jira tickets for detected issues.
+    Analyze AI response and collect Jira tickets for detected issues.
     
     Args:
         ai_response: The AI-generated response text
         question: The original question asked
         repo_data: Repository metadata
         commits_data: List of commits data
-        jira_integration: JiraIntegration instance
         
     Returns:
-        List of created ticket information
+        List of (analysis_data, ticket_info) tuples to create
     """
-    tickets_created = []
+    pending_tickets = []
     
     try:
         # Convert response to lowercase for analysis
@@ -492,33 +614,375 @@ def _analyze_and_create_jira_tickets(ai_response, question, repo_data, commits_d
                     'analysis_question': question
                 }
                 
-                # Create Jira ticket
-                try:
-                    success = jira_integration.create_quality_ticket(analysis_data)
-                    if success:
-                        tickets_created.append({
-                            'type': issue_type,
-                            'title': issue_title,
-                            'severity': config['severity'],
-                            'priority': config['priority'],
-                            'category': config['category'],
-                            'status': 'created'
-                        })
-                        print(f"✅ Created Jira ticket for {issue_type} issue: {issue_title}")
-                    else:
-                        print(f"❌ Failed to create Jira ticket for {issue_type} issue")
-                except Exception as e:
-                    print(f"❌ Error creating Jira ticket for {issue_type}: {str(e)}")
+                pending_tickets.append((analysis_data, {
+                    'type': issue_type,
+                    'title': issue_title,
+                    'severity': config['severity'],
+                    'priority': config['priority'],
+                    'category': config['category']
+                }))
         
         # Check for commit-related issues that might need tickets
         if commits_data and any('commit' in response_lower or 'change' in response_lower for _ in [1]):
-            _create_commit_analysis_tickets(commits_data, ai_response, repo_data, jira_integration, tickets_created)
+            commit_ticket = _build_commit_analysis_ticket(commits_data, repo_data)
+            if commit_ticket:
+                pending_tickets.append(commit_ticket)
         
     except Exception as e:
-        print(f"❌ Error in automatic Jira ticket creation: {str(e)}")
+        print(f"❌ Error in automatic Jira ticket analysis: {str(e)}")
+    
+    return pending_tickets
+
+def _create_quality_tickets_bulk(pending_tickets, jira_integration):
+    """
+    Create quality tickets with a single bulk request.
+    
+    Tickets matching a previously created ticket for the same repository and
+    category (see TicketFingerprintIndex) get a comment on the existing ticket
+    instead of a new one; if that comment fails the finding is reported as failed,
+    never filed again. New tickets claim their fingerprint first, so a concurrent
+    analysis reporting the same finding skips it (status 'duplicate') instead of
+    filing it twice.
+    
+    Args:
+        pending_tickets: List of (analysis_data, ticket_info) tuples
+        jira_integration: JiraIntegration instance
+        
+    Returns:
+        List of ticket_info dictionaries of the created, updated or duplicate findings,
+        with their keys and status; failed findings are not included
+    """
+    if not pending_tickets:
+        return []
+    
+    tickets_created = []
+    new_tickets = []
+    
+    try:
+        for analysis_data, ticket_info in pending_tickets:
+            repository = analysis_data.get('repository', 'Unknown')
+            category = analysis_data.get('category', 'unknown')
+            fingerprint_text = _ticket_fingerprint_text(analysis_data)
+            
+            match, claim_id = None, None
+            if ticket_index:
+                try:
+                    match, claim_id = ticket_index.claim(repository, category, fingerprint_text, analysis_data.get('title', ''))
+                except Exception as e:
+                    print(f"⚠️  Ticket fingerprint lookup failed: {str(e)}")
+            
+            if match and not match['ticket_key']:
+                # Another analysis is creating the ticket for this finding right now
+                _record_ticket_occurrence(match['id'])
+                tickets_created.append({**ticket_info, 'key': None, 'status': 'duplicate'})
+                print(f"🔁 Skipped {ticket_info['type']} issue already being filed: {ticket_info['title']}")
+                continue
+            
+            if match:
+                if not jira_integration.add_comment(match['ticket_key'], _format_duplicate_ticket_comment(analysis_data, match)):
+                    print(f"❌ Failed to comment on existing Jira ticket {match['ticket_key']} for {ticket_info['type']} issue: {ticket_info['title']}")
+                    continue
+                _record_ticket_occurrence(match['id'])
+                tickets_created.append({**ticket_info, 'key': match['ticket_key'], 'status': 'updated'})
+                print(f"🔁 Updated existing Jira ticket {match['ticket_key']} for {ticket_info['type']} issue: {ticket_info['title']}")
+                continue
+            
+            new_tickets.append((analysis_data, ticket_info, claim_id))
+    except Exception:
+        # Do not leave claims taken so far blocking other analyses until they time out
+        for _, _, claim_id in new_tickets:
+            if claim_id:
+                ticket_index.release(claim_id)
+        raise
+    
+    if not new_tickets:
+        return tickets_created
+    
+    try:
+        results = jira_integration.create_quality_tickets_bulk([analysis_data for analysis_data, _, _ in new_tickets])
+    except Exception:
+        for _, _, claim_id in new_tickets:
+            if claim_id:
+                ticket_index.release(claim_id)
+        raise
+    
+    for (analysis_data, ticket_info, claim_id), result in zip(new_tickets, results):
+        if result['success']:
+            tickets_created.append({**ticket_info, 'key': result['key'], 'status': 'created'})
+            print(f"✅ Created Jira ticket {result['key']} for {ticket_info['type']} issue: {ticket_info['title']}")
+            if ticket_index:
+                try:
+                    if claim_id:
+                        ticket_index.complete(claim_id, result['key'])
+                    else:
+                        ticket_index.add(
+                            analysis_data.get('repository', 'Unknown'), analysis_data.get('category', 'unknown'),
+                            _ticket_fingerprint_text(analysis_data), analysis_data.get('title', ''), result['key']
+                        )
+                except Exception as e:
+                    print(f"⚠️  Could not record ticket fingerprint: {str(e)}")
+        else:
+            if claim_id:
+                ticket_index.release(claim_id)
+            print(f"❌ Failed to create Jira ticket for {ticket_info['type']} issue: {result.get('error')}")
     
     return tickets_created
 
+def _record_ticket_occurrence(fingerprint_id):
+    """Count another occurrence of a ticketed finding; the count is informational, so failures are only logged."""
+    try:
+        ticket_index.record_occurrence(fingerprint_id)
+    except Exception as e:
+        print(f"⚠️  Could not record ticket occurrence: {str(e)}")
+
+def _ticket_fingerprint_text(analysis_data):
+    """Text identifying a finding for deduplication: its title and, if specific, the affected file."""
+    file_path = analysis_data.get('file_path') or ''
+    if file_path.startswith('Multiple files'):
+        file_path = ''
+    return f"{analysis_data.get('title', '')} {file_path}"
+
+def _format_duplicate_ticket_comment(analysis_data, match):
+    """Format the comment added to an existing ticket when the same issue is detected again."""
+    return f"""
+**Detected again by Commet AI analysis**
+
+**Analysis Question**: {analysis_data.get('analysis_question', 'N/A')}
+**Analysis Date**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+**Finding**: {analysis_data.get('title', 'N/A')}
+**Times Detected**: {match['occurrences'] + 1}
+
+**Recommendation**:
+{analysis_data.get('recommendation', 'See AI analysis for detailed recommendations.')}
+    """.strip()
+
+def _get_jira_project_history(project_key, days_back):
+    """
+    Get project history from the local mirror when the project is mirrored, else from
+    Jira (incrementally through the history store when available)
+    
+    Both include flow_metrics (cycle/lead time, throughput, WIP, ageing); without the
+    mirror's changelog they are approximated from current statuses.
+    
+    Returns:
+        Tuple of (project history, source) where source is 'mirror' or 'jira'
+    """
+    if jira_mirror:
+        try:
+            if jira_mirror.is_mirrored(project_key):
+                return jira_mirror.get_project_history(project_key, days_back), 'mirror'
+        except Exception as e:
+            print(f"⚠️  Jira mirror read failed, using Jira: {str(e)}")
+    
+    project_history = None
+    if project_history_store:
+        try:
+            project_history = project_history_store.get_project_history(project_key, days_back)
+        except Exception as e:
+            print(f"⚠️  Incremental project history failed, using a full Jira scan: {str(e)}")
+    if not project_history:
+        project_history = jira_integration.get_project_history(project_key, days_back)
+    if project_history:
+        project_history['flow_metrics'] = compute_flow_metrics(project_history.get('all_tickets', []), days_back=days_back)
+    return project_history, 'jira'
+
+def _get_jira_project_histories(project_keys, days_back):
+    """
+    Get the histories of several Jira projects concurrently
+    
+    Histories are cached for JIRA_HISTORY_CACHE_TTL_SECONDS so consecutive questions
+    about the same projects skip Jira; missing ones are fetched in parallel (at most
+    JIRA_PROJECT_CONCURRENCY at a time) over the integration's shared connection pool.
+    
+    Returns:
+        Dictionary of project key to project history (projects that failed are omitted)
+    """
+    now = time.time()
+    histories = {}
+    missing = []
+    with jira_history_cache_lock:
+        for project_key in dict.fromkeys(project_keys):
+            cached = jira_history_cache.get((project_key, days_back))
+            metrics.record_cache('jira_history', bool(cached and cached[0] > now))
+            if cached and cached[0] > now:
+                histories[project_key] = cached[1]
+            else:
+                missing.append(project_key)
+    
+    def fetch(project_key):
+        try:
+            project_history, _ = _get_jira_project_history(project_key, days_back)
+            return project_key, project_history
+        except Exception as e:
+            print(f"Error processing Jira project {project_key}: {str(e)}")
+            return project_key, None
+    
+    if missing:
+        max_workers = min(len(missing), int(os.getenv('JIRA_PROJECT_CONCURRENCY', 4)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            fetched = list(executor.map(fetch, missing))
+        
+        expires_at = time.time() + int(os.getenv('JIRA_HISTORY_CACHE_TTL_SECONDS', 120))
+        with jira_history_cache_lock:
+            for project_key, project_history in fetched:
+                if project_history:
+                    histories[project_key] = project_history
+                    jira_history_cache[(project_key, days_back)] = (expires_at, project_history)
+            for key in [key for key, (expires, _) in jira_history_cache.items() if expires <= now]:
+                del jira_history_cache[key]
+    
+    return histories
+
+def _run_jira_tickets_job(payload):
+    """
+    Job queue handler creating auto-detected Jira tickets in the background.
+    
+    Per-ticket failures (e.g. invalid fields) are reported in the result; the job
+    is retried only when no finding could be handled at all. Findings that were
+    already being filed count as handled (status 'duplicate'), so a job made up
+    of duplicates succeeds instead of being retried.
+    
+    Args:
+        payload: Dictionary with 'tickets', a list of {'analysis_data', 'ticket_info'}
+        
+    Returns:
+        Dictionary with the created, updated and duplicate tickets and the number of failed ones
+    """
+    if not jira_integration:
+        raise RuntimeError("Jira integration not configured")
+    
+    pending_tickets = [(ticket['analysis_data'], ticket['ticket_info']) for ticket in payload['tickets']]
+    tickets_created = _create_quality_tickets_bulk(pending_tickets, jira_integration)
+    if pending_tickets and not tickets_created:
+        raise RuntimeError(f"None of {len(pending_tickets)} Jira tickets could be created")
+    
+    return {
+        "tickets_created": tickets_created,
+        "tickets_duplicate": sum(1 for ticket in tickets_created if ticket['status'] == 'duplicate'),
+        "tickets_failed": len(pending_tickets) - len(tickets_created)
+    }
+
+def _report_job_progress(message, percent=None):
+    """Report progress of the background job running on this thread (no-op in requests)"""
+    if job_queue:
+        job_queue.report_progress(message, percent)
+
+def _run_analysis_job(run_analysis, payload):
+    """
+    Run a long-running analysis for the job queue.
+    
+    The job result is the response body the synchronous endpoint would have
+    returned; error responses fail the attempt (and are retried once).
+    
+    Args:
+        run_analysis: _run_multi_project_chat or _run_commit_story
+        payload: Request body of the submission
+        
+    Returns:
+        Response body of the analysis
+    """
+    if not ai_service:
+        raise RuntimeError("AI service not available. Please check OPENAI_API_KEY environment variable.")
+    
+    response_data, status = run_analysis(payload)
+    if status != 200:
+        raise RuntimeError(f"{status}: {response_data.get('error')}")
+    
+    return response_data
+
+def _run_multi_project_chat_job(payload):
+    return _run_analysis_job(_run_multi_project_chat, payload)
+
+def _run_commit_story_job(payload):
+    return _run_analysis_job(_run_commit_story, payload)
+
+def _submit_analysis_job(job_type, data):
+    """
+    Queue a long-running analysis and respond with 202 and its job ID.
+    
+    Identical submissions (same body and token) share one job while it is queued,
+    running or its result has not expired. The token is kept out of the stored
+    payload and passed to the worker in memory.
+    """
+    if not job_queue:
+        return jsonify({"error": "Background job queue not available"}), 503
+    
+    payload = {key: value for key, value in data.items() if key != 'async' and key not in JOB_SECRET_FIELDS}
+    secrets = {key: data[key] for key in JOB_SECRET_FIELDS if data.get(key)}
+    job_id, created = job_queue.enqueue_unique(job_type, payload, secrets=secrets)
+    job = job_queue.get(job_id)
+    
+    return jsonify({
+        "job_id": job_id,
+        "job_type": job_type,
+        "status": job['status'] if job else 'queued',
+        "deduplicated": not created,
+        "status_url": f"/api/jobs/{job_id}",
+        "events_url": f"/api/jobs/{job_id}/events"
+    }), 202
+
+def _collect_finding_tickets(findings, question, repo_data):
+    """
+    Collect Jira tickets from structured findings returned by the AI service.
+    
+    Only findings at or above JIRA_FINDINGS_MIN_SEVERITY (default: medium) are filed;
+    no text scanning of the answer is needed.
+    
+    Args:
+        findings: Validated findings from ai_service.analyze_repository_with_findings
+        question: The original question asked
+        repo_data: Repository metadata
+        
+    Returns:
+        List of (analysis_data, ticket_info) tuples to create
+    """
+    pending_tickets = []
+    severity_rank = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
+    severity_priority = {'critical': 'Highest', 'high': 'High', 'medium': 'Medium', 'low': 'Low'}
+    min_severity = os.getenv('JIRA_FINDINGS_MIN_SEVERITY', 'medium').lower()
+    max_rank = severity_rank.get(min_severity, severity_rank['medium'])
+    
+    for finding in findings:
+        if severity_rank[finding['severity']] > max_rank:
+            continue
+        
+        analysis_data = {
+            'title': finding['title'],
+            'severity': finding['severity'],
+            'category': finding['category'].replace('_', '-'),
+            'description': f"""
+**Commet AI Finding**
+
+**Repository**: {repo_data.get('full_name', 'Unknown')}
+**Analysis Question**: {question}
+**Category**: {finding['category'].replace('_', ' ').title()}
+**Analysis Date**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+
+**Finding**: {finding['title']}
+
+---
+*This ticket was automatically created by Commet AI analysis.*
+            """.strip(),
+            'file_path': finding['file'] or 'Multiple files (see analysis)',
+            'line_number': 'N/A',
+            'recommendation': finding['recommendation'],
+            'code_snippet': finding['evidence'] or "No specific code context identified.",
+            'quality_score': _estimate_quality_score('', finding['severity']),
+            'repository': repo_data.get('full_name', 'Unknown'),
+            'analysis_question': question
+        }
+        
+        pending_tickets.append((analysis_data, {
+            'type': finding['category'],
+            'title': finding['title'],
+            'severity': finding['severity'],
+            'priority': severity_priority[finding['severity']],
+            'category': analysis_data['category'],
+            'file': finding['file']
+        }))
+    
+    return pending_tickets
+
 def _extract_issue_title(ai_response, issue_type):
     """Extract a concise title for the issue from AI response."""
     # Look for patterns that might indicate a title
@@ -599,8 +1063,8 @@ def _estimate_quality_score(ai_response, severity):
     
     return base_score
 
-def _create_commit_analysis_tickets(commits_data, ai_response, repo_data, jira_integration, tickets_created):
-    """Create tickets for commit-related issues."""
+def _build_commit_analysis_ticket(commits_data, repo_data):
+    """Build a ticket for commit-related issues, as an (analysis_data, ticket_info) tuple or None."""
     try:
         # Look for patterns in commit messages that might indicate issues
         problematic_commits = []
@@ -639,20 +1103,18 @@ def _create_commit_analysis_tickets(commits_data, ai_response, repo_data, jira_i
                 'repository': repo_data.get('full_name', 'Unknown')
             }
             
-            success = jira_integration.create_quality_ticket(analysis_data)
-            if success:
-                tickets_created.append({
-                    'type': 'commit_analysis',
-                    'title': 'High Frequency of Bug Fix Commits',
-                    'severity': 'medium',
-                    'priority': 'Medium',
-                    'category': 'code-quality',
-                    'status': 'created'
-                })
-                print("✅ Created Jira ticket for commit analysis")
+            return analysis_data, {
+                'type': 'commit_analysis',
+                'title': 'High Frequency of Bug Fix Commits',
+                'severity': 'medium',
+                'priority': 'Medium',
+                'category': 'code-quality'
+            }
     
     except Exception as e:
-        print(f"❌ Error creating commit analysis ticket: {str(e)}")
+        print(f"❌ Error building commit analysis ticket: {str(e)}")
+    
+    return None
 
 # AI Chat endpoint for GitHub repository analysis
 @app.route('/api/chat', methods=['POST'])
@@ -666,13 +1128,24 @@ def chat_with_repository():
         "repo": "microsoft/vscode",
         "token": "optional_github_token",
         "branch": "optional_branch_name",
-        "commits_limit": 10
+        "commits_limit": 10,
+        "model": "optional 'fast' | 'strong' | supported model name (overrides model routing)",
+        "session_id": "optional session ID returned by a previous call",
+        "structured_findings": false
     }
     
     Supported parameter combinations:
     1. repo + token + branch + commits_limit
     2. repo + token + commits_limit  
     3. repo + branch + commits_limit
+    4. session_id (follow-up question; reuses the session's repository data and prior turns)
+    
+    Every answer returns a session_id. Follow-up questions sent with it skip
+    GitHub fetching and reuse the built context and conversation history.
+    
+    With "structured_findings" (default: AI_STRUCTURED_FINDINGS), the same AI call
+    also returns a validated list of findings, which is included in the response
+    and used for Jira ticket creation instead of scanning the answer text.
     """
     try:
         # Check if AI service is available
@@ -684,149 +1157,132 @@ def chat_with_repository():
         if not data:
             return jsonify({"error": "Request body must be JSON"}), 400
         
-        question = data.get('question')
-        repo_name = data.get('repo')
-        token = data.get('token')
-        branch = data.get('branch')
-        commits_limit = data.get('commits_limit', 10)
-        
-        # Validate required parameters
-        if not question:
-            return jsonify({"error": "Question parameter is required"}), 400
-        
-        if not repo_name:
-            return jsonify({"error": "Repository parameter 'repo' is required (format: 'owner/repo')"}), 400
-        
-        # Validate parameter combinations
-        has_token = token is not None
-        has_branch = branch is not None
+        chat, error = _resolve_chat_request(data)
+        if error:
+            return jsonify(error[0]), error[1]
         
-        if not has_token and not has_branch:
-            return jsonify({"error": "Invalid parameter combination. Must include either 'token' or 'branch' parameter"}), 400
+        question = chat['question']
+        repo_name = chat['repo_name']
+        token = chat['token']
+        branch = chat['branch']
+        commits_limit = chat['commits_limit']
         
-        # Initialize GitHub client
-        if token:
-            g = Github(token)
+        if chat['session']:
+            repo_data = chat['repo_data']
+            commits_data = chat['commits_data']
         else:
-            g = Github()  # Use unauthenticated access (rate limited)
+            # Initialize GitHub client
+            if token:
+                g = Github(token)
+            else:
+                g = Github()  # Use unauthenticated access (rate limited)
         
-        # Get repository information
-        try:
-            repo = g.get_repo(repo_name)
-        except Exception as e:
-            return jsonify({"error": f"Repository not found or not accessible: {str(e)}"}), 404
+            # Get repository information
+            try:
+                repo = g.get_repo(repo_name)
+            except Exception as e:
+                return jsonify({"error": f"Repository not found or not accessible: {str(e)}"}), 404
         
-        # Get repository metadata
-        repo_data = {
-            "name": repo.name,
-            "full_name": repo.full_name,
-            "description": repo.description,
-            "url": repo.html_url,
-            "language": repo.language,
-            "languages": repo.get_languages(),
-            "stars": repo.stargazers_count,
-            "forks": repo.forks_count,
-            "watchers": repo.watchers_count,
-            "open_issues": repo.open_issues_count,
-            "created_at": repo.created_at.isoformat(),
-            "updated_at": repo.updated_at.isoformat(),
-            "pushed_at": repo.pushed_at.isoformat() if repo.pushed_at else None,
-            "default_branch": repo.default_branch,
-            "is_private": repo.private,
-            "owner": {
-                "login": repo.owner.login,
-                "type": repo.owner.type,
-                "avatar_url": repo.owner.avatar_url,
-                "url": repo.owner.html_url
+            # Get repository metadata
+            repo_data = {
+                "name": repo.name,
+                "full_name": repo.full_name,
+                "description": repo.description,
+                "url": repo.html_url,
+                "language": repo.language,
+                "languages": repo.get_languages(),
+                "stars": repo.stargazers_count,
+                "forks": repo.forks_count,
+                "watchers": repo.watchers_count,
+                "open_issues": repo.open_issues_count,
+                "created_at": repo.created_at.isoformat(),
+                "updated_at": repo.updated_at.isoformat(),
+                "pushed_at": repo.pushed_at.isoformat() if repo.pushed_at else None,
+                "default_branch": repo.default_branch,
+                "is_private": repo.private,
+                "owner": {
+                    "login": repo.owner.login,
+                    "type": repo.owner.type,
+                    "avatar_url": repo.owner.avatar_url,
+                    "url": repo.owner.html_url
+                }
             }
-        }
         
-        # Get commits data
-        try:
-            if branch:
-                commits = repo.get_commits(sha=branch)
-            else:
-                commits = repo.get_commits()  # Default branch
+            # Get commits data
+            try:
+                if branch:
+                    commits = repo.get_commits(sha=branch)
+                else:
+                    commits = repo.get_commits()  # Default branch
             
-            commits_data = []
-            for i, commit in enumerate(commits):
-                if i >= commits_limit:
-                    break
+                commits_data = []
+                for i, commit in enumerate(commits):
+                    if i >= commits_limit:
+                        break
                 
-                commit_data = {
-                    "sha": commit.sha,
-                    "message": commit.commit.message,
-                    "author": {
-                        "name": commit.commit.author.name,
-                        "email": commit.commit.author.email,
-                        "date": commit.commit.author.date.isoformat()
-                    },
-                    "committer": {
-                        "name": commit.commit.committer.name,
-                        "email": commit.commit.committer.email,
-                        "date": commit.commit.committer.date.isoformat()
-                    },
-                    "url": commit.html_url,
-                    "stats": {
-                        "additions": commit.stats.additions if commit.stats else 0,
-                        "deletions": commit.stats.deletions if commit.stats else 0,
-                        "total": commit.stats.total if commit.stats else 0
+                    commit_data = {
+                        "sha": commit.sha,
+                        "message": commit.commit.message,
+                        "author": {
+                            "name": commit.commit.author.name,
+                            "email": commit.commit.author.email,
+                            "date": commit.commit.author.date.isoformat()
+                        },
+                        "committer": {
+                            "name": commit.commit.committer.name,
+                            "email": commit.commit.committer.email,
+                            "date": commit.commit.committer.date.isoformat()
+                        },
+                        "url": commit.html_url,
+                        "stats": {
+                            "additions": commit.stats.additions if commit.stats else 0,
+                            "deletions": commit.stats.deletions if commit.stats else 0,
+                            "total": commit.stats.total if commit.stats else 0
+                        }
                     }
-                }
                 
-                # Try to get detailed file changes for better analysis
-                try:
-                    full_commit = repo.get_commit(commit.sha)
-                    file_changes = []
-                    for file in full_commit.files:
-                        file_change = {
-                            "filename": file.filename,
-                            "status": file.status,
-                            "additions": file.additions,
-                            "deletions": file.deletions,
-                            "changes": file.changes
-                        }
-                        file_changes.append(file_change)
-                    commit_data["file_changes"] = file_changes
-                except:
-                    # If we can't get file changes, continue without them
-                    pass
+                    # Try to get detailed file changes for better analysis
+                    try:
+                        full_commit = repo.get_commit(commit.sha)
+                        file_changes = []
+                        for file in full_commit.files:
+                            file_change = {
+                                "filename": file.filename,
+                                "status": file.status,
+                                "additions": file.additions,
+                                "deletions": file.deletions,
+                                "changes": file.changes
+                            }
+                            file_changes.append(file_change)
+                        commit_data["file_changes"] = file_changes
+                    except:
+                        # If we can't get file changes, continue without them
+                        pass
                 
-                commits_data.append(commit_data)
+                    commits_data.append(commit_data)
         
-        except Exception as e:
-            return jsonify({"error": f"Error fetching commits: {str(e)}"}), 500
+            except Exception as e:
+                return jsonify({"error": f"Error fetching commits: {str(e)}"}), 500
         
         # Use AI service to analyze the data and answer the question
         try:
-            ai_response = ai_service.analyze_repository_data(repo_data, commits_data, question)
+            chat['repo_data'] = repo_data
+            chat['commits_data'] = commits_data
+            context, history = _get_chat_context(chat)
             
-            # Check if Jira integration is available and auto-ticket creation is enabled
-            jira_tickets_created = []
-            auto_create_enabled = os.getenv('JIRA_AUTO_CREATE_TICKETS', 'true').lower() == 'true'
-            if jira_integration and auto_create_enabled and data.get('auto_create_tickets', True):
-                jira_tickets_created = _analyze_and_create_jira_tickets(
-                    ai_response, question, repo_data, commits_data, jira_integration
+            findings = None
+            if _wants_structured_findings(data):
+                result = ai_service.analyze_repository_with_findings(
+                    repo_data, commits_data, question, model=data.get('model'), context=context, history=history
+                )
+                ai_response = result['answer']
+                findings = result['findings']
+            else:
+                ai_response = ai_service.analyze_repository_data(
+                    repo_data, commits_data, question, model=data.get('model'), context=context, history=history
                 )
             
-            response_data = {
-                "question": question,
-                "repository": repo_name,
-                "branch": branch if branch else "default",
-                "analysis_data": {
-                    "repository_info": repo_data,
-                    "commits_analyzed": len(commits_data),
-                    "commits_limit": commits_limit
-                },
-                "ai_response": ai_response,
-                "model_used": ai_service.model
-            }
-            
-            # Add Jira ticket information if any were created
-            if jira_tickets_created:
-                response_data["jira_tickets_created"] = jira_tickets_created
-            
-            return jsonify(response_data)
+            return jsonify(_complete_chat_turn(data, chat, context, ai_response, findings, ai_service.get_last_call_info()))
             
         except Exception as e:
             return jsonify({"error": f"Error generating AI response: {str(e)}"}), 500
@@ -834,6 +1290,247 @@ def chat_with_repository():
     except Exception as e:
         return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
 
+def _check_model_override(data):
+    """
+    Check the optional 'model' of a request body against the router's allowed routes and models
+    
+    Returns:
+        Error message if the model is not allowed, None if it is allowed or absent
+    """
+    if data.get('model') is None or not ai_service:
+        return None
+    return ai_service.router.check_override(data['model'])
+
+def _resolve_chat_request(data):
+    """
+    Validate an /api/chat request body and look up its chat session
+    
+    Shared by the WSGI view and its async counterpart (asgi.py) so both accept
+    and reject the same requests.
+    
+    Args:
+        data: Request body
+        
+    Returns:
+        (chat, None) with question, repo_name, token, branch, commits_limit, session_id,
+        session and, for follow-ups, the session's repo_data and commits_data;
+        or (None, (error body, status code))
+    """
+    chat = {
+        'question': data.get('question'),
+        'repo_name': data.get('repo'),
+        'token': data.get('token'),
+        'branch': data.get('branch'),
+        'commits_limit': data.get('commits_limit', 10),
+        'session_id': data.get('session_id'),
+        'session': None
+    }
+    
+    # Validate required parameters
+    if not chat['question']:
+        return None, ({"error": "Question parameter is required"}, 400)
+    
+    # Sessions keep the fetched commits in memory, so bound how many are fetched
+    try:
+        chat['commits_limit'] = max(1, min(int(chat['commits_limit']), 100))
+    except (TypeError, ValueError):
+        return None, ({"error": "Invalid commits_limit parameter. Must be a number."}, 400)
+    
+    model_error = _check_model_override(data)
+    if model_error:
+        return None, ({"error": model_error}, 400)
+    
+    # Follow-up question in an existing chat session
+    if chat['session_id']:
+        chat_session = chat_sessions.get(chat['session_id'])
+        if not chat_session:
+            return None, ({"error": "Chat session not found or expired"}, 404)
+        if chat['repo_name'] and chat['repo_name'] != chat_session['repository']:
+            return None, ({"error": f"Chat session belongs to repository {chat_session['repository']}"}, 400)
+        
+        chat.update({
+            'session': chat_session,
+            'repo_name': chat_session['repository'],
+            'branch': chat_session['branch'],
+            'repo_data': chat_session['repo_data'],
+            'commits_data': chat_session['commits_data'],
+            'commits_limit': len(chat_session['commits_data'])
+        })
+        return chat, None
+    
+    if not chat['repo_name']:
+        return None, ({"error": "Repository parameter 'repo' is required (format: 'owner/repo')"}, 400)
+    
+    # Validate parameter combinations
+    if chat['token'] is None and chat['branch'] is None:
+        return None, ({"error": "Invalid parameter combination. Must include either 'token' or 'branch' parameter"}, 400)
+    
+    return chat, None
+
+def _wants_structured_findings(data):
+    """Whether an /api/chat request asks for structured findings (default: AI_STRUCTURED_FINDINGS)"""
+    return data.get('structured_findings', os.getenv('AI_STRUCTURED_FINDINGS', 'false').lower() == 'true')
+
+def _get_chat_context(chat):
+    """Get the AI context and prior turns of a chat (kept in the session for follow-ups)"""
+    if chat['session']:
+        return chat['session']['context'], chat['session']['turns']
+    return ai_service.prepare_context(chat['repo_data'], chat['commits_data']), None
+
+def _complete_chat_turn(data, chat, context, ai_response, findings, call_info):
+    """
+    Record an answered /api/chat question and build the response body
+    
+    Stores the turn in the chat session (creating it for a first question) and
+    queues or creates Jira tickets for detected issues.
+    
+    Args:
+        data: Request body
+        chat: Request parameters from _resolve_chat_request, with repo_data and commits_data
+        context: AI context the answer was generated from
+        ai_response: AI answer
+        findings: Validated structured findings, or None
+        call_info: Details of the completion (ai_service.get_last_call_info())
+        
+    Returns:
+        Response body dictionary
+    """
+    question = chat['question']
+    repo_name = chat['repo_name']
+    branch = chat['branch']
+    repo_data = chat['repo_data']
+    commits_data = chat['commits_data']
+    session_id = chat['session_id']
+    
+    # Remember the turn for follow-up questions (failed answers are not replayed)
+    turn = None
+    if not ai_response.startswith("Error generating AI response"):
+        if not chat['session']:
+            session_id = chat_sessions.create(repo_name, branch, repo_data, commits_data, context)
+        turn = chat_sessions.add_turn(session_id, question, ai_response)
+    
+    # Check if Jira integration is available and auto-ticket creation is enabled
+    jira_tickets_created = []
+    jira_ticket_jobs = []
+    auto_create_enabled = os.getenv('JIRA_AUTO_CREATE_TICKETS', 'true').lower() == 'true'
+    if jira_integration and auto_create_enabled and data.get('auto_create_tickets', True):
+        if findings is not None:
+            pending_tickets = _collect_finding_tickets(findings, question, repo_data)
+        else:
+            pending_tickets = _collect_analysis_tickets(ai_response, question, repo_data, commits_data)
+        
+        if pending_tickets and job_queue:
+            # Create tickets in the background; the response only waits for the enqueue
+            jira_ticket_jobs.append(job_queue.enqueue('jira_tickets', {
+                "tickets": [
+                    {"analysis_data": analysis_data, "ticket_info": ticket_info}
+                    for analysis_data, ticket_info in pending_tickets
+                ]
+            }))
+        elif pending_tickets:
+            jira_tickets_created = _create_quality_tickets_bulk(pending_tickets, jira_integration)
+    
+    response_data = {
+        "question": question,
+        "repository": repo_name,
+        "branch": branch if branch else "default",
+        "analysis_data": {
+            "repository_info": repo_data,
+            "commits_analyzed": len(commits_data),
+            "commits_limit": chat['commits_limit']
+        },
+        "ai_response": ai_response,
+        "model_used": call_info.get('model', ai_service.model),
+        "model_route": call_info.get('route'),
+        "usage": call_info.get('usage'),
+        "session_id": session_id,
+        "turn": turn
+    }
+    
+    if findings is not None:
+        response_data["findings"] = findings
+    
+    # Add Jira ticket information if any were created
+    if jira_tickets_created:
+        response_data["jira_tickets_created"] = jira_tickets_created
+    if jira_ticket_jobs:
+        response_data["jira_ticket_jobs"] = jira_ticket_jobs
+    
+    return response_data
+
+# Background job status endpoint
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """
+    Get the status, progress and result of a background job (e.g. Jira ticket
+    creation or an "async" analysis)
+    """
+    try:
+        if not job_queue:
+            return jsonify({"error": "Background job queue not available"}), 503
+        
+        job = job_queue.get(job_id)
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+        
+        return jsonify(job)
+        
+    except Exception as e:
+        return jsonify({"error": f"Error getting job status: {str(e)}"}), 500
+
+def _format_job_event(job):
+    """Format a job as a Server-Sent Event: 'done' once it finished, 'progress' before"""
+    event = 'done' if job['status'] in (JOB_SUCCEEDED, JOB_FAILED) else 'progress'
+    return f"event: {event}\ndata: {json.dumps(job)}\n\n"
+
+def _job_event_stream(job_id, job):
+    """Yield an event whenever the job changes until it finishes, with keep-alive comments in between"""
+    last_update = None
+    last_sent = time.time()
+    while job:
+        if job['updated_at'] != last_update:
+            last_update = job['updated_at']
+            last_sent = time.time()
+            yield _format_job_event(job)
+            if job['status'] in (JOB_SUCCEEDED, JOB_FAILED):
+                return
+        elif time.time() - last_sent >= JOB_EVENTS_KEEPALIVE_SECONDS:
+            last_sent = time.time()
+            yield ": keep-alive\n\n"
+        
+        time.sleep(JOB_EVENTS_POLL_SECONDS)
+        job = job_queue.get(job_id)
+
+# Background job progress stream
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def stream_job_events(job_id):
+    """
+    Follow a background job as Server-Sent Events: a 'progress' event whenever its
+    status or progress changes and a final 'done' event with the result or error.
+    Reconnecting is safe; the current state is sent first.
+    """
+    try:
+        if not job_queue:
+            return jsonify({"error": "Background job queue not available"}), 503
+        
+        job = job_queue.get(job_id)
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+        
+        return Response(_job_event_stream(job_id, job), mimetype='text/event-stream', headers=JOB_EVENTS_HEADERS)
+        
+    except Exception as e:
+        return jsonify({"error": f"Error streaming job events: {str(e)}"}), 500
+
+# Chat session endpoint - End a conversation and free its server-side context
+@app.route('/api/chat/sessions/<session_id>', methods=['DELETE'])
+def delete_chat_session(session_id):
+    """Delete a chat session created by /api/chat"""
+    if not chat_sessions.delete(session_id):
+        return jsonify({"error": "Chat session not found or expired"}), 404
+    
+    return jsonify({"success": True, "message": f"Chat session {session_id} deleted"})
+
 # Multi-Project AI Chat endpoint for analyzing multiple connected repositories
 @app.route('/api/chat/multi-project', methods=['POST'])
 def chat_with_multiple_repositories():
@@ -846,8 +1543,16 @@ def chat_with_multiple_repositories():
         "repositories": ["owner/frontend-repo", "owner/backend-repo"],
         "token": "optional_github_token",
         "branch": "optional_branch_name",
-        "commits_limit": 10
+        "commits_limit": 10,
+        "analysis_mode": "single" | "map_reduce",
+        "model": "optional 'fast' | 'strong' | supported model name (overrides model routing)"
     }
+    
+    "map_reduce" summarizes each repository separately (in parallel, cached by head
+    SHA) and answers over the summaries, which allows deeper per-repository coverage.
+    
+    With "async": true the analysis runs as a background job: the response is 202
+    with a job_id to poll at /api/jobs/<job_id> or follow at /api/jobs/<job_id>/events.
     """
     try:
         # Check if AI service is available
@@ -859,6 +1564,50 @@ def chat_with_multiple_repositories():
         if not data:
             return jsonify({"error": "Request body must be JSON"}), 400
         
+        error = _validate_multi_project_request(data)
+        if error:
+            return jsonify({"error": error}), 400
+        
+        if data.get('async'):
+            return _submit_analysis_job('multi_project_chat', data)
+        
+        response_data, status = _run_multi_project_chat(data)
+        return jsonify(response_data), status
+        
+    except Exception as e:
+        return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
+
+def _validate_multi_project_request(data):
+    """Validate a multi-project chat request; returns an error message or None"""
+    repositories = data.get('repositories', [])
+    
+    if not data.get('question'):
+        return "Question parameter is required"
+    
+    if not repositories and not data.get('jira_projects', []):
+        return "At least one repository or Jira project is required"
+    
+    if len(repositories) > 5:
+        return "Maximum 5 repositories can be analyzed at once"
+    
+    if data.get('analysis_mode', 'single') not in ('single', 'map_reduce'):
+        return "analysis_mode must be 'single' or 'map_reduce'"
+    
+    return _check_model_override(data)
+
+def _run_multi_project_chat(data):
+    """
+    Fetch the repositories and Jira projects of a validated multi-project question and answer it.
+    
+    Runs in the request, or in a job queue worker for "async" submissions.
+    
+    Args:
+        data: Request body of /api/chat/multi-project
+        
+    Returns:
+        (response body, HTTP status)
+    """
+    try:
         question = data.get('question')
         repositories = data.get('repositories', [])
         token = data.get('token')
@@ -866,16 +1615,25 @@ def chat_with_multiple_repositories():
         commits_limit = data.get('commits_limit', 10)
         jira_projects = data.get('jira_projects', [])  # New: Jira project keys
         include_jira_analysis = data.get('include_jira_analysis', False)
+        analysis_mode = data.get('analysis_mode', 'single')
         
-        # Validate required parameters
-        if not question:
-            return jsonify({"error": "Question parameter is required"}), 400
-        
-        if not repositories and not jira_projects:
-            return jsonify({"error": "At least one repository or Jira project is required"}), 400
-        
-        if len(repositories) > 5:
-            return jsonify({"error": "Maximum 5 repositories can be analyzed at once"}), 400
+        if commits_limit > 50:
+            commits_limit = 50  # Limit for performance
+        if commits_limit < 1:
+            commits_limit = 1
+        
+        # Each repository gets its own prompt in map-reduce mode, so fetch deeper detail, but only
+        # for the commits and files that prompt includes; its summaries are cached per head commit
+        # and commit window
+        if analysis_mode == 'map_reduce':
+            stats_commits = detail_commits = patch_commits = min(commits_limit, SUMMARY_MAX_COMMITS)
+            files_per_commit, patch_chars = SUMMARY_FILES_PER_COMMIT, SUMMARY_PATCH_CHARS
+            summary_window = (detail_commits, patch_chars)
+        else:
+            stats_commits = commits_limit
+            detail_commits, patch_commits, patch_chars = 3, 2, 500
+            files_per_commit = 10
+            summary_window = None
         
         # Initialize GitHub client
         if token:
@@ -889,7 +1647,8 @@ def chat_with_multiple_repositories():
         project_connections = []
         jira_data = []
         
-        for repo_name in repositories:
+        for index, repo_name in enumerate(repositories):
+            _report_job_progress(f"Fetching {repo_name} ({index + 1}/{len(repositories)})", 60 * index / len(repositories))
             try:
                 # Get repository information
                 repo = g.get_repo(repo_name)
@@ -927,6 +1686,19 @@ def chat_with_multiple_repositories():
                     else:
                         commits = repo.get_commits()  # Default branch
                     
+                    # A cached summary of this head commit makes the per-commit detail
+                    # (one stats/files request per commit) unnecessary; the first page of
+                    # the listing is fetched once and reused by the loop below
+                    summary_cached = False
+                    if summary_window and ai_service:
+                        try:
+                            head_sha = commits[0].sha
+                        except IndexError:
+                            head_sha = None
+                        summary_cached = bool(head_sha) and ai_service.has_repository_summary(
+                            repo.full_name, head_sha, summary_window
+                        )
+                    
                     commits_data = []
                     for i, commit in enumerate(commits):
                         if i >= commits_limit:
@@ -945,20 +1717,25 @@ def chat_with_multiple_repositories():
                                 "email": commit.commit.committer.email,
                                 "date": commit.commit.committer.date.isoformat()
                             },
-                            "url": commit.html_url,
-                            "stats": {
-                                "additions": commit.stats.additions if commit.stats else 0,
-                                "deletions": commit.stats.deletions if commit.stats else 0,
-                                "total": commit.stats.total if commit.stats else 0
-                            }
+                            "url": commit.html_url
+                        }
+                        
+                        if summary_cached or i >= stats_commits:
+                            commits_data.append(commit_data)
+                            continue
+                        
+                        commit_data["stats"] = {
+                            "additions": commit.stats.additions if commit.stats else 0,
+                            "deletions": commit.stats.deletions if commit.stats else 0,
+                            "total": commit.stats.total if commit.stats else 0
                         }
                         
-                        # Only get detailed file changes for the first 3 commits to reduce API calls
-                        if i < 3:
+                        # Only get detailed file changes for the first few commits to reduce API calls
+                        if i < detail_commits:
                             try:
                                 full_commit = repo.get_commit(commit.sha)
                                 file_changes = []
-                                for file in full_commit.files[:10]:  # Limit to 10 files per commit
+                                for file in full_commit.files[:files_per_commit]:
                                     file_change = {
                                         "filename": file.filename,
                                         "status": file.status,
@@ -966,10 +1743,10 @@ def chat_with_multiple_repositories():
                                         "deletions": file.deletions,
                                         "changes": file.changes
                                     }
-                                    # Only include patch data for the first 2 commits to reduce payload size
-                                    if i < 2 and hasattr(file, 'patch') and file.patch:
-                                        # Truncate patch to first 500 characters to reduce size
-                                        patch_content = file.patch[:500] + "..." if len(file.patch) > 500 else file.patch
+                                    # Only include patch data for the first few commits to reduce payload size
+                                    if i < patch_commits and hasattr(file, 'patch') and file.patch:
+                                        # Truncate patch to reduce size
+                                        patch_content = file.patch[:patch_chars] + "..." if len(file.patch) > patch_chars else file.patch
                                         file_change["patch"] = patch_content
                                     file_changes.append(file_change)
                                 commit_data["file_changes"] = file_changes
@@ -987,26 +1764,19 @@ def chat_with_multiple_repositories():
                     all_commits_data.append([])
                     
             except Exception as e:
-                return jsonify({"error": f"Repository not found or not accessible: {repo_name} - {str(e)}"}), 404
+                return {"error": f"Repository not found or not accessible: {repo_name} - {str(e)}"}, 404
         
-        # Process Jira projects if requested
+        # Process Jira projects if requested (fetched concurrently, reused across requests for a short time)
         if include_jira_analysis and jira_integration and jira_projects:
+            _report_job_progress("Fetching Jira project histories", 60)
+            project_histories = _get_jira_project_histories(jira_projects, 30)
             for project_key in jira_projects:
-                try:
-                    # Get Jira project history
-                    project_history = jira_integration.get_project_history(project_key, days_back=30)
-                    if project_history:
-                        jira_data.append({
-                            'project_key': project_key,
-                            'history': project_history
-                        })
-                        
-                        # Add Jira project type to analysis
-                        project_types.append(f'Jira Project ({project_key})')
-                        
-                except Exception as e:
-                    print(f"Error processing Jira project {project_key}: {str(e)}")
-                    continue
+                project_history = project_histories.get(project_key)
+                if project_history:
+                    jira_data.append({
+                        'project_key': project_key,
+                        'history': project_history
+                    })
         
         # Analyze project connections
         project_types = []
@@ -1063,12 +1833,15 @@ def chat_with_multiple_repositories():
         
         # Use AI service to analyze multiple repositories
         try:
-            ai_response = ai_service.analyze_multiple_repositories(repositories_data, all_commits_data, question, jira_data=jira_data)
+            _report_job_progress("Generating AI answer", 70)
+            ai_response = ai_service.analyze_multiple_repositories(repositories_data, all_commits_data, question, jira_data=jira_data, mode=analysis_mode, model=data.get('model'), summary_window=summary_window)
+            call_info = ai_service.get_last_call_info()
             
             response_data = {
                 "question": question,
                 "repositories": repositories,
                 "branch": branch if branch else "default",
+                "analysis_mode": analysis_mode,
                 "analysis_data": {
                     "repositories_info": repositories_data,
                     "total_commits_analyzed": sum(len(commits) for commits in all_commits_data),
@@ -1076,7 +1849,9 @@ def chat_with_multiple_repositories():
                     "project_connections": project_connections
                 },
                 "ai_response": ai_response,
-                "model_used": ai_service.model
+                "model_used": call_info.get('model', ai_service.model),
+                "model_route": call_info.get('route'),
+                "usage": call_info.get('usage')
             }
             
             # Include Jira data in response if available
@@ -1088,13 +1863,13 @@ def chat_with_multiple_repositories():
                     "recent_activity": sum(data['history'].get('ticket_statistics', {}).get('recent_activity', 0) for data in jira_data)
                 }
             
-            return jsonify(response_data)
+            return response_data, 200
             
         except Exception as e:
-            return jsonify({"error": f"Error generating AI response: {str(e)}"}), 500
+            return {"error": f"Error generating AI response: {str(e)}"}, 500
             
     except Exception as e:
-        return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
+        return {"error": f"Unexpected error: {str(e)}"}, 500
 
 # Commit story endpoint - Generate a narrative story from commit history
 @app.route('/api/git/commits/story', methods=['POST'])
@@ -1108,8 +1883,18 @@ def generate_commit_story():
         "branch": "main",
         "token": "optional_github_token",
         "commits_limit": 20,
-        "story_style": "narrative" | "technical" | "casual"
+        "story_style": "narrative" | "technical" | "casual",
+        "model": "optional 'fast' | 'strong' | supported model name (overrides model routing)",
+        "incremental": true
     }
+    
+    Stories are stored per repository, branch and style with the head commit they
+    cover. With "incremental" (default), only commits added since the stored story
+    are fetched and merged into it; the story is regenerated from scratch when
+    there is no stored story or its head commit is not within commits_limit.
+    
+    With "async": true the story is generated by a background job (202 with a job_id,
+    see /api/chat/multi-project).
     """
     try:
         # Check if AI service is available
@@ -1121,21 +1906,55 @@ def generate_commit_story():
         if not data:
             return jsonify({"error": "Request body must be JSON"}), 400
         
+        if not data.get('repository'):
+            return jsonify({"error": "Repository parameter is required"}), 400
+        
+        model_error = _check_model_override(data)
+        if model_error:
+            return jsonify({"error": model_error}), 400
+        
+        if data.get('async'):
+            return _submit_analysis_job('commit_story', data)
+        
+        response_data, status = _run_commit_story(data)
+        return jsonify(response_data), status
+        
+    except Exception as e:
+        return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
+
+def _run_commit_story(data):
+    """
+    Generate (or incrementally update) the commit story of a validated request.
+    
+    Runs in the request, or in a job queue worker for "async" submissions.
+    
+    Args:
+        data: Request body of /api/git/commits/story
+        
+    Returns:
+        (response body, HTTP status)
+    """
+    try:
         repository = data.get('repository')
         branch = data.get('branch')
         token = data.get('token')
         commits_limit = data.get('commits_limit', 20)
         story_style = data.get('story_style', 'narrative')
-        
-        # Validate required parameters
-        if not repository:
-            return jsonify({"error": "Repository parameter is required"}), 400
+        incremental = data.get('incremental', True)
         
         if commits_limit > 50:
             commits_limit = 50  # Limit for performance
         if commits_limit < 5:
             commits_limit = 5
         
+        # Previously generated story for this repository/branch/style
+        stored_story = None
+        if incremental and story_store:
+            try:
+                stored_story = story_store.get(repository, branch or 'default', story_style)
+            except Exception as e:
+                print(f"Warning: Could not read stored story for {repository}: {str(e)}")
+        
         # Initialize GitHub client
         if token:
             g = Github(token)
@@ -1146,20 +1965,27 @@ def generate_commit_story():
         try:
             repo = g.get_repo(repository)
         except Exception as e:
-            return jsonify({"error": f"Repository not found or not accessible: {str(e)}"}), 404
+            return {"error": f"Repository not found or not accessible: {str(e)}"}, 404
         
         # Get commits data
         try:
+            _report_job_progress("Fetching commits", 10)
             if branch:
                 commits = repo.get_commits(sha=branch)
             else:
                 commits = repo.get_commits()  # Default branch
             
             commits_data = []
+            reached_stored_head = False
             for i, commit in enumerate(commits):
                 if i >= commits_limit:
                     break
                 
+                # Stop at the commit the stored story already covers
+                if stored_story and commit.sha == stored_story['head_sha']:
+                    reached_stored_head = True
+                    break
+                
                 commit_data = {
                     "sha": commit.sha,
                     "message": commit.commit.message,
@@ -1217,28 +2043,77 @@ def generate_commit_story():
             
             # Generate story using AI service
             try:
-                story = ai_service.generate_commit_story(repo_data, commits_data, story_style)
+                _report_job_progress("Generating story", 50)
+                is_incremental = bool(stored_story and reached_stored_head)
+                
+                if is_incremental and not commits_data:
+                    # Nothing new since the stored story
+                    story = stored_story['story']
+                    model_used = None
+                elif is_incremental:
+                    story = ai_service.update_commit_story(repo_data, stored_story['story'], commits_data, story_style, model=data.get('model'))
+                    model_used = ai_service.get_last_call_info().get('model', ai_service.model)
+                else:
+                    story = ai_service.generate_commit_story(repo_data, commits_data, story_style, model=data.get('model'))
+                    model_used = ai_service.get_last_call_info().get('model', ai_service.model)
+                
+                new_commits_count = len(commits_data)
+                if is_incremental:
+                    total_commits = stored_story['total_commits'] + new_commits_count
+                    commits_data = (commits_data + stored_story['commits'])[:commits_limit]
+                else:
+                    total_commits = new_commits_count
+                
+                # Persist the story with the head commit it covers
+                if story_store and commits_data and new_commits_count and not story.startswith("Error generating commit story"):
+                    try:
+                        story_store.save(repository, branch or 'default', story_style, commits_data[0]['sha'], story, commits_data, total_commits)
+                    except Exception as e:
+                        print(f"Warning: Could not store story for {repository}: {str(e)}")
                 
                 response_data = {
                     "repository": repository,
                     "branch": branch if branch else "default",
                     "story_style": story_style,
-                    "total_commits_analyzed": len(commits_data),
+                    "total_commits_analyzed": total_commits,
                     "story": story,
                     "commits_data": commits_data,  # Include original data for reference
-                    "repository_info": repo_data
+                    "repository_info": repo_data,
+                    "model_used": model_used,
+                    "incremental": is_incremental,
+                    "new_commits_analyzed": new_commits_count
                 }
                 
-                return jsonify(response_data)
+                return response_data, 200
                 
             except Exception as e:
-                return jsonify({"error": f"Error generating commit story: {str(e)}"}), 500
+                return {"error": f"Error generating commit story: {str(e)}"}, 500
                 
         except Exception as e:
-            return jsonify({"error": f"Error fetching commits: {str(e)}"}), 500
+            return {"error": f"Error fetching commits: {str(e)}"}, 500
             
     except Exception as e:
-        return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
+        return {"error": f"Unexpected error: {str(e)}"}, 500
+
+# AI model routing statistics endpoint
+@app.route('/api/ai/routes', methods=['GET'])
+def get_ai_routes():
+    """
+    Get model routing configuration with latency and cost per route
+    """
+    try:
+        if not ai_service:
+            return jsonify({"error": "AI service not available. Please check OPENAI_API_KEY environment variable."}), 503
+        
+        return jsonify({
+            "default_model": ai_service.model,
+            "routing": ai_service.router.get_stats(),
+            "scheduler": ai_service.scheduler.get_stats(),
+            "chat_sessions": chat_sessions.get_stats()
+        })
+        
+    except Exception as e:
+        return jsonify({"error": f"Error getting AI routes: {str(e)}"}), 500
 
 # Repository branches endpoint
 @app.route('/api/git/branches', methods=['GET'])
@@ -1407,6 +2282,8 @@ def jira_status():
             })
         
         status = jira_integration.get_status()
+        if jira_mirror:
+            status['mirror'] = jira_mirror.get_stats()
         return jsonify(status)
     except Exception as e:
         return jsonify({"error": f"Error getting Jira status: {str(e)}"}), 500
@@ -1420,7 +2297,7 @@ def test_jira_connection():
         if not jira_integration:
             return jsonify({"error": "Jira integration not configured"}), 400
         
-        is_connected = jira_integration.test_connection()
+        is_connected = jira_integration.check_health()
         return jsonify({
             "connected": is_connected,
             "message": "Connection successful" if is_connected else "Connection failed"
@@ -1567,6 +2444,144 @@ def sync_commit_to_jira():
     except Exception as e:
         return jsonify({"error": f"Error syncing commit: {str(e)}"}), 500
 
+@app.route('/api/integrations/jira/sync-commits', methods=['POST'])
+def sync_commits_to_jira():
+    """
+    Sync a range of GitHub commits to the Jira tickets referenced in their messages
+    
+    Request body:
+    - repository: Repository in format 'owner/repo' (required)
+    - head: Branch, tag or SHA ending the range (default branch if omitted)
+    - base: Branch, tag or SHA the range starts after (optional; without it the last `limit` commits of head)
+    - limit: Commits scanned without a base (default 100, max 250)
+    - token: GitHub token (optional)
+    
+    Commits are grouped per ticket (one worklog and at most one transition per
+    ticket), tickets are synced concurrently, and commits already synced to a
+    ticket, or being synced by an overlapping request, are skipped. GitHub
+    compares return at most 250 commits; larger ranges are synced up to that
+    point and reported as truncated.
+    """
+    try:
+        if not jira_integration:
+            return jsonify({"error": "Jira integration not configured"}), 400
+        
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Request body must be JSON"}), 400
+        
+        repo_name = data.get('repository')
+        base = data.get('base')
+        head = data.get('head')
+        try:
+            limit = max(1, min(int(data.get('limit', 100)), 250))
+        except (TypeError, ValueError):
+            return jsonify({"error": "Invalid limit parameter. Must be a number."}), 400
+        
+        if not repo_name:
+            return jsonify({"error": "repository is required"}), 400
+        
+        g = Github(data['token']) if data.get('token') else Github()
+        try:
+            repo = g.get_repo(repo_name)
+        except Exception as e:
+            return jsonify({"error": f"Repository not found or not accessible: {str(e)}"}), 404
+        
+        # Commits of the range, oldest first
+        total_commits = None
+        try:
+            if base:
+                comparison = repo.compare(base, head or repo.default_branch)
+                commits = list(comparison.commits)
+                total_commits = comparison.total_commits
+            else:
+                paginated = repo.get_commits(sha=head) if head else repo.get_commits()
+                commits = list(paginated[:limit])
+                commits.reverse()
+        except Exception as e:
+            return jsonify({"error": f"Error fetching commits: {str(e)}"}), 500
+        
+        # Claim the (commit, ticket) pairs in one transaction, so overlapping syncs never log the same
+        # work twice; pairs already synced or claimed by another request are skipped
+        commits_by_sha = {commit.sha: commit for commit in commits}
+        pairs = [(commit.sha, ticket_key) for commit in commits
+                 for ticket_key in jira_integration.extract_ticket_keys(commit.commit.message)]
+        claimed = commit_sync_ledger.claim(repo_name, pairs) if commit_sync_ledger else set(pairs)
+        ticket_commits = {}
+        for sha, ticket_key in pairs:
+            if (sha, ticket_key) in claimed:
+                ticket_commits.setdefault(ticket_key, []).append(commits_by_sha[sha])
+        skipped = len(pairs) - len(claimed)
+        
+        try:
+            # One search for the tickets' issue types and statuses lets transitions use cached IDs;
+            # if it fails (e.g. a key that does not exist), each transition looks its ticket up instead
+            ticket_states = {}
+            if ticket_commits:
+                for ticket in jira_integration.iter_tickets(f"key in ({', '.join(ticket_commits)})",
+                                                            fields=['issuetype', 'status'], max_results=len(ticket_commits)):
+                    ticket_states[ticket['key']] = ticket
+            
+            max_workers = int(os.getenv('JIRA_SYNC_CONCURRENCY', 4))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                # Commit stats cost one GitHub call each, so only fetch them for commits being synced
+                needed = {commit.sha: commit for group in ticket_commits.values() for commit in group}
+                commit_data = dict(zip(needed, executor.map(_build_sync_commit_data, needed.values())))
+                
+                def sync_ticket(item):
+                    ticket_key, group = item
+                    result = jira_integration.sync_commits_to_ticket(ticket_key, [commit_data[commit.sha] for commit in group],
+                                                                     ticket_states.get(ticket_key))
+                    if commit_sync_ledger:
+                        if result.get('success'):
+                            commit_sync_ledger.record(repo_name, ticket_key, [commit.sha for commit in group])
+                        else:
+                            commit_sync_ledger.release(repo_name, ticket_key, [commit.sha for commit in group])
+                    return ticket_key, {**result, 'commits': [commit.sha[:8] for commit in group]}
+                
+                results = dict(executor.map(sync_ticket, ticket_commits.items()))
+        except Exception:
+            # Recorded pairs are no longer claims, so this only frees the pairs left unsynced
+            if commit_sync_ledger:
+                for ticket_key, group in ticket_commits.items():
+                    commit_sync_ledger.release(repo_name, ticket_key, [commit.sha for commit in group])
+            raise
+        
+        response_data = {
+            "repository": repo_name,
+            "range": {"base": base, "head": head or "default"},
+            "commits_scanned": len(commits),
+            "tickets": results,
+            "tickets_synced": sum(1 for result in results.values() if result.get('success')),
+            "tickets_failed": sum(1 for result in results.values() if not result.get('success')),
+            "skipped_already_synced": skipped
+        }
+        if total_commits and total_commits > len(commits):
+            response_data["truncated"] = True
+            response_data["total_commits"] = total_commits
+            response_data["warning"] = (f"The range has {total_commits} commits but GitHub compares return at most "
+                                        f"{len(commits)}; sync the rest with a narrower base/head range")
+        return jsonify(response_data)
+    except Exception as e:
+        return jsonify({"error": f"Error syncing commits: {str(e)}"}), 500
+
+def _build_sync_commit_data(commit):
+    """Build the commit information used for Jira worklogs from a PyGithub commit"""
+    return {
+        "sha": commit.sha,
+        "message": commit.commit.message,
+        "author": {
+            "name": commit.commit.author.name,
+            "date": commit.commit.author.date.isoformat()
+        },
+        "url": commit.html_url,
+        "stats": {
+            "additions": commit.stats.additions if commit.stats else 0,
+            "deletions": commit.stats.deletions if commit.stats else 0,
+            "total": commit.stats.total if commit.stats else 0
+        }
+    }
+
 @app.route('/api/integrations/jira/quality-ticket', methods=['POST'])
 def create_quality_ticket():
     """
@@ -1609,14 +2624,26 @@ def search_jira_tickets():
         
         jql = data.get('jql')
         max_results = data.get('max_results', 50)
+        fields = data.get('fields')  # Optional field projection
         
         if not jql:
             return jsonify({"error": "jql is required"}), 400
         
-        tickets = jira_integration.search_tickets(jql, max_results)
+        tickets = None
+        source = 'jira'
+        if jira_mirror and not fields:
+            try:
+                tickets = jira_mirror.search_tickets(jql, max_results)
+            except Exception as e:
+                print(f"⚠️  Jira mirror search failed, using Jira: {str(e)}")
+            if tickets is not None:
+                source = 'mirror'
+        if tickets is None:
+            tickets = jira_integration.search_tickets(jql, max_results, fields=fields)
         return jsonify({
             "tickets": tickets,
-            "count": len(tickets)
+            "count": len(tickets),
+            "source": source
         })
     except Exception as e:
         return jsonify({"error": f"Error searching tickets: {str(e)}"}), 500
@@ -1634,8 +2661,8 @@ def get_jira_project_history():
         project_key = request.args.get('project_key', 'COMM')
         days_back = int(request.args.get('days_back', 30))
         
-        # Get project history from Jira
-        project_history = jira_integration.get_project_history(project_key, days_back)
+        # Get project history from the mirror or Jira
+        project_history, source = _get_jira_project_history(project_key, days_back)
         
         if not project_history:
             return jsonify({"error": "Failed to retrieve project history"}), 500
@@ -1646,7 +2673,9 @@ def get_jira_project_history():
             "analysis_period": project_history.get('analysis_period'),
             "ticket_statistics": project_history.get('ticket_statistics'),
             "breakdown": project_history.get('breakdown'),
-            "recent_tickets": project_history.get('recent_tickets', [])[:10]  # Limit recent tickets
+            "recent_tickets": project_history.get('recent_tickets', [])[:10],  # Limit recent tickets
+            "flow_metrics": project_history.get('flow_metrics'),
+            "source": source
         })
         
     except Exception as e:
@@ -1694,14 +2723,19 @@ def analyze_jira_project():
         project_key = data.get('project_key', 'COMM')
         days_back = data.get('days_back', 30)
         
-        # Get project history from Jira
-        project_history = jira_integration.get_project_history(project_key, days_back)
+        model_error = _check_model_override(data)
+        if model_error:
+            return jsonify({"error": model_error}), 400
+        
+        # Get project history from the mirror or Jira
+        project_history, source = _get_jira_project_history(project_key, days_back)
         
         if not project_history:
             return jsonify({"error": "Failed to retrieve project history"}), 500
         
         # Generate AI analysis
-        ai_analysis = ai_service.analyze_jira_project_history(project_history)
+        ai_analysis = ai_service.analyze_jira_project_history(project_history, model=data.get('model'))
+        call_info = ai_service.get_last_call_info()
         
         return jsonify({
             "message": "Project analysis completed successfully",
@@ -1709,8 +2743,10 @@ def analyze_jira_project():
             "analysis_period": project_history.get('analysis_period'),
             "ticket_statistics": project_history.get('ticket_statistics'),
             "breakdown": project_history.get('breakdown'),
+            "flow_metrics": project_history.get('flow_metrics'),
             "ai_analysis": ai_analysis,
-            "model_used": ai_service.model
+            "model_used": call_info.get('model', ai_service.model),
+            "source": source
         })
         
     except Exception as e:
@@ -1876,31 +2912,30 @@ function efficientLoop() {
             }
         ]
         
-        created_tickets = []
+        # Create all demo tickets in one bulk request
+        results = jira_integration.create_tickets_bulk([
+            {
+                "project_key": "COMM",
+                "summary": issue["title"],
+                "description": issue["description"],
+                "issue_type": "Bug",
+                "priority": issue["priority"],
+                "labels": issue["labels"]
+            }
+            for issue in demo_issues
+        ])
         
-        for issue in demo_issues:
-            try:
-                ticket_data = {
-                    "fields": {
-                        "project": {"key": "COMM"},
-                        "summary": issue["title"],
-                        "description": issue["description"],
-                        "issuetype": {"name": "Bug"},
-                        "priority": {"name": issue["priority"]},
-                        "labels": issue["labels"]
-                    }
-                }
-                
-                ticket = jira_integration.create_ticket(ticket_data)
+        created_tickets = []
+        for issue, result in zip(demo_issues, results):
+            if result['success']:
                 created_tickets.append({
-                    "key": ticket.key,
+                    "key": result['key'],
                     "title": issue["title"],
                     "priority": issue["priority"],
-                    "url": f"https://faikbairamov0.atlassian.net/browse/{ticket.key}"
+                    "url": f"{jira_integration.base_url.rstrip('/')}/browse/{result['key']}"
                 })
-                
-            except Exception as e:
-                print(f"Error creating ticket '{issue['title']}': {str(e)}")
+            else:
+                print(f"Error creating ticket '{issue['title']}': {result.get('error')}")
         
         return jsonify({
             "message": f"Demo tickets created successfully",
@@ -1920,10 +2955,21 @@ def jira_webhook():
         if not jira_webhook_handler:
             return jsonify({"error": "Jira webhook handler not configured"}), 400
         
+        if not jira_webhook_handler.verify_request(request.get_data(), request.headers.get('X-Hub-Signature'),
+                                                   request.args.get('secret')):
+            return jsonify({"error": "Invalid webhook signature"}), 401
+        
         payload = request.get_json()
         if not payload:
             return jsonify({"error": "Request body must be JSON"}), 400
         
+        if webhook_queue:
+            is_new = webhook_queue.enqueue(payload, request.headers.get('X-Atlassian-Webhook-Identifier'))
+            return jsonify({
+                "status": "accepted" if is_new else "duplicate",
+                "event": payload.get('webhookEvent')
+            }), 202
+        
         result = jira_webhook_handler.handle_webhook(payload)
         return jsonify(result)
         
@@ -1939,6 +2985,49 @@ def not_found(error):
 def internal_error(error):
     return jsonify({"error": "Internal server error"}), 500
 
+# Register background job handlers once all of them are defined
+if job_queue:
+    job_queue.register('jira_tickets', _run_jira_tickets_job)
+    # Failed analyses are retried once; each attempt costs AI and GitHub calls
+    job_queue.register('multi_project_chat', _run_multi_project_chat_job, max_attempts=2)
+    job_queue.register('commit_story', _run_commit_story_job, max_attempts=2)
+
+def start_background_services():
+    """
+    Start job processing, Jira mirror sync, health probing and webhook batching
+    
+    Threads do not survive fork, so this runs in every serving process: from
+    gunicorn's post_fork hook, and lazily before requests. Each service starts at
+    most once per process, making repeated calls cheap.
+    """
+    if job_queue:
+        job_queue.start()
+    
+    if jira_mirror:
+        jira_mirror.start()
+    
+    if jira_integration:
+        jira_integration.start_health_probe()
+    
+    if webhook_queue:
+        webhook_queue.start()
+
+@app.before_request
+def _ensure_background_services():
+    start_background_services()
+
+def create_app():
+    """
+    Get the application for a WSGI server (see wsgi.py and gunicorn.conf.py)
+    
+    Clients and background threads are created lazily per process, so the app can
+    be preloaded in the gunicorn master and forked into workers.
+    
+    Returns:
+        Flask application
+    """
+    return app
+
 if __name__ == '__main__':
     # Get port from environment variable (Railway sets this)
     port = int(os.getenv('PORT', 3000))
@@ -1955,6 +3044,9 @@ if __name__ == '__main__':
     print("  GET  /api/git/commit-details - Get git commits with code differences")
     print("  GET  /api/git/repo - Get GitHub repository information")
     print("  POST /api/chat - AI-powered repository analysis and Q&A")
+    print("  DELETE /api/chat/sessions/<id> - End a chat session")
+    print("  GET  /api/jobs/<id> - Background job status (e.g. auto-created Jira tickets)")
+    print("  GET  /api/ai/routes - Model routing latency and cost per route")
     print("  GET  /auth/github - Initiate GitHub OAuth login")
     print("  GET  /auth/callback - GitHub OAuth callback")
     print("  GET  /auth/user - Get current user info")
@@ -1969,8 +3061,11 @@ if __name__ == '__main__':
     print("    POST /api/integrations/jira/ticket/<key>/worklog - Add worklog")
     print("    POST /api/integrations/jira/ticket/<key>/transition - Transition ticket")
     print("    POST /api/integrations/jira/sync-commit - Sync commit to ticket")
+    print("    POST /api/integrations/jira/sync-commits - Sync a commit range to referenced tickets")
     print("    POST /api/integrations/jira/quality-ticket - Create quality ticket")
     print("    POST /api/integrations/jira/search - Search tickets with JQL")
     print("    POST /webhooks/jira - Handle Jira webhooks")
+    print("For production, run: gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi:app")
     
+    start_background_services()
     app.run(host='0.0.0.0', port=port, debug=debug)
@@ -0,0 +1,49 @@
+"""
+Local Storage Helpers
+SQLite databases for server-side state live under COMMET_DATA_DIR
+"""
+
+import os
+import sqlite3
+from contextlib import contextmanager
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+def get_data_path(filename: str) -> str:
+    """
+    Get the path of a data file, creating the data directory if needed
+
+    Args:
+        filename: File name inside the data directory
+
+    Returns:
+        Absolute path of the file
+    """
+    data_dir = os.getenv('COMMET_DATA_DIR', DEFAULT_DATA_DIR)
+    os.makedirs(data_dir, exist_ok=True)
+    return os.path.join(data_dir, filename)
+
+
+@contextmanager
+def connect(db_path: str):
+    """
+    Open a short-lived SQLite connection for one unit of work
+
+    The transaction is committed when the block exits normally, rolled back on
+    error, and the connection is always closed.
+
+    Args:
+        db_path: Path of the database file
+
+    Yields:
+        SQLite connection returning rows as sqlite3.Row
+    """
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute('PRAGMA journal_mode=WAL')
+        with conn:
+            yield conn
+    finally:
+        conn.close()
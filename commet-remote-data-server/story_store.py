@@ -0,0 +1,89 @@
+"""
+Commit Story Store
+Persists generated commit stories per repository, branch and style together
+with the head commit they cover, so later requests only summarize new commits
+"""
+
+import json
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+import metrics
+from storage import get_data_path, connect
+
+# Commits kept per story for the commits_data field of the response
+MAX_STORED_COMMITS = 50
+
+
+class StoryStore:
+    """SQLite-backed store of generated commit stories"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Initialize the story store
+
+        Args:
+            db_path: SQLite database path (defaults to stories.db in COMMET_DATA_DIR)
+        """
+        self.db_path = db_path or get_data_path('stories.db')
+
+        with connect(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS commit_stories (
+                    repository TEXT NOT NULL,
+                    branch TEXT NOT NULL,
+                    story_style TEXT NOT NULL,
+                    head_sha TEXT NOT NULL,
+                    story TEXT NOT NULL,
+                    commits TEXT NOT NULL,
+                    total_commits INTEGER NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (repository, branch, story_style)
+                )
+            ''')
+
+    def get(self, repository: str, branch: str, story_style: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the stored story for a repository, branch and style
+
+        Returns:
+            Dictionary with head_sha, story, commits, total_commits and updated_at, or None
+        """
+        with connect(self.db_path) as conn:
+            row = conn.execute(
+                'SELECT * FROM commit_stories WHERE repository = ? AND branch = ? AND story_style = ?',
+                (repository, branch, story_style)
+            ).fetchone()
+
+        metrics.record_cache('commit_story', row is not None)
+        if not row:
+            return None
+
+        return {
+            'head_sha': row['head_sha'],
+            'story': row['story'],
+            'commits': json.loads(row['commits']),
+            'total_commits': row['total_commits'],
+            'updated_at': row['updated_at']
+        }
+
+    def save(self, repository: str, branch: str, story_style: str, head_sha: str, story: str,
+             commits: List[Dict], total_commits: int):
+        """
+        Save (or replace) the story for a repository, branch and style
+
+        Args:
+            repository: Repository in format 'owner/repo'
+            branch: Branch name ('default' for the default branch)
+            story_style: Style of story
+            head_sha: SHA of the most recent commit the story covers
+            story: Generated story
+            commits: Commits covered by the story, most recent first
+            total_commits: Number of commits the story covers
+        """
+        with connect(self.db_path) as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO commit_stories VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (repository, branch, story_style, head_sha, story,
+                 json.dumps(commits[:MAX_STORED_COMMITS]), total_commits, datetime.now().isoformat())
+            )
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the async (ASGI) request path against the threaded WSGI one
+GitHub, Jira and OpenAI are replaced by a local stub with fixed latency, so it
+runs without credentials. Checks that both paths return identical JSON and that
+the ASGI path keeps scaling once concurrency exceeds the WSGI thread count
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import socket
+import asyncio
+import tempfile
+import subprocess
+from contextlib import contextmanager
+
+import aiohttp
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+STUB_LATENCY = 0.2  # Seconds per stubbed upstream call
+WSGI_THREADS = 32
+CONCURRENCY_LEVELS = (32, 128, 256)
+
+
+def _commit(i):
+    person = {'name': 'Bench', 'email': 'bench@example.com', 'date': '2024-02-01T00:00:00Z'}
+    return {
+        'sha': f"sha{i}", 'url': f"https://api.github.com/repos/bench/repo/commits/sha{i}",
+        'html_url': f"https://github.com/bench/repo/commit/sha{i}",
+        'commit': {'message': f"Change {i}", 'author': person, 'committer': person}
+    }
+
+
+def _stub_response(method, path, body):
+    """Minimal GitHub, Jira and OpenAI APIs: (status, JSON body, delayed)"""
+    if path == '/rest/api/3/myself':
+        return 200, {'accountId': 'benchmark'}, False
+    if method == 'POST' and path.endswith('/chat/completions'):
+        return 200, {
+            'id': 'chatcmpl-benchmark', 'object': 'chat.completion', 'created': int(time.time()),
+            'model': body.get('model'),
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': 'The repository is written in Python.'}}],
+            'usage': {'prompt_tokens': 100, 'completion_tokens': 10, 'total_tokens': 110}
+        }, True
+    if method == 'POST' and path == '/rest/api/3/search/jql':
+        return 200, {
+            'issues': [
+                {'key': f"BENCH-{i}", 'fields': {'summary': f"Ticket {i}", 'status': {'name': 'To Do'}}}
+                for i in range(10)
+            ],
+            'isLast': True
+        }, True
+    if path == '/repos/bench/repo':
+        return 200, {
+            'name': 'repo', 'full_name': 'bench/repo', 'description': 'Benchmark repository',
+            'html_url': 'https://github.com/bench/repo', 'clone_url': 'https://github.com/bench/repo.git',
+            'ssh_url': 'git@github.com:bench/repo.git', 'language': 'Python', 'stargazers_count': 1,
+            'forks_count': 0, 'watchers_count': 1, 'open_issues_count': 0,
+            'created_at': '2024-01-01T00:00:00Z', 'updated_at': '2024-02-01T00:00:00Z',
+            'pushed_at': '2024-02-01T00:00:00Z', 'default_branch': 'main', 'private': False,
+            'owner': {'login': 'bench', 'type': 'User', 'avatar_url': '', 'html_url': 'https://github.com/bench'}
+        }, True
+    if path == '/repos/bench/repo/languages':
+        return 200, {'Python': 1000}, True
+    if path == '/repos/bench/repo/commits':
+        return 200, [_commit(i) for i in range(5)], True
+    match = re.fullmatch(r'/repos/bench/repo/commits/sha(\d+)', path)
+    if match:
+        return 200, {
+            **_commit(int(match.group(1))),
+            'stats': {'additions': 3, 'deletions': 1, 'total': 4},
+            'files': [{'filename': 'app.py', 'status': 'modified', 'additions': 3, 'deletions': 1,
+                       'changes': 4, 'patch': '@@ -1 +1 @@'}]
+        }, True
+    return 404, {'message': 'Not Found'}, False
+
+
+async def stub_app(scope, receive, send):
+    """Stub upstream served by its own uvicorn process (a threaded stub would contend for the GIL)"""
+    if scope['type'] != 'http':
+        return
+    raw = b''
+    while True:
+        message = await receive()
+        raw += message.get('body', b'')
+        if not message.get('more_body'):
+            break
+
+    status, body, delayed = _stub_response(scope['method'], scope['path'], json.loads(raw or b'{}'))
+    if delayed:
+        await asyncio.sleep(STUB_LATENCY)
+
+    data = json.dumps(body).encode('utf-8')
+    headers = [(b'content-type', b'application/json'), (b'content-length', str(len(data)).encode())]
+    if scope['path'].startswith('/repos/'):
+        headers.append((b'x-ratelimit-remaining', b'4999'))
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': data})
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_healthy(base_url, process, path='/health', timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            if httpx.get(f"{base_url}{path}", timeout=1).status_code == 200:
+                return True
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    return False
+
+
+def _missing_tools():
+    """Names of the serving dependencies that are not installed"""
+    missing = [] if shutil.which('gunicorn') else ['gunicorn']
+    for module in ('uvicorn', 'starlette', 'a2wsgi', 'aiohttp'):
+        try:
+            __import__(module)
+        except ImportError:
+            missing.append(module)
+    return missing
+
+
+@contextmanager
+def _running_servers():
+    """Start the stub upstream, the WSGI server and the ASGI server; yields their base URLs"""
+    stub_port = _free_port()
+    upstream = f"http://127.0.0.1:{stub_port}"
+
+    data_dir = tempfile.mkdtemp(prefix='commet-asgi-')
+    env = {
+        **os.environ,
+        'FLASK_ENV': 'production',
+        'COMMET_DATA_DIR': data_dir,
+        'OPENAI_API_KEY': 'benchmark',
+        'OPENAI_BASE_URL': f"{upstream}/v1",
+        'OPENAI_MAX_CONCURRENCY': '1024',
+        'GITHUB_API_URL': upstream,
+        'JIRA_URL': upstream,
+        'JIRA_EMAIL': 'bench@example.com',
+        'JIRA_API_TOKEN': 'benchmark',
+        'JIRA_PROJECT_KEY': 'BENCH',
+        'JIRA_MIRROR_ENABLED': 'false',
+        'JIRA_AUTO_CREATE_TICKETS': 'false',
+        'JIRA_POOL_SIZE': str(WSGI_THREADS),
+        'INTEGRATION_ASYNC_MAX_CONNECTIONS': '1024',
+        'GUNICORN_THREADS': str(WSGI_THREADS),
+        'GUNICORN_LOG_LEVEL': 'warning'
+    }
+    wsgi_port, asgi_port = _free_port(), _free_port()
+    commands = {
+        'stub': ([sys.executable, '-m', 'uvicorn', 'test_asgi_benchmark:stub_app', '--host', '127.0.0.1',
+                  '--port', str(stub_port), '--log-level', 'warning'], stub_port),
+        'wsgi': (['gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'], wsgi_port),
+        'asgi': ([sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1', '--port', str(asgi_port),
+                  '--log-level', 'warning'], asgi_port)
+    }
+
+    processes = {}
+    try:
+        urls = {}
+        for label, (command, port) in commands.items():
+            processes[label] = subprocess.Popen(
+                command, cwd=SERVER_DIR, env={**env, 'PORT': str(port)},
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            urls[label] = f"http://127.0.0.1:{port}"
+        for label, url in urls.items():
+            health_path = '/rest/api/3/myself' if label == 'stub' else '/health'
+            assert _wait_until_healthy(url, processes[label], health_path), f"{label} server did not start"
+        del urls['stub']
+        yield urls
+    finally:
+        for process in processes.values():
+            process.terminate()
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def _metric(text, name, **labels):
+    """Value of a sample in a /metrics response (None if absent)"""
+    for family in text_string_to_metric_families(text):
+        for sample in family.samples:
+            if sample.name == name and sample.labels == labels:
+                return sample.value
+    return None
+
+
+async def _fire(base_url, concurrency):
+    """Send `concurrency` simultaneous Jira searches; returns (elapsed, errors)"""
+    # aiohttp rather than httpx: httpx's pool slows down sharply with hundreds of concurrent requests
+    async with aiohttp.ClientSession(base_url, connector=aiohttp.TCPConnector(limit=0)) as client:
+        async def search(i):
+            async with client.post('/api/integrations/jira/search', json={'jql': f"project = BENCH AND text ~ '{i}'"}) as response:
+                return response.status == 200 and (await response.json()).get('count') == 10
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(search(i) for i in range(concurrency)), return_exceptions=True)
+        elapsed = time.perf_counter() - start
+
+    return elapsed, sum(1 for result in results if result is not True)
+
+
+def test_json_contracts():
+    """Both paths answer the same requests with the same status and JSON"""
+    if _missing_tools():
+        print(f"⚠️  Skipping: {', '.join(_missing_tools())} not installed")
+        return
+
+    print("🧪 Comparing WSGI and ASGI responses")
+    requests_to_compare = [
+        ('POST', '/api/integrations/jira/search', {'jql': 'project = BENCH', 'max_results': 5}),
+        ('POST', '/api/integrations/jira/search', {'max_results': 5}),
+        ('GET', '/api/git/commits?repo=bench/repo', None),
+        ('GET', '/api/git/commits?repo=bench/repo&limit=ten&branch=main', None),
+        ('GET', '/api/git/commit-details?repo=bench/repo&limit=5', None),
+        ('GET', '/api/git/repo', None),
+        ('GET', '/api/git/branches', None),
+        ('POST', '/api/chat', {'repo': 'bench/repo', 'branch': 'main'}),
+        ('POST', '/api/chat', {'question': 'Which language?', 'session_id': 'missing'}),
+        ('POST', '/api/chat', {'question': 'Which language?'}),
+        ('GET', '/health', None)
+    ]
+
+    with _running_servers() as urls:
+        for method, path, body in requests_to_compare:
+            wsgi = httpx.request(method, urls['wsgi'] + path, json=body, timeout=30)
+            asgi = httpx.request(method, urls['asgi'] + path, json=body, timeout=30)
+            print(f"   {method} {path}: {wsgi.status_code} / {asgi.status_code}")
+            assert wsgi.status_code == asgi.status_code, path
+            if path != '/health':  # /health reports the current time
+                assert wsgi.content == asgi.content, path
+
+    print("✅ JSON contracts identical")
+
+
+def test_async_chat():
+    """A chat question and its follow-up are answered on the async path and show up in /metrics"""
+    if _missing_tools():
+        print(f"⚠️  Skipping: {', '.join(_missing_tools())} not installed")
+        return
+
+    print("🧪 Testing /api/chat on the ASGI path")
+    with _running_servers() as urls:
+        first = httpx.post(f"{urls['asgi']}/api/chat", timeout=30, json={
+            'question': 'Which language is used?', 'repo': 'bench/repo', 'branch': 'main', 'commits_limit': 5
+        })
+        assert first.status_code == 200, first.text
+        answer = first.json()
+        assert answer['ai_response'] == 'The repository is written in Python.'
+        assert answer['analysis_data']['commits_analyzed'] == 5
+        assert answer['analysis_data']['repository_info']['created_at'] == '2024-01-01T00:00:00'
+        assert answer['usage']['prompt_tokens'] == 100
+
+        follow_up = httpx.post(f"{urls['asgi']}/api/chat", timeout=30, json={
+            'question': 'And the main branch?', 'session_id': answer['session_id']
+        })
+        assert follow_up.status_code == 200, follow_up.text
+        assert follow_up.json()['turn'] == 2
+
+        commits = httpx.get(f"{urls['asgi']}/api/git/commit-details?repo=bench/repo&branch=main&limit=5", timeout=30)
+        assert commits.json()['commits'][0]['file_changes'][0]['patch'] == '@@ -1 +1 @@'
+
+        # Repository, languages, commit list and 5 commit details for the first turn; none for the follow-up
+        metrics = httpx.get(f"{urls['asgi']}/metrics", timeout=30).text
+        assert _metric(metrics, 'commet_upstream_calls_per_request_sum', route='/api/chat', upstream='github') == 8
+        assert _metric(metrics, 'commet_upstream_calls_per_request_sum', route='/api/chat', upstream='openai') == 2
+        assert _metric(metrics, 'commet_http_requests_total', method='POST', route='/api/chat', status='200') == 2
+        assert _metric(metrics, 'commet_openai_tokens_total', model='gpt-4o-mini', type='prompt') == 200
+        assert _metric(metrics, 'commet_cache_lookups_total', cache='chat_session', result='hit') == 1
+        assert _metric(metrics, 'commet_github_rate_limit_remaining', resource='core', auth='anonymous') == 4999
+
+    print("✅ Async chat test passed")
+
+
+def test_concurrency_scaling():
+    """The ASGI path keeps requests in flight beyond the WSGI thread count"""
+    if _missing_tools():
+        print(f"⚠️  Skipping: {', '.join(_missing_tools())} not installed")
+        return
+
+    print("🧪 Benchmarking concurrent Jira searches")
+    print(f"   stub latency {STUB_LATENCY * 1000:.0f} ms, WSGI: 1 worker x {WSGI_THREADS} threads, ASGI: 1 worker")
+
+    results = {}
+    with _running_servers() as urls:
+        for label, url in urls.items():
+            asyncio.run(_fire(url, 16))  # Warm up connection pools
+            for concurrency in CONCURRENCY_LEVELS:
+                elapsed, errors = asyncio.run(_fire(url, concurrency))
+                results[(label, concurrency)] = elapsed
+                print(f"   {label} concurrency={concurrency:>3}: {elapsed:.2f}s, {concurrency / elapsed:.0f} req/s, {errors} errors")
+                assert errors == 0
+
+    highest = CONCURRENCY_LEVELS[-1]
+    # Threaded WSGI serves the requests in waves of WSGI_THREADS; the event loop serves them all at once
+    assert results[('wsgi', highest)] >= STUB_LATENCY * highest / WSGI_THREADS * 0.8
+    assert results[('asgi', highest)] < results[('wsgi', highest)] * 0.5
+
+    print("✅ Concurrency benchmark passed")
+
+
+if __name__ == "__main__":
+    test_json_contracts()
+    test_async_chat()
+    test_concurrency_scaling()
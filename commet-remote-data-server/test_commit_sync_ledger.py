@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Tests for the commit sync ledger
+Each test uses its own temporary database
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from commit_sync_ledger import CommitSyncLedger
+from integrations.project_management.jira import JiraIntegration
+
+
+def _make_ledger():
+    """Create a ledger on a temporary database"""
+    return CommitSyncLedger(db_path=os.path.join(tempfile.mkdtemp(), 'commit_sync.db'))
+
+
+def test_overlapping_syncs_are_recorded_once():
+    """Re-recording a commit for the same ticket is a no-op; other tickets are tracked separately"""
+    print("🧪 Testing overlapping commit syncs")
+
+    ledger = _make_ledger()
+    ledger.record('owner/repo', 'PROJ-1', ['a1', 'b2'])
+    ledger.record('owner/repo', 'PROJ-1', ['b2', 'c3'])
+    ledger.record('owner/repo', 'PROJ-2', ['b2'])
+
+    synced = ledger.get_synced('owner/repo', ['a1', 'b2', 'c3', 'd4'])
+    assert synced == {('a1', 'PROJ-1'), ('b2', 'PROJ-1'), ('c3', 'PROJ-1'), ('b2', 'PROJ-2')}
+    assert ledger.get_synced('owner/repo', []) == set()
+    print("✅ Overlap test passed")
+
+
+def test_repositories_are_separate():
+    """A commit synced in one repository is not synced in another"""
+    print("🧪 Testing repository scope")
+
+    ledger = _make_ledger()
+    ledger.record('owner/repo', 'PROJ-1', ['a1'])
+    assert ledger.get_synced('owner/fork', ['a1']) == set()
+    print("✅ Scope test passed")
+
+
+def test_large_ranges_are_chunked():
+    """Lookups over more commits than SQLite's parameter limit still return every match"""
+    print("🧪 Testing large lookups")
+
+    ledger = _make_ledger()
+    shas = [f"{n:040x}" for n in range(1200)]
+    ledger.record('owner/repo', 'PROJ-1', shas[::2])
+
+    synced = ledger.get_synced('owner/repo', shas)
+    assert synced == {(sha, 'PROJ-1') for sha in shas[::2]}
+    print("✅ Large lookup test passed")
+
+
+def test_concurrent_claims_are_exclusive():
+    """Of several overlapping claims each pair goes to exactly one caller"""
+    print("🧪 Testing concurrent claims")
+
+    ledger = _make_ledger()
+    pairs = [(f"{n:040x}", 'PROJ-1') for n in range(50)]
+    results = []
+
+    def claim():
+        results.append(ledger.claim('owner/repo', pairs))
+
+    threads = [threading.Thread(target=claim) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(len(claimed) for claimed in results) == len(pairs)
+    assert set().union(*results) == set(pairs)
+
+    # Claims in progress are not reported as synced until recorded
+    assert ledger.get_synced('owner/repo', [sha for sha, _ in pairs]) == set()
+    ledger.record('owner/repo', 'PROJ-1', [sha for sha, _ in pairs])
+    assert ledger.get_synced('owner/repo', [sha for sha, _ in pairs]) == set(pairs)
+    assert ledger.claim('owner/repo', pairs) == set()
+    print("✅ Concurrent claim test passed")
+
+
+def test_released_claims_can_be_claimed_again():
+    """A claim released after a failed sync is available to the next sync"""
+    print("🧪 Testing released claims")
+
+    ledger = _make_ledger()
+    assert ledger.claim('owner/repo', [('a1', 'PROJ-1'), ('b2', 'PROJ-1')]) == {('a1', 'PROJ-1'), ('b2', 'PROJ-1')}
+    ledger.release('owner/repo', 'PROJ-1', ['a1', 'b2'])
+    assert ledger.claim('owner/repo', [('a1', 'PROJ-1')]) == {('a1', 'PROJ-1')}
+
+    # Releasing a recorded sync does not undo it
+    ledger.record('owner/repo', 'PROJ-1', ['a1'])
+    ledger.release('owner/repo', 'PROJ-1', ['a1'])
+    assert ledger.get_synced('owner/repo', ['a1']) == {('a1', 'PROJ-1')}
+    print("✅ Release test passed")
+
+
+class FakeSyncJira:
+    """Records worklog syncs; the first one waits until `proceed` is set"""
+
+    extract_ticket_keys = JiraIntegration.extract_ticket_keys
+
+    def __init__(self):
+        self.synced = []
+        self.fail = False
+        self.syncing = threading.Event()
+        self.proceed = threading.Event()
+
+    def start_health_probe(self):
+        pass
+
+    def iter_tickets(self, jql, fields=None, max_results=None):
+        return iter([])
+
+    def sync_commits_to_ticket(self, ticket_key, commits, ticket=None):
+        self.syncing.set()
+        self.proceed.wait(5)
+        self.synced.append((ticket_key, [commit['sha'] for commit in commits]))
+        return {'success': not self.fail}
+
+
+def _fake_commit(number, message):
+    """PyGithub-like commit of the fake repository"""
+    author = SimpleNamespace(name='Dev', date=datetime(2024, 1, 1))
+    return SimpleNamespace(sha=f"{number:040x}", commit=SimpleNamespace(message=message, author=author),
+                           html_url='', stats=SimpleNamespace(additions=1, deletions=0, total=1))
+
+
+def _load_server(jira):
+    """Import the server with a fresh ledger, the given Jira client and a fake GitHub repository"""
+    os.environ.setdefault('COMMET_DATA_DIR', tempfile.mkdtemp())
+    import server
+    commits = [_fake_commit(1, 'PROJ-1 add endpoint'), _fake_commit(2, 'PROJ-1 PROJ-2 fix tests')]
+    repo = SimpleNamespace(get_commits=lambda sha=None: commits, default_branch='main')
+    server.Github = lambda *args: SimpleNamespace(get_repo=lambda name: repo)
+    server.jira_integration = jira
+    server.commit_sync_ledger = _make_ledger()
+    return server
+
+
+def test_overlapping_sync_requests_log_work_once():
+    """A sync overlapping one in progress skips the commits being synced"""
+    print("🧪 Testing overlapping sync requests")
+
+    jira = FakeSyncJira()
+    server = _load_server(jira)
+    client = server.app.test_client()
+    responses = []
+
+    first = threading.Thread(target=lambda: responses.append(
+        client.post('/api/integrations/jira/sync-commits', json={'repository': 'owner/repo'})))
+    first.start()
+    assert jira.syncing.wait(5)
+
+    second = client.post('/api/integrations/jira/sync-commits', json={'repository': 'owner/repo'})
+    jira.proceed.set()
+    first.join()
+
+    assert second.status_code == 200 and responses[0].status_code == 200
+    assert second.get_json()['skipped_already_synced'] == 3 and second.get_json()['tickets'] == {}
+    assert sorted(ticket for ticket, _ in jira.synced) == ['PROJ-1', 'PROJ-2']
+    print("✅ Overlapping sync test passed")
+
+
+def test_failed_sync_is_retried_and_bad_limit_rejected():
+    """Commits whose sync failed are synced by the next request; a non-numeric limit is a 400"""
+    print("🧪 Testing failed syncs and limit validation")
+
+    jira = FakeSyncJira()
+    jira.proceed.set()
+    jira.fail = True
+    server = _load_server(jira)
+    client = server.app.test_client()
+
+    assert client.post('/api/integrations/jira/sync-commits', json={'repository': 'owner/repo'}).get_json()['tickets_failed'] == 2
+    jira.fail = False
+    response = client.post('/api/integrations/jira/sync-commits', json={'repository': 'owner/repo'}).get_json()
+    assert response['tickets_synced'] == 2 and response['skipped_already_synced'] == 0
+
+    response = client.post('/api/integrations/jira/sync-commits', json={'repository': 'owner/repo', 'limit': 'abc'})
+    assert response.status_code == 400
+    print("✅ Failed sync test passed")
+
+
+if __name__ == "__main__":
+    test_overlapping_syncs_are_recorded_once()
+    print()
+    test_repositories_are_separate()
+    print()
+    test_large_ranges_are_chunked()
+    print()
+    test_concurrent_claims_are_exclusive()
+    print()
+    test_released_claims_can_be_claimed_again()
+    print()
+    test_overlapping_sync_requests_log_work_once()
+    print()
+    test_failed_sync_is_retried_and_bad_limit_rejected()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Tests for the integration retry policy (pooled session and async client)
+Runs a local HTTP stub that answers with scripted status codes
+"""
+
+import os
+import sys
+import json
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from integrations.base_integration import IntegrationRetry
+from integrations.project_management.jira import JiraIntegration
+
+
+class ScriptedUpstream:
+    """HTTP stub answering each request with the next scripted (status, headers) pair, then 200"""
+
+    def __init__(self):
+        self.script = []
+        self.requests = []
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _respond(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    self.rfile.read(length)
+                upstream.requests.append(self.command)
+                status, headers = upstream.script.pop(0) if upstream.script else (200, {})
+                body = json.dumps({'status': status}).encode('utf-8')
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = do_PUT = _respond
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def reset(self, *script):
+        self.script = list(script)
+        self.requests = []
+
+    def close(self):
+        self.server.shutdown()
+
+
+def _make_integration(base_url):
+    """Jira integration pointed at the stub, with near-zero backoff"""
+    return JiraIntegration({
+        'base_url': base_url,
+        'email': 'bot@example.com',
+        'api_token': 'test-token',
+        'max_retries': 3,
+        'backoff_factor': 0.01
+    })
+
+
+def test_sync_retry_policy():
+    """Rate limits and unavailability are retried for every method, gateway errors only for idempotent ones"""
+    print("🧪 Testing the pooled session retry policy")
+
+    upstream = ScriptedUpstream()
+    jira = _make_integration(upstream.base_url)
+    try:
+        upstream.reset((429, {'Retry-After': '0'}), (503, {}))
+        assert jira._make_request('POST', '/rest/api/3/issue', data={}) is not None
+        assert upstream.requests == ['POST', 'POST', 'POST']
+
+        upstream.reset((502, {}))
+        assert jira._make_request('POST', '/rest/api/3/issue', data={}) is None
+        assert upstream.requests == ['POST']
+
+        upstream.reset((502, {}), (504, {}))
+        assert jira._make_request('GET', '/rest/api/3/myself') is not None
+        assert upstream.requests == ['GET', 'GET', 'GET']
+
+        upstream.reset((503, {}), (503, {}), (503, {}), (503, {}))
+        assert jira._make_request('GET', '/rest/api/3/myself') is None
+        assert len(upstream.requests) == 4
+
+        stats = jira.get_request_stats()
+        assert stats['GET /rest/api/3/myself']['retries'] == 5
+    finally:
+        upstream.close()
+    print("✅ Pooled session retry test passed")
+
+
+def test_async_retry_policy():
+    """The async client applies the same policy as the pooled session"""
+    print("🧪 Testing the async client retry policy")
+
+    upstream = ScriptedUpstream()
+    jira = _make_integration(upstream.base_url)
+
+    async def scenario():
+        try:
+            upstream.reset((429, {'Retry-After': '0'}), (503, {}))
+            assert await jira._amake_request('POST', '/rest/api/3/issue', data={}) is not None
+            assert upstream.requests == ['POST', 'POST', 'POST']
+
+            upstream.reset((504, {}))
+            assert await jira._amake_request('POST', '/rest/api/3/issue', data={}) is None
+            assert upstream.requests == ['POST']
+
+            upstream.reset((502, {}))
+            response = await jira._amake_request('GET', '/rest/api/3/myself')
+            assert response.status_code == 200 and response.json() == {'status': 200}
+            assert upstream.requests == ['GET', 'GET']
+        finally:
+            await jira.aclose()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        upstream.close()
+    print("✅ Async client retry test passed")
+
+
+def test_retry_after_is_capped():
+    """A long Retry-After is capped so one call cannot stall a worker for minutes"""
+    print("🧪 Testing the Retry-After cap")
+
+    retry = IntegrationRetry(total=3)
+    assert retry.parse_retry_after('5') == 5
+    assert retry.parse_retry_after('3600') == IntegrationRetry.MAX_RETRY_AFTER
+    print("✅ Retry-After cap test passed")
+
+
+if __name__ == "__main__":
+    test_sync_retry_policy()
+    print()
+    test_async_retry_policy()
+    print()
+    test_retry_after_is_capped()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for the Jira metadata cache (transition IDs)
+Replaces the HTTP layer with a fake Jira holding two workflows; no Jira instance is contacted
+"""
+
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from integrations.project_management.jira import JiraIntegration
+
+# Transitions available per (issue type, status); "Done" has a different ID in each workflow
+WORKFLOWS = {
+    ('Bug', 'To Do'): [{'id': '31', 'name': 'Done', 'to': 'Done'}, {'id': '21', 'name': 'In Progress', 'to': 'In Progress'}],
+    ('Story', 'To Do'): [{'id': '41', 'name': 'Done', 'to': 'Accepted'}, {'id': '31', 'name': 'Reject', 'to': 'Rejected'}]
+}
+
+
+class _Response:
+    """Minimal response of the Jira REST API"""
+
+    def __init__(self, status_code, data=None):
+        self.status_code = status_code
+        self.text = ''
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+class FakeJira:
+    """Serves issue lookups with expanded transitions and applies transition POSTs"""
+
+    def __init__(self, issues):
+        self.issues = issues
+        self.requests = []
+
+    def __call__(self, method, endpoint, data=None, params=None, accept_statuses=()):
+        issue_key = endpoint.split('/')[5]
+        issue = self.issues[issue_key]
+        available = WORKFLOWS[(issue['issuetype'], issue['status'])]
+        self.requests.append(method)
+
+        if method == 'GET':
+            return _Response(200, {
+                'key': issue_key,
+                'fields': {'issuetype': {'name': issue['issuetype']}, 'status': {'name': issue['status']}},
+                'transitions': available
+            })
+
+        transition = next((t for t in available if t['id'] == data['transition']['id']), None)
+        if not transition:
+            return None
+        issue['status'] = transition['to']
+        return _Response(204)
+
+
+def _make_jira(issues):
+    """Jira integration talking to a FakeJira holding the given issues"""
+    jira = JiraIntegration({
+        'base_url': 'https://example.atlassian.net',
+        'email': 'bot@example.com',
+        'api_token': 'test-token'
+    })
+    jira._make_request = FakeJira(issues)
+    return jira
+
+
+def test_transition_ids_are_cached_per_workflow():
+    """A cached ID is only reused for tickets of the same issue type and status"""
+    print("🧪 Testing transition ID caching per workflow status")
+
+    issues = {name: {'issuetype': issuetype, 'status': 'To Do'}
+              for name, issuetype in (('ABC-1', 'Bug'), ('ABC-2', 'Bug'), ('ABC-3', 'Story'))}
+    jira = _make_jira(issues)
+    fake = jira._make_request
+
+    # Unknown state: one lookup, then the POST
+    assert jira.transition_ticket('ABC-1', 'Done')
+    assert fake.requests == ['GET', 'POST'] and issues['ABC-1']['status'] == 'Done'
+
+    # Same issue type and status: the cached ID is a single POST
+    fake.requests = []
+    assert jira.transition_ticket('ABC-2', 'Done', {'issuetype': 'Bug', 'status': 'To Do'})
+    assert fake.requests == ['POST'] and issues['ABC-2']['status'] == 'Done'
+
+    # Another workflow in the same project never reuses the Bug workflow's ID (31 is "Reject" there)
+    fake.requests = []
+    assert jira.transition_ticket('ABC-3', 'Done', {'issuetype': 'Story', 'status': 'To Do'})
+    assert fake.requests == ['GET', 'POST'] and issues['ABC-3']['status'] == 'Accepted'
+    print("✅ Workflow cache test passed")
+
+
+def test_rejected_cached_id_is_refreshed():
+    """A cached ID Jira rejects (e.g. after a workflow change) is dropped and the transitions are looked up again"""
+    print("🧪 Testing stale transition IDs")
+
+    issues = {'ABC-2': {'issuetype': 'Story', 'status': 'To Do'}}
+    jira = _make_jira(issues)
+    fake = jira._make_request
+
+    jira._set_metadata(('transition', 'ABC', 'story', 'to do', 'done'), '99')
+    assert jira.transition_ticket('ABC-2', 'Done', {'issuetype': 'Story', 'status': 'To Do'})
+    assert fake.requests == ['POST', 'GET', 'POST'] and issues['ABC-2']['status'] == 'Accepted'
+    assert jira._get_metadata(('transition', 'ABC', 'story', 'to do', 'done')) == '41'
+    print("✅ Stale ID test passed")
+
+
+if __name__ == "__main__":
+    test_transition_ids_are_cached_per_workflow()
+    print()
+    test_rejected_cached_id_is_refreshed()
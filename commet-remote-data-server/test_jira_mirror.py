@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Tests for the Jira issue mirror
+Writes issues straight into a temporary mirror; no Jira instance is contacted
+"""
+
+import os
+import sys
+import hmac
+import hashlib
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from storage import connect
+from integrations.project_management.jira import JiraIntegration, JiraSearchError
+from jira_mirror import JiraMirror
+from webhooks.jira_webhooks import JiraWebhookHandler
+
+
+def _make_mirror(projects=('ABC',)):
+    """Create a mirror of the given projects on a temporary database"""
+    jira = JiraIntegration({
+        'base_url': 'https://example.atlassian.net',
+        'email': 'bot@example.com',
+        'api_token': 'test-token',
+        'project_key': 'ABC'
+    })
+    return JiraMirror(jira, projects=list(projects), db_path=os.path.join(tempfile.mkdtemp(), 'jira_mirror.db'))
+
+
+def _issue(key, updated, status='To Do'):
+    """Raw Jira issue as returned by the issue and search APIs"""
+    return {
+        'key': key,
+        'fields': {
+            'summary': f'{key} summary',
+            'status': {'name': status},
+            'created': '2024-01-10T09:00:00.000+0000',
+            'updated': updated
+        }
+    }
+
+
+def test_out_of_order_updates():
+    """An older copy of an issue never replaces a newer one"""
+    print("🧪 Testing out-of-order issue updates")
+
+    mirror = _make_mirror()
+    mirror.upsert_issue(_issue('ABC-1', '2024-01-15T14:30:00.000+0000', 'Done'))
+    mirror.upsert_issue(_issue('ABC-1', '2024-01-15T14:00:00.000+0000', 'In Progress'))
+
+    tickets = mirror.get_tickets('ABC')
+    assert len(tickets) == 1
+    assert tickets[0]['status'] == 'Done'
+
+    mirror.upsert_issue(_issue('ABC-1', '2024-01-15T15:00:00.000+0000', 'Reopened'))
+    assert mirror.get_tickets('ABC')[0]['status'] == 'Reopened'
+    print("✅ Out-of-order test passed")
+
+
+def test_mixed_offsets_compare_in_utc():
+    """A REST copy in a local offset and a webhook copy in UTC are ordered by the actual time"""
+    print("🧪 Testing timestamps with different UTC offsets")
+
+    mirror = _make_mirror()
+    # 16:30+0200 is 14:30 UTC, older than the 15:00 UTC webhook copy although it sorts higher as text
+    mirror.upsert_issue(_issue('ABC-2', '2024-01-15T15:00:00.000+0000', 'Done'))
+    mirror.upsert_issue(_issue('ABC-2', '2024-01-15T16:30:00.000+0200', 'In Progress'))
+    assert mirror.get_tickets('ABC')[0]['status'] == 'Done'
+
+    # 17:30+0200 is 15:30 UTC, newer
+    mirror.upsert_issue(_issue('ABC-2', '2024-01-15T17:30:00.000+0200', 'Closed'))
+    assert mirror.get_tickets('ABC')[0]['status'] == 'Closed'
+    print("✅ UTC ordering test passed")
+
+
+def test_changelog_is_stored_in_utc():
+    """Changelog timestamps in any offset are stored in UTC"""
+    print("🧪 Testing changelog timestamps")
+
+    mirror = _make_mirror()
+    issue = _issue('ABC-3', '2024-01-15T16:30:00.000+0200', 'Done')
+    issue['changelog'] = {'histories': [
+        {
+            'created': '2024-01-15T16:00:00.000+0200',
+            'items': [{'field': 'status', 'fromString': 'To Do', 'toString': 'In Progress'}]
+        },
+        {
+            'created': '2024-01-15T14:30:00.000+0000',
+            'items': [{'field': 'status', 'fromString': 'In Progress', 'toString': 'Done'}]
+        }
+    ]}
+    mirror.upsert_issue(issue)
+
+    with_times = [(entry['to_string'], entry['changed_at']) for entry in mirror.get_changelog('ABC')]
+    assert with_times == [
+        ('In Progress', '2024-01-15T14:00:00.000+0000'),
+        ('Done', '2024-01-15T14:30:00.000+0000')
+    ]
+    print("✅ Changelog test passed")
+
+
+def test_webhooks_refetch_issues():
+    """Webhook payloads only name the issue; its data (or deletion) comes from Jira"""
+    print("🧪 Testing webhook-triggered refreshes")
+
+    mirror = _make_mirror()
+    handler = JiraWebhookHandler(mirror.jira, mirror=mirror)
+    live = {'ABC-8': _issue('ABC-8', '2024-01-15T14:30:00.000+0000', 'In Progress')}
+    mirror.jira.get_issue = lambda key, fields=None, expand=None: live.get(key, {})
+
+    # A forged update with a future timestamp does not reach the mirror...
+    forged = _issue('ABC-8', '2099-01-01T00:00:00.000+0000', 'Done')
+    handler.handle_batch([{'webhookEvent': 'jira:issue_updated', 'timestamp': 1, 'issue': forged}])
+    assert mirror.get_tickets('ABC')[0]['status'] == 'In Progress'
+
+    # ...so the next real change is applied
+    live['ABC-8'] = _issue('ABC-8', '2024-01-15T15:00:00.000+0000', 'Done')
+    handler.handle_batch([{'webhookEvent': 'jira:issue_updated', 'timestamp': 2, 'issue': {'key': 'ABC-8'}}])
+    assert mirror.get_tickets('ABC')[0]['status'] == 'Done'
+
+    # A forged deletion of an existing issue keeps it; a real one removes it
+    handler.handle_batch([{'webhookEvent': 'jira:issue_deleted', 'timestamp': 3, 'issue': {'key': 'ABC-8'}}])
+    assert [ticket['key'] for ticket in mirror.get_tickets('ABC')] == ['ABC-8']
+    del live['ABC-8']
+    handler.handle_batch([{'webhookEvent': 'jira:issue_deleted', 'timestamp': 4, 'issue': {'key': 'ABC-8'}}])
+    assert mirror.get_tickets('ABC') == []
+
+    # If Jira cannot be reached nothing changes
+    mirror.upsert_issue(_issue('ABC-9', '2024-01-15T14:30:00.000+0000'))
+    mirror.jira.get_issue = lambda key, fields=None, expand=None: None
+    handler.handle_batch([{'webhookEvent': 'jira:issue_deleted', 'timestamp': 5, 'issue': {'key': 'ABC-9'}}])
+    assert [ticket['key'] for ticket in mirror.get_tickets('ABC')] == ['ABC-9']
+    print("✅ Webhook refresh test passed")
+
+
+def test_scans_replace_bad_copies():
+    """Backfill and reconcile writes replace a stored copy even if its timestamp looks newer"""
+    print("🧪 Testing scan writes over skewed copies")
+
+    mirror = _make_mirror()
+    mirror.upsert_issue(_issue('ABC-6', '2099-01-01T00:00:00.000+0000', 'Done'))
+    mirror.upsert_issue(_issue('ABC-6', '2024-01-15T14:30:00.000+0000', 'In Progress'))
+    assert mirror.get_tickets('ABC')[0]['status'] == 'Done'
+
+    mirror.upsert_issue(_issue('ABC-6', '2024-01-15T14:30:00.000+0000', 'In Progress'), force=True)
+    ticket = mirror.get_tickets('ABC')[0]
+    assert ticket['status'] == 'In Progress' and ticket['updated'] == '2024-01-15T14:30:00.000+0000'
+    print("✅ Scan write test passed")
+
+
+def test_webhook_signature():
+    """With a secret configured, only signed requests (or ones carrying the secret) are accepted"""
+    print("🧪 Testing webhook signatures")
+
+    body = b'{"webhookEvent": "jira:issue_updated"}'
+    handler = JiraWebhookHandler(secret='s3cret')
+    signature = 'sha256=' + hmac.new(b's3cret', body, hashlib.sha256).hexdigest()
+
+    assert handler.verify_request(body, signature)
+    assert not handler.verify_request(body + b' ', signature)
+    assert not handler.verify_request(body, 'sha1=' + signature[7:])
+    assert not handler.verify_request(body)
+    assert handler.verify_request(body, token='s3cret')
+    assert not handler.verify_request(body, token='guess')
+    assert JiraWebhookHandler().verify_request(body)
+    print("✅ Signature test passed")
+
+
+def test_unmirrored_projects_are_ignored():
+    """Webhook issues of projects outside the mirrored set are not stored"""
+    print("🧪 Testing project filtering")
+
+    mirror = _make_mirror(projects=('ABC',))
+    mirror.upsert_issue(_issue('XYZ-1', '2024-01-15T14:30:00.000+0000'))
+    mirror.upsert_issue(_issue('ABC-4', '2024-01-15T14:30:00.000+0000'))
+
+    assert mirror.get_tickets('XYZ') == []
+    assert [ticket['key'] for ticket in mirror.get_tickets('ABC')] == ['ABC-4']
+    print("✅ Project filter test passed")
+
+
+def test_delete_removes_changelog():
+    """Deleting an issue removes it and its changelog"""
+    print("🧪 Testing issue deletion")
+
+    mirror = _make_mirror()
+    issue = _issue('ABC-5', '2024-01-15T14:30:00.000+0000')
+    issue['changelog'] = {'histories': [{
+        'created': '2024-01-15T14:00:00.000+0000',
+        'items': [{'field': 'status', 'fromString': 'To Do', 'toString': 'Done'}]
+    }]}
+    mirror.upsert_issue(issue)
+    mirror.delete_issue('ABC-5')
+
+    assert mirror.get_tickets('ABC') == []
+    assert mirror.get_changelog('ABC') == []
+    print("✅ Deletion test passed")
+
+
+class _SearchResponse:
+    """Minimal response of the Jira search API"""
+
+    def __init__(self, data):
+        self.status_code = 200
+        self.text = ''
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+def test_failed_reconcile_keeps_watermark():
+    """A search that fails after the first page raises and does not advance the watermark"""
+    print("🧪 Testing reconciliation with a failed page")
+
+    mirror = _make_mirror()
+    with connect(mirror.db_path) as conn:
+        conn.execute(
+            'INSERT INTO mirrored_projects (project_key, backfilled_at, reconciled_at, watermark) VALUES (?, ?, ?, ?)',
+            ('ABC', '2024-01-01T00:00:00', '2024-01-01T00:00:00', '2024-01-10T00:00:00.000+0000')
+        )
+
+    pages = [_SearchResponse({'issues': [_issue('ABC-7', '2024-02-01T10:00:00.000+0000')], 'nextPageToken': 'next'}), None]
+    mirror.jira._make_request = lambda method, endpoint, data=None, params=None: pages.pop(0)
+
+    try:
+        mirror.reconcile('ABC')
+        assert False, "Expected JiraSearchError"
+    except JiraSearchError:
+        pass
+
+    with connect(mirror.db_path) as conn:
+        row = conn.execute('SELECT watermark FROM mirrored_projects WHERE project_key = ?', ('ABC',)).fetchone()
+    assert row['watermark'] == '2024-01-10T00:00:00.000+0000'
+    assert [ticket['key'] for ticket in mirror.get_tickets('ABC')] == ['ABC-7']
+    print("✅ Failed reconcile test passed")
+
+
+if __name__ == "__main__":
+    test_out_of_order_updates()
+    print()
+    test_mixed_offsets_compare_in_utc()
+    print()
+    test_changelog_is_stored_in_utc()
+    print()
+    test_webhooks_refetch_issues()
+    print()
+    test_scans_replace_bad_copies()
+    print()
+    test_webhook_signature()
+    print()
+    test_unmirrored_projects_are_ignored()
+    print()
+    test_delete_removes_changelog()
+    print()
+    test_failed_reconcile_keeps_watermark()
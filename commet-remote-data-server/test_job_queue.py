@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Tests for the background job queue
+Each test uses its own temporary database and runs jobs on the calling thread
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from storage import connect
+from job_queue import JobQueue, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED, ORPHANED_JOB_ERROR
+
+
+def _make_queue(**kwargs):
+    """Create a queue on a temporary database whose workers never start on their own"""
+    db_path = os.path.join(tempfile.mkdtemp(), 'jobs.db')
+    queue = JobQueue(db_path=db_path, retry_backoff=0, workers=1, **kwargs)
+    queue.start = lambda: None
+    return queue
+
+
+def _raw_job(queue, job_id):
+    """Read a job row straight from the database"""
+    with connect(queue.db_path) as conn:
+        return dict(conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone())
+
+
+def test_enqueue_unique_deduplicates():
+    """Identical submissions share a job until it fails; different tokens never do"""
+    print("🧪 Testing job deduplication")
+
+    queue = _make_queue()
+    queue.register('echo', lambda payload: payload['value'])
+
+    first, created = queue.enqueue_unique('echo', {'value': 1, 'repo': 'a/b'})
+    second, created_again = queue.enqueue_unique('echo', {'repo': 'a/b', 'value': 1})
+    assert created and not created_again
+    assert first == second
+
+    other_token, created = queue.enqueue_unique('echo', {'value': 1, 'repo': 'a/b'}, secrets={'token': 'ghp_other'})
+    assert created and other_token != first
+
+    assert queue.run_pending() == 2
+    assert queue.get(first)['result'] == 1
+    assert queue.enqueue_unique('echo', {'value': 1, 'repo': 'a/b'}) == (first, False)
+    print("✅ Deduplication test passed")
+
+
+def test_secrets_stay_in_memory():
+    """Secrets reach the handler but never the database"""
+    print("🧪 Testing that job secrets are not persisted")
+
+    queue = _make_queue()
+    received = []
+    queue.register('story', lambda payload: received.append(payload) or 'ok')
+
+    job_id, _ = queue.enqueue_unique('story', {'repository': 'a/b'}, secrets={'token': 'ghp_secret'})
+    queue.run_pending()
+
+    assert received == [{'repository': 'a/b', 'token': 'ghp_secret'}]
+    row = _raw_job(queue, job_id)
+    assert 'ghp_secret' not in ''.join(str(value) for value in row.values())
+    assert job_id not in queue._secrets
+    print("✅ Secret handling test passed")
+
+
+def test_orphaned_secret_jobs_fail():
+    """A job whose secrets were lost with their process fails instead of running without them"""
+    print("🧪 Testing jobs orphaned by their owner process")
+
+    queue = _make_queue()
+    queue.register('story', lambda payload: payload['token'])
+
+    job_id, _ = queue.enqueue_unique('story', {'repository': 'a/b'}, secrets={'token': 'ghp_secret'})
+    with connect(queue.db_path) as conn:
+        conn.execute('UPDATE jobs SET owner = ? WHERE id = ?', (f"{queue._owner().rpartition(':')[0]}:999999999", job_id))
+
+    # Another process never claims it...
+    assert queue.run_pending() == 0
+    # ...and fails it once the owner is gone
+    queue._purge_expired()
+    job = queue.get(job_id)
+    assert job['status'] == JOB_FAILED and job['error'] == ORPHANED_JOB_ERROR
+    print("✅ Orphaned job test passed")
+
+
+def test_retries_then_fails():
+    """A failing handler is retried up to max_attempts, then the job fails"""
+    print("🧪 Testing retries")
+
+    queue = _make_queue(max_attempts=3)
+    calls = []
+
+    def flaky(payload):
+        calls.append(payload)
+        raise RuntimeError('upstream unavailable')
+
+    queue.register('flaky', flaky)
+    job_id = queue.enqueue('flaky', {'n': 1})
+
+    assert queue.run_pending() == 3
+    job = queue.get(job_id)
+    assert len(calls) == 3
+    assert job['status'] == JOB_FAILED
+    assert job['attempts'] == 3
+    assert job['error'] == 'upstream unavailable'
+    assert job['expires_at']
+    print("✅ Retry test passed")
+
+
+def test_retry_backoff_doubles():
+    """Retries wait retry_backoff seconds, doubling per attempt; job types can set their own attempt limit"""
+    print("🧪 Testing retry backoff")
+
+    queue = _make_queue(max_attempts=5)
+    queue.retry_backoff = 10
+    queue.register('flaky', lambda payload: 1 / 0, max_attempts=3)
+    job_id = queue.enqueue('flaky', {})
+
+    delays = []
+    for _ in range(3):
+        started = time.time()
+        assert queue.run_pending() == 1
+        row = _raw_job(queue, job_id)
+        delays.append(row['run_after'] - started)
+        # Not due yet: nothing else runs
+        assert queue.run_pending() == 0
+        with connect(queue.db_path) as conn:
+            conn.execute('UPDATE jobs SET run_after = ? WHERE id = ?', (time.time(), job_id))
+
+    job = queue.get(job_id)
+    assert job['max_attempts'] == 3 and job['status'] == JOB_FAILED
+    assert 9 < delays[0] < 11 and 19 < delays[1] < 21
+    print("✅ Backoff test passed")
+
+
+def test_stale_attempt_cannot_overwrite():
+    """When a lease expires and the job is re-claimed, the first attempt's result is discarded"""
+    print("🧪 Testing double-claim fencing")
+
+    queue = _make_queue(lease_seconds=60)
+    queue.register('echo', lambda payload: payload)
+    job_id = queue.enqueue('echo', {})
+
+    stale = queue._claim_next()
+    assert stale['attempts'] == 1
+    # The first worker stalls past its lease
+    with connect(queue.db_path) as conn:
+        conn.execute('UPDATE jobs SET lease_expires = ? WHERE id = ?', (time.time() - 1, job_id))
+
+    fresh = queue._claim_next()
+    assert fresh['id'] == job_id and fresh['attempts'] == 2
+
+    queue._complete(fresh, 'fresh result')
+    queue._complete(stale, 'stale result')
+    queue._fail(stale, 'stale error')
+
+    job = queue.get(job_id)
+    assert job['status'] == JOB_SUCCEEDED
+    assert job['result'] == 'fresh result'
+    assert job['error'] is None
+    print("✅ Fencing test passed")
+
+
+def test_heartbeat_keeps_long_jobs_leased():
+    """A handler that runs longer than its lease without reporting progress is not claimed twice"""
+    print("🧪 Testing lease heartbeat")
+
+    queue = _make_queue(lease_seconds=0.3)
+    started = threading.Event()
+    release = threading.Event()
+    runs = []
+
+    def slow(payload):
+        runs.append(payload)
+        started.set()
+        release.wait(5)
+        return 'done'
+
+    queue.register('slow', slow)
+    job_id = queue.enqueue('slow', {})
+
+    worker = threading.Thread(target=queue.run_pending)
+    worker.start()
+    assert started.wait(5)
+
+    # Well past the lease: a second worker finds nothing to claim
+    time.sleep(1.0)
+    assert _raw_job(queue, job_id)['status'] == JOB_RUNNING
+    assert queue._claim_next() is None
+
+    release.set()
+    worker.join(5)
+    assert len(runs) == 1
+    assert queue.get(job_id)['status'] == JOB_SUCCEEDED
+    print("✅ Heartbeat test passed")
+
+
+def test_progress_is_fenced():
+    """Progress from a stale attempt does not touch the job"""
+    print("🧪 Testing progress reports")
+
+    queue = _make_queue()
+    queue.register('echo', lambda payload: payload)
+    job_id = queue.enqueue('echo', {})
+
+    job = queue._claim_next()
+    queue._current.job = job
+    queue.report_progress('Fetching commits', 40)
+    assert queue.get(job_id)['progress'] == {'percent': 40, 'message': 'Fetching commits'}
+
+    queue._current.job = dict(job, attempts=job['attempts'] - 1)
+    queue.report_progress('Stale step', 90)
+    queue._current.job = None
+    assert queue.get(job_id)['progress']['message'] == 'Fetching commits'
+
+    # Outside a handler nothing happens
+    queue.report_progress('Ignored')
+    assert _raw_job(queue, job_id)['status'] == JOB_RUNNING
+    print("✅ Progress test passed")
+
+
+def test_expired_results_are_hidden():
+    """Finished jobs disappear once their result TTL passes"""
+    print("🧪 Testing result expiry")
+
+    queue = _make_queue(result_ttl=60)
+    queue.register('echo', lambda payload: payload)
+    job_id = queue.enqueue('echo', {'x': 1})
+    queue.run_pending()
+    assert queue.get(job_id)['status'] == JOB_SUCCEEDED
+
+    with connect(queue.db_path) as conn:
+        conn.execute('UPDATE jobs SET expires_at = ? WHERE id = ?', (time.time() - 1, job_id))
+    assert queue.get(job_id) is None
+
+    queue._purge_expired()
+    assert queue.get_stats() == {}
+    print("✅ Expiry test passed")
+
+
+if __name__ == "__main__":
+    test_enqueue_unique_deduplicates()
+    print()
+    test_secrets_stay_in_memory()
+    print()
+    test_orphaned_secret_jobs_fail()
+    print()
+    test_retries_then_fails()
+    print()
+    test_retry_backoff_doubles()
+    print()
+    test_stale_attempt_cannot_overwrite()
+    print()
+    test_heartbeat_keeps_long_jobs_leased()
+    print()
+    test_progress_is_fenced()
+    print()
+    test_expired_results_are_hidden()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Load test for the shared LLM scheduler
+Uses a stubbed LLM (asyncio.sleep) so it runs without an OpenAI key
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from llm_scheduler import LLMScheduler, LLMTimeoutError, PRIORITY_INTERACTIVE, PRIORITY_BATCH
+
+STUB_LATENCY = 0.05  # Seconds per stubbed completion
+TOTAL_CALLS = 200
+CALLER_THREADS = 64  # Simulated Flask worker threads
+
+
+class StubLLM:
+    """Stubbed LLM that records peak concurrency"""
+
+    def __init__(self, latency=STUB_LATENCY):
+        self.latency = latency
+        self.active = 0
+        self.peak = 0
+        self.completed_order = []
+        self._lock = threading.Lock()
+
+    async def complete(self, label=None):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.latency)
+            return f"stub answer {label}"
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed_order.append(label)
+
+
+def _run_load(max_concurrency):
+    """Fire TOTAL_CALLS stubbed completions from CALLER_THREADS threads"""
+    scheduler = LLMScheduler(max_concurrency=max_concurrency, default_timeout=10)
+    llm = StubLLM()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CALLER_THREADS) as executor:
+        results = list(executor.map(lambda i: scheduler.run(lambda: llm.complete(i)), range(TOTAL_CALLS)))
+    elapsed = time.perf_counter() - start
+
+    return scheduler, llm, results, elapsed
+
+
+def test_scheduler_throughput():
+    """Throughput scales with the concurrency limit and never exceeds it"""
+    print("🧪 Testing LLM scheduler throughput with a stubbed LLM")
+    print(f"   {TOTAL_CALLS} calls, {STUB_LATENCY * 1000:.0f} ms each, {CALLER_THREADS} caller threads")
+
+    for max_concurrency in (4, 16, 64):
+        scheduler, llm, results, elapsed = _run_load(max_concurrency)
+        throughput = TOTAL_CALLS / elapsed
+        ideal = TOTAL_CALLS * STUB_LATENCY / max_concurrency
+
+        print(f"   concurrency={max_concurrency:>3}: {elapsed:.2f}s, {throughput:.0f} calls/s "
+              f"(ideal {ideal:.2f}s), peak in-flight {llm.peak}")
+
+        assert len(results) == TOTAL_CALLS
+        assert llm.peak <= max_concurrency
+        assert elapsed >= ideal * 0.9
+        assert scheduler.get_stats()['completed'] == TOTAL_CALLS
+
+    print("✅ Throughput test passed")
+
+
+def test_interactive_priority():
+    """Interactive calls overtake queued batch calls"""
+    print("🧪 Testing interactive priority over batch work")
+
+    scheduler = LLMScheduler(max_concurrency=2, default_timeout=10)
+    llm = StubLLM()
+
+    with ThreadPoolExecutor(max_workers=40) as executor:
+        batch = [executor.submit(scheduler.run, lambda i=i: llm.complete(f"batch-{i}"), PRIORITY_BATCH)
+                 for i in range(30)]
+        time.sleep(STUB_LATENCY / 2)  # Let the batch calls fill the queue
+        interactive = [executor.submit(scheduler.run, lambda i=i: llm.complete(f"chat-{i}"), PRIORITY_INTERACTIVE)
+                       for i in range(4)]
+        for future in batch + interactive:
+            future.result()
+
+    last_interactive = max(llm.completed_order.index(f"chat-{i}") for i in range(4))
+    print(f"   last interactive call finished at position {last_interactive + 1} of {len(llm.completed_order)}")
+
+    assert last_interactive < 10
+    print("✅ Priority test passed")
+
+
+def test_call_timeout():
+    """Calls exceeding their timeout fail without holding a slot"""
+    print("🧪 Testing per-call timeouts")
+
+    scheduler = LLMScheduler(max_concurrency=1, default_timeout=10)
+    slow = StubLLM(latency=1.0)
+    fast = StubLLM()
+
+    try:
+        scheduler.run(lambda: slow.complete("slow"), timeout=0.1)
+        assert False, "Expected LLMTimeoutError"
+    except LLMTimeoutError:
+        pass
+
+    assert scheduler.run(lambda: fast.complete("fast")) == "stub answer fast"
+    assert scheduler.get_stats()['timed_out'] == 1
+    print("✅ Timeout test passed")
+
+
+def test_queue_wait_counts_toward_timeout():
+    """A call queued behind a busy slot times out on schedule and is never started"""
+    print("🧪 Testing timeouts of queued calls")
+
+    scheduler = LLMScheduler(max_concurrency=1, default_timeout=10)
+    blocker = StubLLM(latency=1.0)
+    queued = StubLLM()
+
+    holder = threading.Thread(target=lambda: scheduler.run(lambda: blocker.complete("blocker")))
+    holder.start()
+    while not blocker.active:
+        time.sleep(0.01)
+
+    start = time.perf_counter()
+    try:
+        scheduler.run(lambda: queued.complete("queued"), timeout=0.2)
+        assert False, "Expected LLMTimeoutError"
+    except LLMTimeoutError:
+        pass
+    elapsed = time.perf_counter() - start
+    print(f"   queued call timed out after {elapsed:.2f}s")
+
+    holder.join()
+    assert elapsed < 0.9
+    assert queued.peak == 0
+    stats = scheduler.get_stats()
+    assert stats['queued'] == 0 and stats['in_flight'] == 0
+    assert stats['timed_out'] == 1 and stats['completed'] == 1
+    print("✅ Queue wait timeout test passed")
+
+
+if __name__ == "__main__":
+    test_scheduler_throughput()
+    print()
+    test_interactive_priority()
+    print()
+    test_call_timeout()
+    print()
+    test_queue_wait_counts_toward_timeout()
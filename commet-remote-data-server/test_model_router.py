@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for model routing and per-request call details
+Completions go to a fake OpenAI client; no API key or network access is needed
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from model_router import ModelRouter
+
+
+def test_overrides_are_allowlisted():
+    """Only route names and known models can be requested"""
+    print("🧪 Testing model overrides")
+
+    router = ModelRouter(fast_model='gpt-4o-mini', strong_model='gpt-4o')
+
+    assert router.check_override('strong') is None
+    assert router.check_override('gpt-4-turbo') is None
+    assert router.select('chat', override='strong')['model'] == 'gpt-4o'
+    assert router.select('chat', override='gpt-4-turbo') == {'route': 'override', 'model': 'gpt-4-turbo',
+                                                            'reason': 'override'}
+
+    for override in ('o1-pro', 'gpt-4o-mini\n', ['gpt-4o'], 42):
+        assert router.check_override(override)
+    try:
+        router.select('chat', override='o1-pro')
+        assert False, "Expected ValueError"
+    except ValueError:
+        pass
+    print("✅ Override test passed")
+
+
+class FakeCompletions:
+    """chat.completions of a fake AsyncOpenAI client that answers or raises"""
+
+    def __init__(self):
+        self.error = None
+
+    async def create(self, model, **kwargs):
+        if self.error:
+            raise self.error
+        usage = SimpleNamespace(prompt_tokens=100, completion_tokens=20, prompt_tokens_details=None)
+        return SimpleNamespace(usage=usage, choices=[])
+
+
+def test_failed_call_clears_previous_call_info():
+    """After a failed completion the caller does not see the previous request's model and usage"""
+    print("🧪 Testing call details after a failed completion")
+
+    from ai_service import GitHubAIService
+
+    # Only for this service: servers started by other tests inherit the environment
+    previous_key = os.environ.get('OPENAI_API_KEY')
+    os.environ['OPENAI_API_KEY'] = previous_key or 'test-key'
+    try:
+        service = GitHubAIService()
+    finally:
+        if previous_key is None:
+            del os.environ['OPENAI_API_KEY']
+    completions = FakeCompletions()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    service._get_async_client = lambda: client
+    messages = [{'role': 'user', 'content': 'hi'}]
+
+    service._chat_completion(messages, max_tokens=10, temperature=0)
+    assert service.get_last_call_info()['usage']['prompt_tokens'] == 100
+
+    completions.error = RuntimeError('upstream unavailable')
+    try:
+        service._chat_completion(messages, max_tokens=10, temperature=0)
+        assert False, "Expected the completion error"
+    except RuntimeError:
+        pass
+    assert service.get_last_call_info() == {}
+    print("✅ Call details test passed")
+
+
+if __name__ == "__main__":
+    test_overrides_are_allowlisted()
+    print()
+    test_failed_call_clears_previous_call_info()
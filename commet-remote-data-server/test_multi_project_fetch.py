@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Tests for the GitHub data fetched for multi-project questions
+Replaces the GitHub client and the AI service with fakes that count requests; no network access is needed
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime
+from types import SimpleNamespace
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_service import SUMMARY_MAX_COMMITS, SUMMARY_FILES_PER_COMMIT
+
+
+class FakeCommit:
+    """Listed commit whose stats cost one request on first access, as in PyGithub"""
+
+    def __init__(self, repo, number):
+        self.repo = repo
+        self.sha = f'{number:040d}'
+        person = SimpleNamespace(name='Dev', email='dev@example.com', date=datetime(2024, 1, 1))
+        self.commit = SimpleNamespace(message=f'Commit {number}', author=person, committer=person)
+        self.html_url = f'https://github.com/acme/api/commit/{self.sha}'
+        self._stats = None
+
+    @property
+    def stats(self):
+        if self._stats is None:
+            self.repo.requests.append('stats')
+            self._stats = SimpleNamespace(additions=1, deletions=1, total=2)
+        return self._stats
+
+
+class FakeRepo:
+    """Repository with 50 commits of 20 files each"""
+
+    def __init__(self):
+        self.requests = []
+        self.name, self.full_name = 'api', 'acme/api'
+        self.description, self.language = 'Backend API', 'Python'
+        self.html_url = 'https://github.com/acme/api'
+        self.stargazers_count = self.forks_count = self.watchers_count = self.open_issues_count = 0
+        self.created_at = self.updated_at = self.pushed_at = datetime(2024, 1, 1)
+        self.default_branch, self.private = 'main', False
+        self.owner = SimpleNamespace(login='acme', type='Organization', avatar_url='', html_url='')
+        self.commits = [FakeCommit(self, n) for n in range(50)]
+
+    def get_languages(self):
+        return {'Python': 100}
+
+    def get_commits(self, sha=None):
+        return self.commits
+
+    def get_commit(self, sha):
+        self.requests.append('detail')
+        files = [SimpleNamespace(filename=f'src/file{n}.py', status='modified', additions=1, deletions=1,
+                                 changes=2, patch='+x' * 1000) for n in range(20)]
+        return SimpleNamespace(files=files)
+
+
+class FakeAIService:
+    """Records the data the multi-project answer is generated from"""
+
+    model = 'gpt-4o-mini'
+
+    def __init__(self):
+        self.calls = []
+
+    def has_repository_summary(self, full_name, head_sha, window):
+        return False
+
+    def analyze_multiple_repositories(self, repositories_data, commits_data, question, **kwargs):
+        self.calls.append((commits_data, kwargs))
+        return 'answer'
+
+    def get_last_call_info(self):
+        return {}
+
+
+def test_map_reduce_fetches_only_what_the_summary_includes():
+    """Map-reduce mode requests stats and details only for the commits the summary prompt includes"""
+    print("🧪 Testing map-reduce commit fetching")
+
+    os.environ.setdefault('COMMET_DATA_DIR', tempfile.mkdtemp())
+    import server
+
+    repo = FakeRepo()
+    ai = FakeAIService()
+    server.Github = lambda *args: SimpleNamespace(get_repo=lambda name: repo)
+    server.ai_service = ai
+
+    body, status = server._run_multi_project_chat({'question': 'How does it work?', 'repositories': ['acme/api'],
+                                                   'commits_limit': 50, 'analysis_mode': 'map_reduce'})
+    assert status == 200, body
+    assert repo.requests.count('detail') == SUMMARY_MAX_COMMITS
+    assert repo.requests.count('stats') == SUMMARY_MAX_COMMITS
+
+    commits_data, kwargs = ai.calls[0]
+    assert len(commits_data[0]) == 50
+    assert kwargs['summary_window'][0] == SUMMARY_MAX_COMMITS
+    assert len(commits_data[0][0]['file_changes']) == SUMMARY_FILES_PER_COMMIT
+    assert 'file_changes' not in commits_data[0][SUMMARY_MAX_COMMITS]
+
+    # A smaller commits_limit is a smaller window, with its own cached summary
+    repo.requests = []
+    server._run_multi_project_chat({'question': 'How does it work?', 'repositories': ['acme/api'],
+                                    'commits_limit': 5, 'analysis_mode': 'map_reduce'})
+    assert repo.requests.count('detail') == 5
+    assert ai.calls[1][1]['summary_window'][0] == 5
+    print("✅ Map-reduce fetch test passed")
+
+
+if __name__ == "__main__":
+    test_map_reduce_fetches_only_what_the_summary_includes()
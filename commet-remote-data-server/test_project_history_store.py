@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Tests for the incremental project history store
+Uses a fake Jira client serving an in-memory project; each test uses its own temporary database
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from integrations.project_management.jira import JiraIntegration, JiraSearchError
+from project_history_store import ProjectHistoryStore
+
+
+class FakeJira:
+    """Serves raw issues for the JQL the store sends (ORDER BY updated ASC or DESC, updated >= filter)"""
+
+    def __init__(self, issues):
+        self.issues = issues
+        self.queries = []
+        self.fail = False
+
+    def iter_issues(self, jql, fields=None, max_results=None, strict=False, **kwargs):
+        self.queries.append(jql)
+        if self.fail:
+            raise JiraSearchError('Failed to search tickets: No response')
+
+        issues = self.issues
+        if "updated >= '" in jql:
+            since = jql.split("updated >= '")[1][:16].replace(' ', 'T')
+            issues = [issue for issue in issues if issue['fields']['updated'][:16] >= since]
+        issues = sorted(issues, key=lambda issue: issue['fields']['updated'], reverse=jql.endswith('DESC'))
+        return iter(issues[:max_results])
+
+    def test_connection(self):
+        return True
+
+
+def _issue(number, days_ago):
+    """Raw issue created and last updated days_ago days ago"""
+    moment = (datetime.now() - timedelta(days=days_ago)).strftime('%Y-%m-%dT%H:%M:%S.000+0000')
+    return {'key': f'ABC-{number}', 'fields': {'summary': f'Issue {number}', 'status': {'name': 'To Do'},
+                                               'created': moment, 'updated': moment}}
+
+
+def _make_store(jira, max_tickets):
+    """Create a store on a temporary database"""
+    return ProjectHistoryStore(jira, db_path=os.path.join(tempfile.mkdtemp(), 'history.db'), max_tickets=max_tickets)
+
+
+def test_capped_first_scan_keeps_newest_tickets():
+    """A project larger than max_tickets is served its most recent tickets, and stays marked truncated"""
+    print("🧪 Testing a capped first scan")
+
+    # 10 tickets from the last week, 20 from a year ago
+    jira = FakeJira([_issue(n, 1) for n in range(10)] + [_issue(100 + n, 365) for n in range(20)])
+    store = _make_store(jira, max_tickets=12)
+
+    history = store.get_project_history('ABC', days_back=30)
+    stats = history['ticket_statistics']
+    assert jira.queries[0].endswith('ORDER BY updated DESC')
+    assert stats['total_tickets'] == 12
+    assert stats['created_in_period'] == 10 and stats['recent_activity'] == 10
+    assert stats['truncated']
+
+    # The next (incremental) response is still built from a capped scan
+    jira.issues.append(_issue(50, 0))
+    history = store.get_project_history('ABC', days_back=30)
+    assert history['refresh']['mode'] == 'incremental'
+    assert history['ticket_statistics']['created_in_period'] == 11
+    assert history['ticket_statistics']['truncated']
+    print("✅ Capped scan test passed")
+
+
+def test_small_project_is_not_truncated():
+    """A project that fits in max_tickets is complete"""
+    print("🧪 Testing a complete first scan")
+
+    jira = FakeJira([_issue(n, n) for n in range(5)])
+    store = _make_store(jira, max_tickets=100)
+
+    stats = store.get_project_history('ABC', days_back=3)['ticket_statistics']
+    assert stats['total_tickets'] == 5 and stats['created_in_period'] == 4
+    assert not stats['truncated']
+    print("✅ Complete scan test passed")
+
+
+def test_failed_first_scan_raises():
+    """A full scan that fails is not stored as an empty project"""
+    print("🧪 Testing a failed first scan")
+
+    jira = FakeJira([_issue(1, 1)])
+    jira.fail = True
+    store = _make_store(jira, max_tickets=100)
+
+    try:
+        store.get_project_history('ABC')
+        assert False, "Expected JiraSearchError"
+    except JiraSearchError:
+        pass
+    print("✅ Failed scan test passed")
+
+
+class _SearchResponse:
+    """Minimal response of the Jira search API"""
+
+    def __init__(self, data):
+        self.status_code = 200
+        self.text = ''
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+def test_live_history_distinguishes_outage_from_partial_scan():
+    """The live fallback returns no history if Jira fails at once, and a truncated one if it fails later"""
+    print("🧪 Testing live project history failures")
+
+    jira = JiraIntegration({'base_url': 'https://example.atlassian.net', 'email': 'bot@example.com',
+                            'api_token': 'test-token'})
+
+    jira._make_request = lambda method, endpoint, data=None, params=None: None
+    assert jira.get_project_history('ABC') == {}
+
+    pages = [_SearchResponse({'issues': [_issue(1, 1)], 'nextPageToken': 'next'}), None]
+    jira._make_request = lambda method, endpoint, data=None, params=None: pages.pop(0)
+    stats = jira.get_project_history('ABC')['ticket_statistics']
+    assert stats['total_tickets'] == 1 and stats['truncated']
+    print("✅ Live history failure test passed")
+
+
+if __name__ == "__main__":
+    test_capped_first_scan_keeps_newest_tickets()
+    print()
+    test_small_project_is_not_truncated()
+    print()
+    test_failed_first_scan_raises()
+    print()
+    test_live_history_distinguishes_outage_from_partial_scan()
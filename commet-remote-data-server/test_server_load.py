@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Load test comparing the development launch mode (python server.py) with the
+production one (gunicorn -c gunicorn.conf.py wsgi:app)
+Jira search requests go to a local stub Jira with fixed latency, so it runs
+without credentials while still exercising an upstream-bound endpoint
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+STUB_LATENCY = 0.1  # Seconds per stubbed Jira request
+TOTAL_REQUESTS = 200
+CLIENT_THREADS = 32
+
+
+class StubJiraHandler(BaseHTTPRequestHandler):
+    """Minimal Jira API: slow search results and an instant /myself"""
+
+    def do_GET(self):
+        self._reply({'accountId': 'load-test'})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        time.sleep(STUB_LATENCY)
+        self._reply({
+            'issues': [
+                {'key': f"LOAD-{i}", 'fields': {'summary': f"Ticket {i}", 'status': {'name': 'To Do'}}}
+                for i in range(10)
+            ],
+            'isLast': True
+        })
+
+    def _reply(self, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_healthy(base_url, process, timeout=30):
+    """Poll /health until the server answers"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            if requests.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return True
+        except requests.RequestException:
+            time.sleep(0.2)
+    return False
+
+
+def _run_load(base_url):
+    """Fire TOTAL_REQUESTS Jira searches from CLIENT_THREADS threads; returns (elapsed, latencies, errors)"""
+    def search(i):
+        start = time.perf_counter()
+        try:
+            response = requests.post(f"{base_url}/api/integrations/jira/search", json={'jql': f"project = LOAD AND text ~ '{i}'"}, timeout=30)
+            ok = response.status_code == 200 and response.json().get('count') == 10
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CLIENT_THREADS) as executor:
+        results = list(executor.map(search, range(TOTAL_REQUESTS)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, ok in results if not ok)
+    return elapsed, latencies, errors
+
+
+def _benchmark(label, command, jira_url):
+    """Start the server with the given command, load it and stop it"""
+    port = _free_port()
+    data_dir = tempfile.mkdtemp(prefix='commet-load-')
+    env = {
+        **os.environ,
+        'PORT': str(port),
+        'FLASK_ENV': 'production',
+        'COMMET_DATA_DIR': data_dir,
+        'JIRA_URL': jira_url,
+        'JIRA_EMAIL': 'load@test.local',
+        'JIRA_API_TOKEN': 'load-test',
+        'JIRA_PROJECT_KEY': 'LOAD',
+        'JIRA_MIRROR_ENABLED': 'false',
+        'JIRA_POOL_SIZE': str(CLIENT_THREADS),
+        'GUNICORN_LOG_LEVEL': 'warning'
+    }
+    process = subprocess.Popen(command, cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        if not _wait_until_healthy(base_url, process):
+            print(f"   {label}: server did not start")
+            return None
+
+        _run_load(base_url)  # Warm up connection pools
+        elapsed, latencies, errors = _run_load(base_url)
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+
+        print(f"   {label:<10}: {elapsed:.2f}s, {TOTAL_REQUESTS / elapsed:.0f} req/s, "
+              f"p50 {p50 * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms, {errors} errors")
+        return {'elapsed': elapsed, 'p95': p95, 'errors': errors}
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def test_launch_modes():
+    """Both launch modes serve upstream-bound requests concurrently and without errors"""
+    print("🧪 Comparing launch modes under concurrent Jira searches")
+    print(f"   {TOTAL_REQUESTS} requests, {CLIENT_THREADS} client threads, stub Jira latency {STUB_LATENCY * 1000:.0f} ms")
+
+    stub = ThreadingHTTPServer(('127.0.0.1', 0), StubJiraHandler)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    jira_url = f"http://127.0.0.1:{stub.server_address[1]}"
+
+    try:
+        results = {'flask': _benchmark('flask', [sys.executable, 'server.py'], jira_url)}
+        if shutil.which('gunicorn'):
+            results['gunicorn'] = _benchmark('gunicorn', ['gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'], jira_url)
+        else:
+            print("   ⚠️  gunicorn not installed, skipping the production launch mode")
+    finally:
+        stub.shutdown()
+
+    ideal = TOTAL_REQUESTS * STUB_LATENCY / CLIENT_THREADS
+    for label, result in results.items():
+        if result is None:
+            continue
+        assert result['errors'] == 0, f"{label} returned errors"
+        # Requests overlap on threads: far faster than serving them one at a time
+        assert result['elapsed'] < TOTAL_REQUESTS * STUB_LATENCY / 2, f"{label} did not serve requests concurrently"
+        print(f"   {label}: {result['elapsed'] / ideal:.1f}x the ideal {ideal:.2f}s")
+
+    print("✅ Launch mode comparison passed")
+
+
+if __name__ == "__main__":
+    test_launch_modes()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Tests for the ticket fingerprint index
+Each test uses its own temporary database
+"""
+
+import os
+import sys
+import tempfile
+import threading
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ticket_fingerprints import TicketFingerprintIndex
+
+FINDING = "SQL injection in user search query src/api/users.py"
+SIMILAR_FINDING = "Possible SQL injection in the user search query src/api/users.py"
+
+
+def _make_index():
+    """Create an index on a temporary database"""
+    return TicketFingerprintIndex(db_path=os.path.join(tempfile.mkdtemp(), 'tickets.db'))
+
+
+def _load_server(index, jira):
+    """Import the server with its data in a temporary directory and the given index and Jira client"""
+    os.environ.setdefault('COMMET_DATA_DIR', tempfile.mkdtemp())
+    import server
+    server.ticket_index = index
+    server.jira_integration = jira
+    return server
+
+
+class FakeJira:
+    """Jira client recording comments and created tickets"""
+
+    def __init__(self, comment_ok=True):
+        self.comment_ok = comment_ok
+        self.comments = []
+        self.created = []
+
+    def add_comment(self, ticket_key, comment):
+        self.comments.append(ticket_key)
+        if isinstance(self.comment_ok, Exception):
+            raise self.comment_ok
+        return self.comment_ok
+
+    def create_quality_tickets_bulk(self, analyses):
+        self.created.extend(analyses)
+        return [{'success': True, 'key': f"PROJ-{100 + n}"} for n in range(len(analyses))]
+
+
+def _pending(title, file_path='src/api/users.py'):
+    """A (analysis_data, ticket_info) pair as collected from an analysis"""
+    analysis_data = {'title': title, 'file_path': file_path, 'repository': 'owner/repo', 'category': 'security'}
+    ticket_info = {'type': 'security', 'title': title, 'severity': 'high', 'priority': 'High', 'category': 'security'}
+    return analysis_data, ticket_info
+
+
+def test_concurrent_claims_file_one_ticket():
+    """Of many concurrent analyses reporting the same finding, exactly one may create the ticket"""
+    print("🧪 Testing concurrent fingerprint claims")
+
+    index = _make_index()
+    results = []
+    barrier = threading.Barrier(8)
+
+    def claim():
+        barrier.wait()
+        results.append(index.claim('owner/repo', 'security', FINDING, 'SQL injection'))
+
+    threads = [threading.Thread(target=claim) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    claims = [claim_id for match, claim_id in results if claim_id]
+    pending = [match for match, claim_id in results if match]
+    assert len(claims) == 1
+    assert len(pending) == 7 and all(match['ticket_key'] is None for match in pending)
+    # A claim in progress is not a ticket to comment on
+    assert index.find('owner/repo', 'security', FINDING) is None
+
+    index.complete(claims[0], 'PROJ-1')
+    match, claim_id = index.claim('owner/repo', 'security', SIMILAR_FINDING, 'SQL injection')
+    assert claim_id is None and match['ticket_key'] == 'PROJ-1'
+    print("✅ Concurrent claim test passed")
+
+
+def test_released_claim_can_be_retried():
+    """A claim whose ticket could not be created does not block the next attempt"""
+    print("🧪 Testing released claims")
+
+    index = _make_index()
+    _, claim_id = index.claim('owner/repo', 'security', FINDING, 'SQL injection')
+    index.release(claim_id)
+
+    match, retry_id = index.claim('owner/repo', 'security', FINDING, 'SQL injection')
+    assert match is None and retry_id
+    print("✅ Release test passed")
+
+
+def test_matches_are_scoped():
+    """Findings only match tickets of the same repository and category"""
+    print("🧪 Testing match scope")
+
+    index = _make_index()
+    index.add('owner/repo', 'security', FINDING, 'SQL injection', 'PROJ-1')
+
+    assert index.find('owner/repo', 'security', SIMILAR_FINDING)['ticket_key'] == 'PROJ-1'
+    assert index.find('owner/other', 'security', FINDING) is None
+    assert index.find('owner/repo', 'performance', FINDING) is None
+    assert index.find('owner/repo', 'security', "Slow image resizing in thumbnail worker") is None
+    print("✅ Scope test passed")
+
+
+def test_ticket_job_with_only_duplicates_succeeds():
+    """A job whose findings are all being filed by another analysis succeeds without retries"""
+    print("🧪 Testing a ticket job made up of duplicates")
+
+    index = _make_index()
+    jira = FakeJira()
+    server = _load_server(index, jira)
+    index.claim('owner/repo', 'security', FINDING, 'SQL injection')
+    # Occurrence counts are informational; failing to update one does not fail the job
+    index.record_occurrence = lambda fingerprint_id: 1 / 0
+
+    analysis_data, ticket_info = _pending('SQL injection in user search query')
+    result = server._run_jira_tickets_job({'tickets': [{'analysis_data': analysis_data, 'ticket_info': ticket_info}]})
+
+    assert result['tickets_failed'] == 0 and result['tickets_duplicate'] == 1
+    assert result['tickets_created'][0]['status'] == 'duplicate'
+    assert jira.created == [] and jira.comments == []
+    print("✅ Duplicate job test passed")
+
+
+def test_failed_comment_does_not_file_duplicate():
+    """If commenting on the matched ticket fails, no second ticket is created for the finding"""
+    print("🧪 Testing a failed comment on an existing ticket")
+
+    index = _make_index()
+    jira = FakeJira(comment_ok=False)
+    server = _load_server(index, jira)
+    index.add('owner/repo', 'security', FINDING, 'SQL injection', 'PROJ-1')
+
+    tickets = server._create_quality_tickets_bulk([_pending('SQL injection in user search query')], jira)
+    assert tickets == []
+    assert jira.comments == ['PROJ-1'] and jira.created == []
+    print("✅ Failed comment test passed")
+
+
+def test_claims_are_released_when_a_finding_errors():
+    """Claims taken earlier in a batch are released if a later finding raises"""
+    print("🧪 Testing claim release on errors")
+
+    index = _make_index()
+    jira = FakeJira(comment_ok=RuntimeError('connection reset'))
+    server = _load_server(index, jira)
+    index.add('owner/repo', 'performance', "Slow image resizing in thumbnail worker", 'Slow resizing', 'PROJ-2')
+
+    new_finding = _pending('SQL injection in user search query')
+    known_data, known_info = _pending('Slow image resizing in thumbnail worker', '')
+    known_data['category'] = 'performance'
+    try:
+        server._create_quality_tickets_bulk([new_finding, (known_data, known_info)], jira)
+        assert False, "Expected the comment error to propagate"
+    except RuntimeError:
+        pass
+
+    match, claim_id = index.claim('owner/repo', 'security', FINDING, 'SQL injection')
+    assert match is None and claim_id
+    print("✅ Claim release test passed")
+
+
+if __name__ == "__main__":
+    test_concurrent_claims_file_one_ticket()
+    print()
+    test_released_claim_can_be_retried()
+    print()
+    test_matches_are_scoped()
+    print()
+    test_ticket_job_with_only_duplicates_succeeds()
+    print()
+    test_failed_comment_does_not_file_duplicate()
+    print()
+    test_claims_are_released_when_a_finding_errors()
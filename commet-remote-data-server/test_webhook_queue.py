@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Tests for the webhook event queue
+Each test uses its own temporary database and processes events on the calling thread
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from storage import connect
+from webhook_queue import WebhookEventQueue, webhook_dedupe_key
+
+
+def _make_queue(process_batch, **kwargs):
+    """Create a queue on a temporary database whose worker never starts on its own"""
+    db_path = os.path.join(tempfile.mkdtemp(), 'webhooks.db')
+    queue = WebhookEventQueue(process_batch, db_path=db_path, batch_window=0, retry_backoff=0, **kwargs)
+    queue.start = lambda: None
+    return queue
+
+
+def _event(issue_key, timestamp, event_type='jira:issue_updated'):
+    """Build a minimal Jira webhook payload"""
+    return {'webhookEvent': event_type, 'timestamp': timestamp, 'issue': {'id': issue_key, 'key': issue_key}}
+
+
+def test_duplicate_deliveries_are_dropped():
+    """Provider retries of one event are stored once, by delivery identifier or payload"""
+    print("🧪 Testing webhook deduplication")
+
+    batches = []
+    queue = _make_queue(batches.append)
+
+    assert queue.enqueue(_event('PROJ-1', 1000), identifier='delivery-1')
+    assert not queue.enqueue(_event('PROJ-1', 1000), identifier='delivery-1')
+    assert queue.enqueue(_event('PROJ-1', 1000))
+    assert not queue.enqueue(_event('PROJ-1', 1000))
+    # A later change to the same issue is a new event
+    assert queue.enqueue(_event('PROJ-1', 2000))
+
+    assert queue.run_pending() == 3
+    # Still recognised as a duplicate after it was processed
+    assert not queue.enqueue(_event('PROJ-1', 2000))
+    assert queue.get_stats() == {'processed': 3}
+    print("✅ Deduplication test passed")
+
+
+def test_dedupe_key_without_timestamp():
+    """Payloads without a timestamp only match when their content is identical"""
+    print("🧪 Testing dedupe keys without timestamps")
+
+    first = {'webhookEvent': 'jira:issue_updated', 'issue': {'key': 'PROJ-1'}, 'changelog': {'id': '1'}}
+    second = {'webhookEvent': 'jira:issue_updated', 'issue': {'key': 'PROJ-1'}, 'changelog': {'id': '2'}}
+    assert webhook_dedupe_key(first) == webhook_dedupe_key(dict(first))
+    assert webhook_dedupe_key(first) != webhook_dedupe_key(second)
+    assert webhook_dedupe_key(first, 'abc') == 'id:abc'
+    print("✅ Dedupe key test passed")
+
+
+def test_events_are_batched_in_order():
+    """Pending events are handed over oldest first, at most batch_size at a time"""
+    print("🧪 Testing batching")
+
+    batches = []
+    queue = _make_queue(batches.append, batch_size=2)
+    for timestamp in range(5):
+        queue.enqueue(_event(f"PROJ-{timestamp}", timestamp))
+
+    assert queue.run_pending() == 5
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert [event['timestamp'] for batch in batches for event in batch] == [0, 1, 2, 3, 4]
+    print("✅ Batching test passed")
+
+
+def test_failed_batches_are_retried_then_failed():
+    """A batch whose handler raises goes back to the queue until max_attempts"""
+    print("🧪 Testing batch retries")
+
+    calls = []
+
+    def flaky(batch):
+        calls.append(batch)
+        if len(calls) == 1:
+            raise RuntimeError('jira unavailable')
+
+    queue = _make_queue(flaky)
+    queue.enqueue(_event('PROJ-1', 1))
+    assert queue.run_pending() == 2
+    assert len(calls) == 2 and queue.get_stats() == {'processed': 1}
+
+    def broken(batch):
+        raise RuntimeError('bad payload')
+
+    queue = _make_queue(broken, max_attempts=3)
+    queue.enqueue(_event('PROJ-2', 1))
+    assert queue.run_pending() == 3
+    assert queue.get_stats() == {'failed': 1}
+    print("✅ Retry test passed")
+
+
+def test_retry_waits_for_backoff():
+    """A failed batch is not retried before its backoff has passed"""
+    print("🧪 Testing retry backoff")
+
+    def broken(batch):
+        raise RuntimeError('jira unavailable')
+
+    queue = _make_queue(broken)
+    queue.retry_backoff = 10
+    queue.enqueue(_event('PROJ-1', 1))
+
+    assert queue.run_pending() == 1
+    assert queue.run_pending() == 0
+    with connect(queue.db_path) as conn:
+        run_after = conn.execute('SELECT run_after FROM webhook_events').fetchone()['run_after']
+    assert 9 < run_after - time.time() < 11
+    print("✅ Backoff test passed")
+
+
+def test_abandoned_lease_is_reclaimed():
+    """Events leased by a worker that died are picked up again once the lease expires"""
+    print("🧪 Testing abandoned leases")
+
+    batches = []
+    queue = _make_queue(batches.append, lease_seconds=60)
+    queue.enqueue(_event('PROJ-1', 1))
+
+    claimed = queue._claim_batch()
+    assert len(claimed) == 1
+    # Still leased: nothing to process
+    assert queue.run_pending() == 0
+
+    with connect(queue.db_path) as conn:
+        conn.execute('UPDATE webhook_events SET lease_expires = ?', (time.time() - 1,))
+    assert queue.run_pending() == 1
+    assert len(batches) == 1 and queue.get_stats() == {'processed': 1}
+    print("✅ Lease test passed")
+
+
+if __name__ == "__main__":
+    test_duplicate_deliveries_are_dropped()
+    print()
+    test_dedupe_key_without_timestamp()
+    print()
+    test_events_are_batched_in_order()
+    print()
+    test_failed_batches_are_retried_then_failed()
+    print()
+    test_retry_waits_for_backoff()
+    print()
+    test_abandoned_lease_is_reclaimed()
@@ -0,0 +1,226 @@
+"""
+Ticket Fingerprint Index
+Remembers auto-created Jira tickets by a MinHash of their normalized title so
+near-duplicate findings update the existing ticket instead of filing a new one
+
+A finding's fingerprint is claimed (recorded without a ticket key) before its
+ticket is created, so concurrent analyses of the same repository do not both
+file a ticket for it.
+"""
+
+import os
+import re
+import hashlib
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Tuple
+
+from storage import get_data_path, connect
+
+# MinHash signature size; the Jaccard estimate has a standard error of about 0.06
+MINHASH_PERMUTATIONS = 64
+
+# Claims whose ticket was never created (e.g. the process died) are dropped after this long
+CLAIM_TIMEOUT_SECONDS = 600
+
+# Words that carry no meaning for matching findings
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'in', 'is', 'it',
+    'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'with', 'ai', 'detected', 'issue'
+}
+
+
+def normalize_text(text: str) -> list:
+    """
+    Normalize text into comparable tokens
+
+    Lowercases, drops punctuation, numbers, hex hashes and stop words.
+
+    Args:
+        text: Raw ticket text
+
+    Returns:
+        List of tokens
+    """
+    words = re.findall(r'[a-z][a-z0-9_]+', (text or '').lower())
+    return [word for word in words if word not in STOP_WORDS and not re.fullmatch(r'[0-9a-f]{7,40}', word)]
+
+
+def minhash(text: str) -> list:
+    """
+    Compute the MinHash signature of a text's normalized word set
+
+    Args:
+        text: Raw ticket text
+
+    Returns:
+        List of MINHASH_PERMUTATIONS 32-bit minimum hashes
+    """
+    tokens = set(normalize_text(text)) or {''}
+    return [
+        min(int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=4, salt=seed.to_bytes(8, 'big')).digest(), 'big')
+            for token in tokens)
+        for seed in range(MINHASH_PERMUTATIONS)
+    ]
+
+
+def estimate_similarity(a: list, b: list) -> float:
+    """Estimate the Jaccard similarity of two texts from their MinHash signatures"""
+    return sum(1 for x, y in zip(a, b) if x == y) / MINHASH_PERMUTATIONS
+
+
+def encode_signature(signature: list) -> str:
+    """Encode a MinHash signature for storage"""
+    return ''.join(format(value, '08x') for value in signature)
+
+
+def decode_signature(encoded: str) -> list:
+    """Decode a stored MinHash signature"""
+    return [int(encoded[i:i + 8], 16) for i in range(0, len(encoded), 8)]
+
+
+class TicketFingerprintIndex:
+    """SQLite-backed index of auto-created tickets by repository, category and MinHash"""
+
+    def __init__(self, db_path: Optional[str] = None, min_similarity: Optional[float] = None,
+                 window_days: Optional[int] = None):
+        """
+        Initialize the fingerprint index
+
+        Args:
+            db_path: SQLite database path (defaults to tickets.db in COMMET_DATA_DIR)
+            min_similarity: Minimum estimated Jaccard similarity for a match (TICKET_DEDUP_SIMILARITY, default 0.5)
+            window_days: Only match tickets seen within this many days (TICKET_DEDUP_WINDOW_DAYS, default 90)
+        """
+        self.db_path = db_path or get_data_path('tickets.db')
+        self.min_similarity = min_similarity if min_similarity is not None else float(os.getenv('TICKET_DEDUP_SIMILARITY', 0.5))
+        self.window_days = window_days or int(os.getenv('TICKET_DEDUP_WINDOW_DAYS', 90))
+
+        with connect(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS ticket_fingerprints (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    repository TEXT NOT NULL,
+                    category TEXT NOT NULL,
+                    signature TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    ticket_key TEXT NOT NULL,
+                    occurrences INTEGER NOT NULL DEFAULT 1,
+                    created_at TEXT NOT NULL,
+                    last_seen_at TEXT NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_fingerprints_repo_category ON ticket_fingerprints (repository, category)')
+
+    def find(self, repository: str, category: str, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Find the closest matching ticket for a finding
+
+        Args:
+            repository: Repository in format 'owner/repo'
+            category: Finding category
+            text: Finding text (title and affected file)
+
+        Returns:
+            Dictionary with id, ticket_key, title, occurrences and similarity, or None
+        """
+        with connect(self.db_path) as conn:
+            best = self._best_match(conn, repository, category, minhash(text))
+
+        return best if best and best['ticket_key'] else None
+
+    def claim(self, repository: str, category: str, text: str, title: str) -> Tuple[Optional[Dict[str, Any]], Optional[int]]:
+        """
+        Find the matching ticket for a finding, or claim its fingerprint for a new ticket
+
+        The lookup and the claim run in one write transaction, so of two concurrent
+        near-duplicate findings only one gets the claim. Pass the claim to complete()
+        once the ticket exists, or to release() if creating it failed.
+
+        Args:
+            repository: Repository in format 'owner/repo'
+            category: Finding category
+            text: Finding text (title and affected file)
+            title: Ticket title
+
+        Returns:
+            (match, None) if a ticket exists or is being created (its ticket_key is then None),
+            or (None, claim ID) if the caller should create the ticket
+        """
+        signature = minhash(text)
+        now = datetime.now()
+
+        with connect(self.db_path) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute(
+                "DELETE FROM ticket_fingerprints WHERE ticket_key = '' AND created_at < ?",
+                ((now - timedelta(seconds=CLAIM_TIMEOUT_SECONDS)).isoformat(),)
+            )
+            best = self._best_match(conn, repository, category, signature)
+            if best:
+                return best, None
+
+            cursor = conn.execute(
+                'INSERT INTO ticket_fingerprints (repository, category, signature, title, ticket_key, created_at, last_seen_at) '
+                "VALUES (?, ?, ?, ?, '', ?, ?)",
+                (repository, category, encode_signature(signature), title, now.isoformat(), now.isoformat())
+            )
+            return None, cursor.lastrowid
+
+    def complete(self, claim_id: int, ticket_key: str):
+        """Attach the created ticket to a claimed fingerprint"""
+        with connect(self.db_path) as conn:
+            conn.execute('UPDATE ticket_fingerprints SET ticket_key = ? WHERE id = ?', (ticket_key, claim_id))
+
+    def release(self, claim_id: int):
+        """Drop a claim whose ticket could not be created"""
+        with connect(self.db_path) as conn:
+            conn.execute("DELETE FROM ticket_fingerprints WHERE id = ? AND ticket_key = ''", (claim_id,))
+
+    def _best_match(self, conn, repository: str, category: str, signature: list) -> Optional[Dict[str, Any]]:
+        """Most similar fingerprint above min_similarity (claims in progress have ticket_key None)"""
+        since = (datetime.now() - timedelta(days=self.window_days)).isoformat()
+        rows = conn.execute(
+            'SELECT * FROM ticket_fingerprints WHERE repository = ? AND category = ? AND last_seen_at >= ?',
+            (repository, category, since)
+        ).fetchall()
+
+        best = None
+        for row in rows:
+            similarity = estimate_similarity(signature, decode_signature(row['signature']))
+            if similarity >= self.min_similarity and (best is None or similarity > best['similarity']):
+                best = {
+                    'id': row['id'],
+                    'ticket_key': row['ticket_key'] or None,
+                    'title': row['title'],
+                    'occurrences': row['occurrences'],
+                    'similarity': similarity
+                }
+
+        return best
+
+    def add(self, repository: str, category: str, text: str, title: str, ticket_key: str):
+        """
+        Record a newly created ticket
+
+        Args:
+            repository: Repository in format 'owner/repo'
+            category: Finding category
+            text: Finding text the fingerprint is computed from
+            title: Ticket title
+            ticket_key: Jira ticket key
+        """
+        now = datetime.now().isoformat()
+        with connect(self.db_path) as conn:
+            conn.execute(
+                'INSERT INTO ticket_fingerprints (repository, category, signature, title, ticket_key, created_at, last_seen_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (repository, category, encode_signature(minhash(text)), title, ticket_key, now, now)
+            )
+
+    def record_occurrence(self, fingerprint_id: int):
+        """Count another occurrence of an already ticketed finding"""
+        with connect(self.db_path) as conn:
+            conn.execute(
+                'UPDATE ticket_fingerprints SET occurrences = occurrences + 1, last_seen_at = ? WHERE id = ?',
+                (datetime.now().isoformat(), fingerprint_id)
+            )
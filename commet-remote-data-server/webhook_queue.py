@@ -0,0 +1,246 @@
+"""
+Webhook Event Queue
+Durable SQLite inbox for incoming webhooks: the endpoint stores and acknowledges
+each event immediately, duplicates (provider retries) are dropped, and a worker
+thread hands accumulated events to the handler in batches
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Callable, Optional
+
+from storage import get_data_path, connect
+
+logger = logging.getLogger(__name__)
+
+
+def webhook_dedupe_key(payload: Dict[str, Any], identifier: Optional[str] = None) -> str:
+    """
+    Build the deduplication key of a webhook event
+
+    Jira sends the same X-Atlassian-Webhook-Identifier (and payload timestamp) when it
+    retries a delivery, so either identifies repeats of one event.
+
+    Args:
+        payload: Webhook payload
+        identifier: Delivery identifier header, if the provider sent one
+
+    Returns:
+        Deduplication key
+    """
+    if identifier:
+        return f"id:{identifier}"
+
+    issue = payload.get('issue') or {}
+    parts = [payload.get('webhookEvent'), issue.get('id') or issue.get('key'), payload.get('timestamp')]
+    if payload.get('timestamp') is None:
+        # No timestamp to tell events apart: fall back to the full content
+        parts.append(json.dumps(payload, sort_keys=True))
+    return 'event:' + hashlib.sha256(json.dumps(parts, default=str).encode('utf-8')).hexdigest()
+
+
+class WebhookEventQueue:
+    """
+    SQLite-backed webhook inbox processed in batches by a worker thread
+
+    After the first event of a burst arrives the worker waits batch_window seconds
+    so related events (e.g. a bulk edit) are handled together. A batch whose
+    handler raises is retried with backoff up to max_attempts times. Processed
+    events are kept for retention_hours so late retries are still recognised as
+    duplicates.
+    """
+
+    def __init__(self, process_batch: Callable[[List[Dict[str, Any]]], Any], db_path: Optional[str] = None,
+                 batch_window: Optional[float] = None, batch_size: int = 500, max_attempts: int = 5,
+                 retention_hours: Optional[int] = None, lease_seconds: int = 300, retry_backoff: float = 5.0):
+        """
+        Initialize the webhook queue
+
+        Args:
+            process_batch: Callable receiving a list of payloads (oldest first)
+            db_path: SQLite database path (defaults to webhooks.db in COMMET_DATA_DIR)
+            batch_window: Seconds to let a burst accumulate (WEBHOOK_BATCH_WINDOW_SECONDS, default 2)
+            batch_size: Maximum events handed to process_batch at once
+            max_attempts: Attempts per event before it is marked failed
+            retention_hours: Hours processed events are kept for deduplication (WEBHOOK_DEDUP_RETENTION_HOURS, default 24)
+            lease_seconds: Time after which a claimed batch is considered abandoned
+            retry_backoff: Base delay in seconds before a failed batch is retried (doubled per attempt)
+        """
+        self.process_batch = process_batch
+        self.db_path = db_path or get_data_path('webhooks.db')
+        self.batch_window = batch_window if batch_window is not None else float(os.getenv('WEBHOOK_BATCH_WINDOW_SECONDS', 2))
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retention_hours = retention_hours or int(os.getenv('WEBHOOK_DEDUP_RETENTION_HOURS', 24))
+        self.lease_seconds = lease_seconds
+        self.retry_backoff = retry_backoff
+
+        self._wakeup = threading.Event()
+        self._worker = None
+        self._worker_pid = None
+        self._worker_lock = threading.Lock()
+        self._last_purge = 0.0
+
+        with connect(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS webhook_events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    dedupe_key TEXT NOT NULL UNIQUE,
+                    event_type TEXT,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    run_after REAL NOT NULL DEFAULT 0,
+                    lease_expires REAL,
+                    received_at TEXT NOT NULL,
+                    processed_at TEXT
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_webhook_events_status ON webhook_events (status, id)')
+
+    def enqueue(self, payload: Dict[str, Any], identifier: Optional[str] = None) -> bool:
+        """
+        Store an incoming webhook unless it was already received
+
+        Args:
+            payload: Webhook payload
+            identifier: Delivery identifier header, if any
+
+        Returns:
+            True if the event is new, False if it is a duplicate
+        """
+        with connect(self.db_path) as conn:
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO webhook_events (dedupe_key, event_type, payload, received_at) VALUES (?, ?, ?, ?)',
+                (webhook_dedupe_key(payload, identifier), payload.get('webhookEvent'), json.dumps(payload),
+                 datetime.now().isoformat())
+            )
+            is_new = cursor.rowcount == 1
+
+        if is_new:
+            self.start()
+            self._wakeup.set()
+        return is_new
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get the number of stored events per status
+
+        Returns:
+            Dictionary of status to event count
+        """
+        with connect(self.db_path) as conn:
+            rows = conn.execute('SELECT status, COUNT(*) AS count FROM webhook_events GROUP BY status').fetchall()
+
+        return {row['status']: row['count'] for row in rows}
+
+    def start(self):
+        """Start the worker thread for this process if it is not running"""
+        if self._worker and self._worker.is_alive() and self._worker_pid == os.getpid():
+            return
+
+        with self._worker_lock:
+            if self._worker and self._worker.is_alive() and self._worker_pid == os.getpid():
+                return
+
+            self._worker = threading.Thread(target=self._run_worker, name='webhook-queue-worker', daemon=True)
+            self._worker_pid = os.getpid()
+            self._worker.start()
+
+    def run_pending(self) -> int:
+        """
+        Process pending events on the calling thread until none are left
+
+        Returns:
+            Number of events processed
+        """
+        processed = 0
+        while True:
+            count = self._process_next_batch()
+            if not count:
+                return processed
+            processed += count
+
+    def _run_worker(self):
+        """Worker loop: wait for events, let the burst accumulate, then process it in batches"""
+        while True:
+            self._wakeup.wait(30)
+            self._wakeup.clear()
+            time.sleep(self.batch_window)
+
+            try:
+                while self._process_next_batch():
+                    pass
+                self._purge_processed()
+            except Exception as e:
+                logger.error(f"Webhook queue worker error: {str(e)}")
+
+    def _process_next_batch(self) -> int:
+        """Claim and process one batch of pending events; returns the number of events"""
+        events = self._claim_batch()
+        if not events:
+            return 0
+
+        ids = [event['id'] for event in events]
+        try:
+            self.process_batch([json.loads(event['payload']) for event in events])
+        except Exception as e:
+            logger.warning(f"Webhook batch of {len(events)} events failed: {str(e)}")
+            self._release(events, str(e))
+        else:
+            self._mark(ids, 'processed')
+
+        return len(events)
+
+    def _claim_batch(self) -> List[Dict[str, Any]]:
+        """Atomically lease the oldest pending events (and abandoned leases)"""
+        now = time.time()
+
+        with connect(self.db_path) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            rows = conn.execute(
+                "SELECT * FROM webhook_events WHERE (status = 'pending' AND run_after <= ?) "
+                "OR (status = 'processing' AND lease_expires < ?) ORDER BY id LIMIT ?",
+                (now, now, self.batch_size)
+            ).fetchall()
+            if rows:
+                conn.executemany(
+                    "UPDATE webhook_events SET status = 'processing', attempts = attempts + 1, lease_expires = ? WHERE id = ?",
+                    [(now + self.lease_seconds, row['id']) for row in rows]
+                )
+
+        return [{**dict(row), 'attempts': row['attempts'] + 1} for row in rows]
+
+    def _release(self, events: List[Dict[str, Any]], error: str):
+        """Return failed events to the queue with exponential backoff, or mark them failed after max_attempts"""
+        with connect(self.db_path) as conn:
+            for event in events:
+                status = 'failed' if event['attempts'] >= self.max_attempts else 'pending'
+                conn.execute(
+                    'UPDATE webhook_events SET status = ?, error = ?, run_after = ?, lease_expires = NULL WHERE id = ?',
+                    (status, error, time.time() + self.retry_backoff * (2 ** (event['attempts'] - 1)), event['id'])
+                )
+
+    def _mark(self, ids: List[int], status: str):
+        """Mark events as done"""
+        with connect(self.db_path) as conn:
+            conn.executemany(
+                'UPDATE webhook_events SET status = ?, error = NULL, lease_expires = NULL, processed_at = ? WHERE id = ?',
+                [(status, datetime.now().isoformat(), event_id) for event_id in ids]
+            )
+
+    def _purge_processed(self):
+        """Delete processed events older than the dedupe retention (at most once a minute)"""
+        if time.time() - self._last_purge < 60:
+            return
+        self._last_purge = time.time()
+
+        cutoff = (datetime.now() - timedelta(hours=self.retention_hours)).isoformat()
+        with connect(self.db_path) as conn:
+            conn.execute("DELETE FROM webhook_events WHERE status = 'processed' AND processed_at < ?", (cutoff,))
@@ -2,9 +2,11 @@
 Jira webhook handlers for real-time integration
 """
 
+import hmac
 import json
+import hashlib
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, List, Any, Optional
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -12,14 +14,46 @@ logger = logging.getLogger(__name__)
 class JiraWebhookHandler:
     """Handle Jira webhooks for real-time integration"""
     
-    def __init__(self, jira_integration=None):
+    def __init__(self, jira_integration=None, mirror=None, secret: Optional[str] = None):
         """
         Initialize Jira webhook handler
         
         Args:
             jira_integration: JiraIntegration instance
+            mirror: Optional JiraMirror kept up to date from issue events
+            secret: Webhook secret (JIRA_WEBHOOK_SECRET); requests are unauthenticated if unset
         """
         self.jira_integration = jira_integration
+        self.mirror = mirror
+        self.secret = secret
+    
+    def verify_request(self, body: bytes, signature: Optional[str] = None, token: Optional[str] = None) -> bool:
+        """
+        Check that a webhook request was sent by Jira
+        
+        Jira signs the body of webhooks created with a secret and sends the
+        HMAC-SHA256 as X-Hub-Signature ("sha256=<hex>"). Webhooks that cannot be
+        signed can instead carry the secret in the URL (?secret=...).
+        
+        Args:
+            body: Raw request body
+            signature: X-Hub-Signature header, if any
+            token: Secret passed in the webhook URL, if any
+            
+        Returns:
+            True if no secret is configured or the request carries a valid one
+        """
+        if not self.secret:
+            return True
+        
+        if signature:
+            method, _, digest = signature.partition('=')
+            if method == 'sha256':
+                expected = hmac.new(self.secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+                return hmac.compare_digest(expected, digest)
+            return False
+        
+        return bool(token) and hmac.compare_digest(self.secret.encode('utf-8'), token.encode('utf-8'))
     
     def handle_webhook(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -31,6 +65,66 @@ class JiraWebhookHandler:
         Returns:
             Response dictionary
         """
+        result = self._dispatch(payload)
+        issue_key = (payload.get('issue') or {}).get('key')
+        if result.get('status') == 'success' and issue_key and self._is_issue_event(payload):
+            try:
+                self._sync_mirror(issue_key, [payload])
+            except Exception as e:
+                logger.error(f"Error updating Jira mirror for {issue_key}: {str(e)}")
+        return result
+    
+    def handle_batch(self, payloads: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Handle a batch of queued webhooks, coalescing issue events per issue
+        
+        Every event is dispatched in timestamp order, but the mirror refreshes each
+        issue once, however many events named it.
+        
+        Args:
+            payloads: Jira webhook payloads
+            
+        Returns:
+            Summary with the number of events, issues and errors
+        """
+        issue_events = {}
+        errors = 0
+        
+        for payload in sorted(payloads, key=lambda payload: payload.get('timestamp') or 0):
+            result = self._dispatch(payload)
+            if result.get('status') == 'error':
+                errors += 1
+                continue
+            
+            issue_key = (payload.get('issue') or {}).get('key')
+            if issue_key and self._is_issue_event(payload):
+                issue_events.setdefault(issue_key, []).append(payload)
+        
+        for issue_key, events in issue_events.items():
+            self._sync_mirror(issue_key, events)
+        
+        return {
+            'status': 'success' if not errors else 'partial',
+            'events': len(payloads),
+            'issues': len(issue_events),
+            'errors': errors
+        }
+    
+    @staticmethod
+    def _is_issue_event(payload: Dict[str, Any]) -> bool:
+        """Check whether a payload is an issue created/updated/deleted event"""
+        return payload.get('webhookEvent') in ('jira:issue_created', 'jira:issue_updated', 'jira:issue_deleted')
+    
+    def _sync_mirror(self, issue_key: str, events: List[Dict[str, Any]]):
+        """Bring the mirror's copy of an issue up to date after events about it"""
+        if not self.mirror:
+            return
+        
+        # The payloads are not trusted as issue data: the mirror reads the issue back from Jira
+        self.mirror.refresh_issue(issue_key)
+    
+    def _dispatch(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Route a webhook payload to its event handler"""
         try:
             webhook_event = payload.get('webhookEvent')
             logger.info(f"Received Jira webhook: {webhook_event}")